@@ -1,12 +0,0 @@
-#version 410 core
-
-in vec3 in_position;
-
-uniform mat4 projection_matrix;
-uniform mat4 view_matrix;
-uniform mat4 model_matrix;
-
-void
-main() {
-    gl_Position = projection_matrix * view_matrix * model_matrix * vec4(in_position, 1.0);
-}
\ No newline at end of file
@@ -1,6 +1,5 @@
 from modules.core import GLEngine
 # from modules.shapes import *
-from beta.teapot import Teapot
 import modules.scene as scene
 import modules.demos as demos
 
@@ -13,10 +12,10 @@ if __name__ == '__main__':
     # scenes = [demos.HelloTriangle(demo)]
     # scenes = [demos.TestCube(demo), demos.SkeletonCube(demo)]
     # scenes = [demos.CompanionCube(demo)]
-    # scenes = [Teapot(demo)]
     
     # scenes = [scene.CompanionCube(demo)]
     # scenes = [scene.TestCube(demo)]
+    # scenes = [scene.Teapots(demo)]
     
     scenes = [scene.TestingField(demo)]
     demo.set_scenes(scenes)
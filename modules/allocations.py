@@ -0,0 +1,72 @@
+import gc
+import sys
+import tracemalloc
+
+REPORT_INTERVAL = 120 # frames between two reports
+TOP_SITES = 10 # call sites listed per report
+
+
+
+class AllocationTracker:
+    """
+    Reports the Python allocations of the frames, to hunt the garbage that ends up in collection hitches.
+    Every REPORT_INTERVAL frames, two tracemalloc snapshots give the blocks still alive per call site,
+    the peak of the traced memory within each frame gives the weight of the objects freed before its end,
+    and the gc callbacks count the collections of each generation.
+    tracemalloc slows every allocation down, the frame times measured meanwhile are not representative.
+    """
+    def __init__(self, report_interval: int = REPORT_INTERVAL, top_sites: int = TOP_SITES) -> None:
+        self._report_interval = report_interval
+        self._top_sites = top_sites
+        tracemalloc.start()
+        # the snapshots and the reports don't count
+        self._filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        self._snapshot = tracemalloc.take_snapshot().filter_traces(self._filters)
+        self._frame = 0
+        self._frame_start_memory = 0
+        self._transient_bytes = 0 # summed over the frames of the report
+        self._allocated_blocks = sys.getallocatedblocks()
+        self._collections = [0, 0, 0]
+        gc.callbacks.append(self.on_collection)
+
+    @property
+    def frame(self) -> int:
+        return self._frame
+
+    def on_collection(self, phase: str, info: dict) -> None:
+        if phase == 'start':
+            self._collections[info['generation']] += 1
+
+    def begin_frame(self) -> None:
+        tracemalloc.reset_peak()
+        self._frame_start_memory = tracemalloc.get_traced_memory()[0]
+
+    def end_frame(self) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        self._transient_bytes += peak - max(current, self._frame_start_memory)
+        self._frame += 1
+        if self._frame % self._report_interval == 0:
+            self.report()
+
+    def report(self) -> None:
+        frames = self._report_interval
+        snapshot = tracemalloc.take_snapshot().filter_traces(self._filters)
+        allocated_blocks = sys.getallocatedblocks()
+        print(f'allocations over frames {self._frame - frames} to {self._frame} :')
+        print(f'  {(allocated_blocks - self._allocated_blocks) / frames:+.1f} blocks alive per frame, '
+              f'{self._transient_bytes / frames:.0f} B freed within the frame (peak) per frame')
+        print(f'  gc collections per frame : ' + ', '.join(f'gen {i} {count / frames:.3f}' for i, count in enumerate(self._collections)))
+        # the call sites whose blocks are still alive at the end of the frames
+        for statistic in snapshot.compare_to(self._snapshot, 'lineno')[:self._top_sites]:
+            if statistic.count_diff == 0:
+                break
+            frame = statistic.traceback[0]
+            print(f'  {statistic.count_diff / frames:+8.2f} blocks {statistic.size_diff / frames:+10.1f} B per frame  {frame.filename}:{frame.lineno}')
+        self._snapshot = snapshot
+        self._allocated_blocks = sys.getallocatedblocks()
+        self._transient_bytes = 0
+        self._collections = [0, 0, 0]
+
+    def destroy(self) -> None:
+        gc.callbacks.remove(self.on_collection)
+        tracemalloc.stop()
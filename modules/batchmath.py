@@ -0,0 +1,206 @@
+"""
+Batched counterparts of the glmath wrappers, over float32 numpy arrays : (N, 3) vectors, (N, 4, 4) matrices.
+The matrices are laid out like glm and OpenGL lay them out, column by column : m[i, column, row].
+An array of matrices is thus uploaded as is, and converts from and to glm without reordering,
+but m[i] read as a numpy matrix is the transpose of the math matrix :
+the product A * B is multiply(a, b) (i.e. b @ a) and a row of points is transformed by points @ m.
+A single (4, 4) matrix, (3,) vector or scalar argument applies to the whole batch.
+"""
+import glm
+import numpy as np
+import modules.glmath as glmath
+
+#-------------- glm interop -------------#
+
+# list of glm vectors or matrices to an (N, ...) array
+# through their bytes, numpy would read the glm matrices row by row
+def from_glm(values: list[glmath.vec3f | glmath.vec4f | glmath.mat4x4f]) -> np.ndarray:
+    shape = (4, 4) if isinstance(values[0], glmath.mat4x4f) else (len(values[0]),)
+    return np.frombuffer(b''.join(value.to_bytes() for value in values), dtype = 'f4').reshape(len(values), *shape).copy()
+
+def to_glm(array: np.ndarray) -> list[glmath.vec3f | glmath.vec4f | glmath.mat4x4f]:
+    array = np.ascontiguousarray(array, dtype = 'f4')
+    glm_type = {(3,): glmath.vec3f, (4,): glmath.vec4f, (4, 4): glmath.mat4x4f}[array.shape[1:]]
+    return [glm_type.from_bytes(value.tobytes()) for value in array]
+
+#----------- linear algebrae ------------#
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype = 'f4')
+    return vectors / np.linalg.norm(vectors, axis = -1, keepdims = True)
+
+def identity_matrices(count: int) -> np.ndarray:
+    matrices = np.zeros((count, 4, 4), dtype = 'f4')
+    matrices[:, [0, 1, 2, 3], [0, 1, 2, 3]] = 1
+    return matrices
+
+# A * B
+def multiply(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.matmul(b, a)
+
+def inverse(matrices: np.ndarray) -> np.ndarray:
+    return np.linalg.inv(matrices).astype('f4')
+
+def translation(translations: np.ndarray) -> np.ndarray:
+    translations = np.asarray(translations, dtype = 'f4').reshape(-1, 3)
+    matrices = identity_matrices(len(translations))
+    matrices[:, 3, :3] = translations
+    return matrices
+
+def scaling(scales: np.ndarray) -> np.ndarray:
+    scales = np.asarray(scales, dtype = 'f4').reshape(-1, 3)
+    matrices = np.zeros((len(scales), 4, 4), dtype = 'f4')
+    matrices[:, [0, 1, 2], [0, 1, 2]] = scales
+    matrices[:, 3, 3] = 1
+    return matrices
+
+# same as glm.rotate(angle, axis), angles in radians
+def rotation(angles: np.ndarray, axes: np.ndarray) -> np.ndarray:
+    angles = np.asarray(angles, dtype = 'f4').reshape(-1)
+    axes = np.broadcast_to(normalize(axes), (len(angles), 3))
+    x, y, z = axes[:, 0], axes[:, 1], axes[:, 2]
+    cos = np.cos(angles)
+    sin = np.sin(angles)
+    one_minus_cos = 1 - cos
+    # Rodrigues, cos * I + sin * [axis]x + (1 - cos) * axis axis^T written column by column
+    matrices = np.zeros((len(angles), 4, 4), dtype = 'f4')
+    matrices[:, 0, 0] = one_minus_cos * x * x + cos
+    matrices[:, 0, 1] = one_minus_cos * x * y + sin * z
+    matrices[:, 0, 2] = one_minus_cos * x * z - sin * y
+    matrices[:, 1, 0] = one_minus_cos * x * y - sin * z
+    matrices[:, 1, 1] = one_minus_cos * y * y + cos
+    matrices[:, 1, 2] = one_minus_cos * y * z + sin * x
+    matrices[:, 2, 0] = one_minus_cos * x * z + sin * y
+    matrices[:, 2, 1] = one_minus_cos * y * z - sin * x
+    matrices[:, 2, 2] = one_minus_cos * z * z + cos
+    matrices[:, 3, 3] = 1
+    return matrices
+
+# translate * rotate * scale, the model matrices of a batch of objects
+def trs(translations: np.ndarray, angles: np.ndarray, axes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    matrices = rotation(angles, axes)
+    scales = np.asarray(scales, dtype = 'f4').reshape(-1, 1, 3)
+    matrices[:, :3, :3] *= scales.transpose(0, 2, 1) # scales the columns
+    translations = np.asarray(translations, dtype = 'f4').reshape(-1, 3)
+    matrices[:, 3, :3] = translations
+    return matrices
+
+# inverse transpose of the upper 3x3, the matrices that transform the normals, (N, 3, 3) laid out like glm.mat3
+# the columns of the cofactor matrix over the determinant : no inversion, and no transpose to undo
+def normal_matrices(matrices: np.ndarray) -> np.ndarray:
+    columns = np.asarray(matrices, dtype = 'f4')[..., :3, :3]
+    cofactors = np.stack([np.cross(columns[..., 1, :], columns[..., 2, :]),
+                          np.cross(columns[..., 2, :], columns[..., 0, :]),
+                          np.cross(columns[..., 0, :], columns[..., 1, :])], axis = -2)
+    determinants = np.einsum('...i,...i->...', columns[..., 0, :], cofactors[..., 0, :])
+    return (cofactors / determinants[..., None, None]).astype('f4')
+
+# same as glm.lookAt, right handed
+def look_at(eyes: np.ndarray, centers: np.ndarray, ups: np.ndarray) -> np.ndarray:
+    eyes, centers, ups = np.broadcast_arrays(*(np.asarray(v, dtype = 'f4').reshape(-1, 3) for v in (eyes, centers, ups)))
+    forward = normalize(centers - eyes)
+    right = normalize(np.cross(forward, ups))
+    up = np.cross(right, forward)
+    matrices = identity_matrices(len(eyes))
+    matrices[:, :3, 0] = right
+    matrices[:, :3, 1] = up
+    matrices[:, :3, 2] = -forward
+    matrices[:, 3, 0] = -np.einsum('ij,ij->i', right, eyes)
+    matrices[:, 3, 1] = -np.einsum('ij,ij->i', up, eyes)
+    matrices[:, 3, 2] = np.einsum('ij,ij->i', forward, eyes)
+    return matrices
+
+# same as glm.perspective, fovy in radians
+def perspective(fovy: np.ndarray, aspect: np.ndarray, near: np.ndarray, far: np.ndarray) -> np.ndarray:
+    fovy, aspect, near, far = np.broadcast_arrays(*(np.asarray(v, dtype = 'f4').reshape(-1) for v in (fovy, aspect, near, far)))
+    tan_half_fovy = np.tan(fovy / 2)
+    matrices = np.zeros((len(fovy), 4, 4), dtype = 'f4')
+    matrices[:, 0, 0] = 1 / (aspect * tan_half_fovy)
+    matrices[:, 1, 1] = 1 / tan_half_fovy
+    matrices[:, 2, 2] = -(far + near) / (far - near)
+    matrices[:, 2, 3] = -1
+    matrices[:, 3, 2] = -(2 * far * near) / (far - near)
+    return matrices
+
+# (N, 6, 4) planes (left, right, bottom, top, near, far) of view-projection matrices, normals pointing inwards
+# same as glmath.frustum_planes
+def frustum_planes(matrices: np.ndarray) -> np.ndarray:
+    matrices = np.asarray(matrices, dtype = 'f4').reshape(-1, 4, 4)
+    rows = matrices.transpose(0, 2, 1)
+    planes = np.stack([rows[:, 3] + rows[:, 0], rows[:, 3] - rows[:, 0],
+                       rows[:, 3] + rows[:, 1], rows[:, 3] - rows[:, 1],
+                       rows[:, 3] + rows[:, 2], rows[:, 3] - rows[:, 2]], axis = 1)
+    return planes / np.linalg.norm(planes[..., :3], axis = -1, keepdims = True)
+
+# (N, 3) points through affine matrices
+def transform_points(matrices: np.ndarray, points: np.ndarray) -> np.ndarray:
+    matrices = np.asarray(matrices, dtype = 'f4')
+    points = np.asarray(points, dtype = 'f4')
+    return np.einsum('...i,...ij->...j', points, matrices[..., :3, :3]) + matrices[..., 3, :3]
+
+# world space bounds of local boxes, from their center and extents (Arvo) rather than their 8 corners
+def transform_aabbs(matrices: np.ndarray, mins: np.ndarray, maxs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    matrices = np.asarray(matrices, dtype = 'f4')
+    mins = np.asarray(mins, dtype = 'f4')
+    maxs = np.asarray(maxs, dtype = 'f4')
+    centers = transform_points(matrices, (mins + maxs) / 2)
+    extents = np.einsum('...i,...ij->...j', (maxs - mins) / 2, np.abs(matrices[..., :3, :3]))
+    return centers - extents, centers + extents
+
+
+#-------------- microbenchmarks ---------#
+
+def benchmark(count: int = 10_000, repeat: int = 5) -> None:
+    import timeit
+    rng = np.random.default_rng(0)
+    translations = rng.uniform(-10, 10, (count, 3)).astype('f4')
+    angles = rng.uniform(0, 2 * np.pi, count).astype('f4')
+    axes = normalize(rng.uniform(-1, 1, (count, 3)))
+    scales = rng.uniform(0.5, 2, (count, 3)).astype('f4')
+    glm_translations, glm_axes, glm_scales = to_glm(translations), to_glm(axes), to_glm(scales)
+    matrices = trs(translations, angles, axes, scales)
+    glm_matrices = to_glm(matrices)
+    mins, maxs = -np.ones((count, 3), dtype = 'f4'), np.ones((count, 3), dtype = 'f4')
+    corners = [glmath.vec3f(x, y, z) for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)]
+    up = glmath.vec3f(0, 1, 0)
+
+    def scalar_trs():
+        return [glmath.rotate(float(a), r, glmath.translate(glmath.identity_matrix(), t)) * glmath.scale(s)
+                for t, a, r, s in zip(glm_translations, angles, glm_axes, glm_scales)]
+
+    def scalar_aabbs():
+        bounds = []
+        for matrix in glm_matrices:
+            points = [glmath.vec3f(matrix * glmath.vec4f(corner, 1)) for corner in corners]
+            low, high = glmath.vec3f(points[0]), glmath.vec3f(points[0])
+            for point in points[1:]:
+                low, high = glm.min(low, point), glm.max(high, point)
+            bounds.append((low, high))
+        return bounds
+
+    cases = [
+        ('trs', scalar_trs, lambda: trs(translations, angles, axes, scales)),
+        ('rotation', lambda: [glmath.rotate(float(a), r) for a, r in zip(angles, glm_axes)], lambda: rotation(angles, axes)),
+        ('normal matrices', lambda: [glm.transpose(glm.inverse(glm.mat3(m))) for m in glm_matrices], lambda: normal_matrices(matrices)),
+        ('look_at', lambda: [glmath.lookAt(t, glmath.vec3f(0), up) for t in glm_translations], lambda: look_at(translations, (0, 0, 0), (0, 1, 0))),
+        ('perspective', lambda: [glmath.perspective(float(a), 1.5, 0.1, 100) for a in angles], lambda: perspective(angles, 1.5, 0.1, 100)),
+        ('frustum planes', lambda: [glmath.frustum_planes(m) for m in glm_matrices], lambda: frustum_planes(matrices)),
+        ('aabb transform', scalar_aabbs, lambda: transform_aabbs(matrices, mins, maxs)),
+        ('from_glm', lambda: from_glm(glm_matrices), None),
+        ('to_glm', lambda: to_glm(matrices), None),
+    ]
+    print(f'{count} objects, best of {repeat}')
+    print(f'{"":<16}{"glmath (ms)":>12}{"batched (ms)":>14}{"speedup":>10}')
+    for name, scalar, batched in cases:
+        scalar_time = min(timeit.repeat(scalar, number = 1, repeat = repeat)) * 1000
+        if batched is None:
+            print(f'{name:<16}{scalar_time:>12.2f}')
+            continue
+        batched_time = min(timeit.repeat(batched, number = 1, repeat = repeat)) * 1000
+        print(f'{name:<16}{scalar_time:>12.2f}{batched_time:>14.3f}{scalar_time / batched_time:>9.0f}x')
+
+
+if __name__ == '__main__':
+    # python -m modules.batchmath [count]
+    import sys
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -24,6 +24,10 @@ class Camera:
         # projection matrix : scale the gometry according to the distance from the camera
         self._projection_matrix = glmath.identity_matrix()
         
+    @property
+    def aspect_ratio(self) -> float:
+        return self._aspect_ratio
+    
     @property
     def projection_matrix(self) -> glmath.mat4x4f:
         return self._projection_matrix
@@ -40,6 +44,14 @@ class Camera:
     def position(self) -> glmath.vec3f:
         return self._position
     
+    @property
+    def yaw(self) -> float:
+        return self._yaw
+    
+    @property
+    def pitch(self) -> float:
+        return self._pitch
+    
     def move(self, direction: str, dt: float) -> None:
         velocity = SPEED * dt
         # movement controls
@@ -76,6 +88,21 @@ class Camera:
         self.update_camera_vectors()
         self.update_view_matrix()
         
+    # the whole input of a frame : a translation along right, up, forward and a rotation, the view matrix is rebuilt once
+    # returns False when there was nothing to apply
+    def apply_input(self, translation: glmath.vec3f, yaw: float, pitch: float) -> bool:
+        moved = translation.x != 0 or translation.y != 0 or translation.z != 0
+        if not moved and yaw == 0 and pitch == 0:
+            return False
+        if moved:
+            self._position += self._right * translation.x + self._up * translation.y + self._forward * translation.z
+        if yaw != 0 or pitch != 0:
+            self._yaw += yaw
+            self._pitch += pitch
+            self.update_camera_vectors()
+        self.update_view_matrix()
+        return True
+
     def update_camera_vectors(self) -> None:
         self._pitch = max(-89, min(89, self._pitch))
         yaw = glmath.radians(self._yaw)
@@ -125,6 +152,14 @@ class Camera:
         self.update_camera_vectors()
         self.update_view_matrix()
         
+    # aims at a point through the yaw and the pitch, so that the mouse and the keys carry on from there
+    def look_at(self, target: tuple[float, float, float]) -> None:
+        direction = glmath.normalize(glmath.vec3f(target) - self._position)
+        self._yaw = glmath.degrees(glmath.atan2(direction.z, direction.x))
+        self._pitch = glmath.degrees(glmath.asin(direction.y))
+        self.update_camera_vectors()
+        self.update_view_matrix()
+        
     def reset_camera(self) -> None:
         self.set_default_camera()
         self.update_camera_vectors()
@@ -0,0 +1,124 @@
+import os
+import shutil
+import subprocess
+import multiprocessing
+import moderngl
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+CAPTURE_LATENCY = 2 # frames between the readback of a frame and the access to its pixels
+MAX_PENDING_FRAMES = 16 # frames waiting to be encoded before the capture waits for the encoders
+FRAME_RATE = 60 # of the piped videos
+
+
+
+# runs in the worker processes
+def save_png(data: bytes, size: tuple[int, int], path: str) -> None:
+    import pygame.image as pgimage
+    import pygame.transform as pgtransform
+    # OpenGL rows go from the bottom to the top of the image
+    surface = pgtransform.flip(pgimage.frombuffer(data, size, 'RGB'), False, True)
+    pgimage.save(surface, path)
+
+
+class FrameCapture:
+    """
+    Records the frames shown in the window without stalling the GPU : every frame the window is read
+    into one of a set of pixel pack buffers, and the pixels are only fetched CAPTURE_LATENCY frames later,
+    once the GPU is done with the copy. The encoding happens away from the render loop.
+    The output is either an image sequence, a path with a format field (e.g. 'captures/frame_{:05d}.png')
+    encoded by a process pool, or a video file (e.g. 'captures/path.mp4') fed raw frames through an ffmpeg pipe.
+    """
+    def __init__(self, engine, output: str, latency: int = CAPTURE_LATENCY, workers: int = None) -> None:
+        self._engine = engine
+        self._gl_context = engine.gl_context
+        self._output = output
+        self._latency = latency
+        self._size = engine.win_size
+        self._recording = True
+        self._frame = 0
+        # a frame is read before its buffer comes around again
+        self._buffers = [self._gl_context.buffer(reserve = self._size[0] * self._size[1] * 3) for i in range(latency)]
+        self._pending_frames: list[tuple[int, moderngl.Buffer]] = []
+        self._futures: list[Future] = []
+        directory = os.path.dirname(output)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+        self._pipe: subprocess.Popen = None
+        if '{' in output:
+            # png encoding holds the GIL, the images are encoded in other processes
+            self._executor: Executor = ProcessPoolExecutor(max_workers = workers, mp_context = multiprocessing.get_context('spawn'))
+        else:
+            self._pipe = self.get_video_pipe(output)
+            # a single writer keeps the frames in order
+            self._executor = ThreadPoolExecutor(max_workers = 1)
+
+    @property
+    def recording(self) -> bool:
+        return self._recording
+
+    @property
+    def frame(self) -> int:
+        return self._frame
+
+    def set_recording(self, recording: bool) -> None:
+        self._recording = recording
+
+    def get_video_pipe(self, output: str) -> subprocess.Popen:
+        if shutil.which('ffmpeg') is None:
+            raise RuntimeError(f'ffmpeg is needed to record {output}, use an image sequence path like captures/frame_{{:05d}}.png instead')
+        width, height = self._size
+        command = ['ffmpeg', '-y', '-loglevel', 'error',
+                   '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-r', str(FRAME_RATE), '-i', '-',
+                   '-vf', 'vflip', '-pix_fmt', 'yuv420p', output]
+        return subprocess.Popen(command, stdin = subprocess.PIPE)
+
+    def write_frame(self, data: bytes) -> None:
+        self._pipe.stdin.write(data)
+
+    # fetches the pixels of the oldest pending frame and hands them to the encoders
+    def read_frame(self) -> None:
+        frame, buffer = self._pending_frames.pop(0)
+        data = buffer.read()
+        if self._pipe:
+            future = self._executor.submit(self.write_frame, data)
+        else:
+            future = self._executor.submit(save_png, data, self._size, self._output.format(frame))
+        self._futures.append(future)
+        # the encoders can't keep up, wait for them instead of piling up frames in memory
+        while len(self._futures) > MAX_PENDING_FRAMES:
+            self._futures.pop(0).result()
+        pending_futures = []
+        for future in self._futures:
+            if future.done():
+                future.result() # raises the errors of the encoders
+            else:
+                pending_futures.append(future)
+        self._futures = pending_futures
+
+    # called once the frame is rendered, before the buffers are swapped
+    def capture(self) -> None:
+        if not self._recording:
+            return
+        while len(self._pending_frames) >= self._latency:
+            self.read_frame()
+        buffer = self._buffers[self._frame % len(self._buffers)]
+        self._gl_context.screen.read_into(buffer, components = 3, alignment = 1)
+        self._pending_frames.append((self._frame, buffer))
+        self._frame += 1
+
+    # writes everything that was captured, blocks until the encoders are done
+    def finish(self) -> None:
+        while self._pending_frames:
+            self.read_frame()
+        for future in self._futures:
+            future.result()
+        self._futures = []
+
+    def destroy(self) -> None:
+        self.finish()
+        self._executor.shutdown(wait = True)
+        if self._pipe:
+            self._pipe.stdin.close()
+            self._pipe.wait()
+        for buffer in self._buffers:
+            buffer.release()
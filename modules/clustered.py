@@ -0,0 +1,151 @@
+import moderngl
+import numpy as np
+import modules.glmath as glmath
+from modules.camera import FOV, NEAR, FAR
+from modules.light import Light
+
+CLUSTER_DIMENSIONS = (16, 9, 24) # tiles along x, tiles along y, depth slices
+INDEX_ROW_SIZE = 4096 # must match texturedCube.frag
+TEXTURE_UNIT = 4 # the cluster textures use the units 4, 5 and 6, the model textures start at 0
+LIGHT_CHUNK_SIZE = 256 # lights tested against every cluster at once, bounds the size of the temporary arrays
+
+
+
+class ClusteredLighting:
+    """
+    Clustered forward shading : the camera frustum is split into a 3D grid of clusters and every frame
+    the point lights of the scene are assigned to the clusters they reach.
+    The fragment shader of the models built with CLUSTERED_LIGHTING then only loops over the lights of its cluster.
+    """
+    def __init__(self, engine, dimensions: tuple[int, int, int] = CLUSTER_DIMENSIONS) -> None:
+        self._engine = engine
+        self._gl_context = engine.gl_context
+        self._dimensions = dimensions
+        self._cluster_count = dimensions[0] * dimensions[1] * dimensions[2]
+        self._bounds = self.get_cluster_bounds()
+        # (offset, count) per cluster
+        self._grid_texture = self.get_data_texture((dimensions[0] * dimensions[1], dimensions[2]), 2, 'u4')
+        self._index_capacity = INDEX_ROW_SIZE
+        self._index_texture = self.get_data_texture((INDEX_ROW_SIZE, 1), 1, 'u4')
+        self._light_capacity = 64
+        self._light_texture = self.get_data_texture((3, self._light_capacity), 4, 'f4')
+        # programs that already received the constant uniforms
+        self._prepared_programs: set[moderngl.Program] = set()
+
+    @property
+    def dimensions(self) -> tuple[int, int, int]:
+        return self._dimensions
+
+    def get_data_texture(self, size: tuple[int, int], components: int, dtype: str) -> moderngl.Texture:
+        texture = self._gl_context.texture(size, components, dtype = dtype)
+        # integer textures are incomplete with linear filtering and the shader only uses texelFetch anyway
+        texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+        return texture
+
+    # view space bounding boxes of the clusters, they only depend on the projection
+    # the x bounds only depend on (slice, x), the y bounds on (slice, y) and the z bounds on the slice
+    def get_cluster_bounds(self) -> tuple[np.ndarray, ...]:
+        x_count, y_count, z_count = self._dimensions
+        tan_y = np.tan(glmath.radians(FOV) / 2)
+        tan_x = tan_y * self._engine.camera.aspect_ratio
+        # exponential depth slices
+        slices = NEAR * (FAR / NEAR) ** (np.arange(z_count + 1) / z_count)
+        near, far = slices[:-1, None], slices[1:, None]
+        tiles_x = np.linspace(-1, 1, x_count + 1) * tan_x
+        tiles_y = np.linspace(-1, 1, y_count + 1) * tan_y
+        # the tile edges spread out with the depth, so the extremes are found at the near or the far plane of the slice
+        x_min = np.minimum(tiles_x[None, :-1] * near, tiles_x[None, :-1] * far)
+        x_max = np.maximum(tiles_x[None, 1:] * near, tiles_x[None, 1:] * far)
+        y_min = np.minimum(tiles_y[None, :-1] * near, tiles_y[None, :-1] * far)
+        y_max = np.maximum(tiles_y[None, 1:] * near, tiles_y[None, 1:] * far)
+        z_min, z_max = -slices[1:], -slices[:-1]
+        return tuple(bounds.astype('f4') for bounds in (x_min, x_max, y_min, y_max, z_min, z_max))
+
+    def assign_lights(self, lights: list[Light]) -> tuple[np.ndarray, np.ndarray]:
+        # returns the (offset, count) of every cluster and the light index list
+        if not lights:
+            return np.zeros((self._cluster_count, 2), dtype = 'u4'), np.zeros(0, dtype = 'u4')
+        positions = np.array([(*light.position, 1.0) for light in lights], dtype = 'f4')
+        radii = np.array([light.radius for light in lights], dtype = 'f4')
+        view_matrix = np.array(self._engine.camera.view_matrix, dtype = 'f4')
+        centers = positions @ view_matrix.T
+        x_min, x_max, y_min, y_max, z_min, z_max = self._bounds
+        cluster_ids, light_ids = [], []
+        for start in range(0, len(lights), LIGHT_CHUNK_SIZE):
+            x, y, z = (centers[start:start + LIGHT_CHUNK_SIZE, axis, None] for axis in range(3))
+            radius = radii[start:start + LIGHT_CHUNK_SIZE, None, None, None]
+            # sphere / box : squared distance between the center and its closest point in the box, one axis at a time
+            dx = (np.clip(x[:, None], x_min, x_max) - x[:, None]) ** 2 # (lights, slices, x tiles)
+            dy = (np.clip(y[:, None], y_min, y_max) - y[:, None]) ** 2 # (lights, slices, y tiles)
+            dz = (np.clip(z, z_min, z_max) - z) ** 2 # (lights, slices)
+            touched = dx[:, :, None, :] + dy[:, :, :, None] + dz[:, :, None, None] <= radius ** 2
+            chunk_lights, clusters = np.nonzero(touched.reshape(len(touched), -1))
+            cluster_ids.append(clusters)
+            light_ids.append(chunk_lights + start)
+        cluster_ids = np.concatenate(cluster_ids)
+        light_ids = np.concatenate(light_ids)
+        # group the indices by cluster, the lights stay sorted inside of a cluster
+        order = np.argsort(cluster_ids, kind = 'stable')
+        counts = np.bincount(cluster_ids, minlength = self._cluster_count)
+        offsets = np.cumsum(counts) - counts
+        return np.stack([offsets, counts], axis = 1).astype('u4'), light_ids[order].astype('u4')
+
+    def load_lights(self, lights: list[Light]) -> None:
+        grid, indices = self.assign_lights(lights)
+        self._grid_texture.write(grid)
+        # index list
+        if len(indices) > self._index_capacity:
+            while len(indices) > self._index_capacity:
+                self._index_capacity *= 2
+            self._index_texture.release()
+            self._index_texture = self.get_data_texture((INDEX_ROW_SIZE, self._index_capacity // INDEX_ROW_SIZE), 1, 'u4')
+        if len(indices):
+            padded_indices = np.zeros(self._index_capacity, dtype = 'u4')
+            padded_indices[:len(indices)] = indices
+            self._index_texture.write(padded_indices)
+        # light data
+        if len(lights) > self._light_capacity:
+            while len(lights) > self._light_capacity:
+                self._light_capacity *= 2
+            self._light_texture.release()
+            self._light_texture = self.get_data_texture((3, self._light_capacity), 4, 'f4')
+        if lights:
+            light_data = np.array([(*light.position, light.radius,
+                                    *(light.diffuse_intensity * light.color), 0.0,
+                                    *(light.specular_intensity * light.color), 0.0) for light in lights], dtype = 'f4')
+            self._light_texture.write(light_data, viewport = (0, 0, 3, len(lights)))
+
+    def prepare_program(self, program: moderngl.Program) -> None:
+        program['cluster_grid'] = TEXTURE_UNIT
+        program['cluster_light_indices'] = TEXTURE_UNIT + 1
+        program['cluster_lights'] = TEXTURE_UNIT + 2
+        program['cluster_dimensions'] = self._dimensions
+        program['cluster_near'] = NEAR
+        program['cluster_far'] = FAR
+        self._prepared_programs.add(program)
+
+    # called once per frame, before the scene renders
+    def update(self, scene) -> None:
+        lights = scene.point_lights
+        self.load_lights(lights)
+        self._grid_texture.use(location = TEXTURE_UNIT)
+        self._index_texture.use(location = TEXTURE_UNIT + 1)
+        self._light_texture.use(location = TEXTURE_UNIT + 2)
+        ambient_light = glmath.vec3f(0)
+        for light in lights:
+            ambient_light += light.ambient_intensity * light.color
+        for model in scene.models:
+            program = model.shader_program
+            # only the programs built with CLUSTERED_LIGHTING have the cluster uniforms
+            if program.get('cluster_grid', None) is None:
+                continue
+            if program not in self._prepared_programs:
+                self.prepare_program(program)
+            program['point_ambient_light'].write(ambient_light)
+            # changes with dynamic resolution
+            program['screen_size'] = self._engine.render_size
+
+    def destroy(self) -> None:
+        self._grid_texture.release()
+        self._index_texture.release()
+        self._light_texture.release()
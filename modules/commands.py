@@ -0,0 +1,246 @@
+import operator
+import moderngl
+import numpy as np
+from typing import Any, Callable
+from modules.streaming import FRAME_DATA_SIZE, MODEL_DATA_SIZE, FRAME_BINDING, MODEL_BINDING
+from modules.model import PATCH_VERTICES
+from modules.trace import tracer
+
+VISIBLE = operator.attrgetter('visible')
+
+
+
+class CommandList:
+    """
+    A sequence of GPU commands recorded once and replayed every frame, in the spirit of the Vulkan command buffers.
+    Each command is kept as the C method of the moderngl object it calls and its arguments, execute replays them
+    in a single loop : no attribute lookup, no condition, no Python wrapper per command.
+    The commands are fixed until recorded again, what changes between two replays has to live in the objects
+    they point to : the contents of a buffer, a matrix updated in place.
+    """
+    def __init__(self) -> None:
+        self._commands: list[tuple[Callable, tuple]] = []
+        self._draws = 0
+
+    @property
+    def size(self) -> int:
+        return len(self._commands)
+
+    @property
+    def draws(self) -> int:
+        return self._draws
+
+    def reset(self) -> None:
+        self._commands = []
+        self._draws = 0
+
+    # any function, for what the other commands don't cover
+    def call(self, function: Callable, *args) -> None:
+        self._commands.append((function, args))
+
+    def bind_texture(self, texture: moderngl.Texture, location: int = 0) -> None:
+        self._commands.append((texture.mglo.use, (location,)))
+
+    def bind_uniform_block(self, buffer: moderngl.Buffer, binding: int, offset: int = 0, size: int = -1) -> None:
+        self._commands.append((buffer.mglo.bind_to_uniform_block, (binding, offset, size)))
+
+    # data is read at every replay, it can be updated in place in between
+    def write_uniform(self, program: moderngl.Program, name: str, data: Any) -> None:
+        self._commands.append((program[name].write, (data,)))
+
+    def draw(self, vao: moderngl.VertexArray, mode: int = moderngl.TRIANGLES, vertices: int = -1, first: int = 0, instances: int = -1) -> None:
+        # the scope of a vertex array is entered by its Python wrapper
+        render = vao.render if vao.scope else vao.mglo.render
+        self._commands.append((render, (mode, vertices, first, instances)))
+        self._draws += 1
+
+    def execute(self) -> None:
+        for function, args in self._commands:
+            function(*args)
+
+
+class SceneCommands:
+    """
+    What CommandRenderer keeps per scene : the command list, the models, their visibility and draw versions it was recorded for,
+    and the uniform buffer its draws bind, the FrameData block followed by a ModelData slot per model.
+    """
+    def __init__(self, context: moderngl.Context) -> None:
+        self._gl_context = context
+        self._alignment = context.info['GL_UNIFORM_BUFFER_OFFSET_ALIGNMENT']
+        self._model_offset = self.align(FRAME_DATA_SIZE)
+        self._model_stride = self.align(MODEL_DATA_SIZE)
+        self._commands = CommandList()
+        self._models: list = None
+        self._visibility: list[bool] = None
+        self._draw_version = -1 # sum of the draw versions of the models at the last recording
+        self._buffer: moderngl.Buffer = None
+        self._data = np.zeros(0, dtype = 'f4')
+        self._models_version = -1 # sum of the versions of the models at the last upload
+
+    @property
+    def commands(self) -> CommandList:
+        return self._commands
+
+    @property
+    def buffer(self) -> moderngl.Buffer:
+        return self._buffer
+
+    def align(self, size: int) -> int:
+        return (size + self._alignment - 1) // self._alignment * self._alignment
+
+    def get_model_offset(self, index: int) -> int:
+        return self._model_offset + index * self._model_stride
+
+    def is_outdated(self, models: list, visibility: list[bool], draw_version: int) -> bool:
+        return models != self._models or visibility != self._visibility or draw_version != self._draw_version
+
+    def invalidate(self) -> None:
+        self._models = None
+
+    def set_recorded(self, models: list, visibility: list[bool], draw_version: int) -> None:
+        self._models = list(models)
+        self._visibility = visibility
+        self._draw_version = draw_version
+        # the slots may hold other models now, even with the same sum of versions
+        self._models_version = -1
+        # sized for every model, hidden or not, the slots don't move when the visibility changes
+        size = self.get_model_offset(len(models))
+        if self._buffer is None or self._buffer.size < size:
+            if self._buffer:
+                self._buffer.release()
+            self._buffer = self._gl_context.buffer(reserve = size, dynamic = True)
+            self._data = np.zeros(size // 4, dtype = 'f4')
+
+    # camera and model matrices, the models are only sent again when they moved
+    def upload(self, camera, scene, models_version: int) -> None:
+        data = self._data
+        data[:16] = np.frombuffer(camera.projection_matrix.to_bytes(), dtype = 'f4')
+        data[16:32] = np.frombuffer(camera.view_matrix.to_bytes(), dtype = 'f4')
+        data[32:35] = camera.position
+        if models_version == self._models_version and not scene.animated:
+            self._buffer.write(data[:FRAME_DATA_SIZE // 4])
+            return
+        matrices = scene.get_model_matrices().reshape(-1, 16)
+        model_data = data[self._model_offset // 4:].reshape(-1, self._model_stride // 4)
+        model_data[:len(matrices), :16] = matrices
+        self._buffer.write(data)
+        self._models_version = models_version
+
+    def destroy(self) -> None:
+        if self._buffer:
+            self._buffer.release()
+
+
+class CommandRenderer:
+    """
+    Renders the scenes by replaying command lists instead of walking their models every frame.
+    The list of a scene binds the uniform block slot of each visible model, its texture, and draws it ;
+    it is recorded again when the models of the scene, their visibility or what their draws point to change
+    (a new vao after a change of program or instances, a new texture, new uniforms). A program can be shared by several models :
+    the uniforms of a model (light, material) are recorded packed before its draw, only the ones that differ from what
+    the program got from the previous draws of the list, so the models with the same uniforms draw back to back without a write.
+    Per frame, the camera and the matrices of the models that moved are written to the uniform buffer of the scene
+    in one upload, then the list is replayed.
+    The programs built with STREAMING_UNIFORMS read the blocks, the others get their matrices written
+    by a recorded call, and keep a Python call per draw.
+    Like the streaming renderer, the models are drawn as their own primitives, Scene.render is not called.
+    """
+    def __init__(self, engine) -> None:
+        self._engine = engine
+        self._gl_context = engine.gl_context
+        self._scenes: dict[Any, SceneCommands] = {}
+        self._recordings = 0 # command lists recorded since the start
+        # read by the replays, updated in place every frame
+        self._viewport_size = np.zeros(2, dtype = 'f4')
+
+    @property
+    def recordings(self) -> int:
+        return self._recordings
+
+    # the lists are recorded again at the next frame
+    def invalidate(self, scene = None) -> None:
+        for key, scene_commands in self._scenes.items():
+            if scene is None or key is scene:
+                scene_commands.invalidate()
+
+    # releases the buffers of the scenes the engine doesn't render anymore
+    def prune(self, scenes: list) -> None:
+        for scene in list(self._scenes):
+            if scene not in scenes:
+                self._scenes.pop(scene).destroy()
+
+    def record(self, scene, scene_commands: SceneCommands, visibility: list[bool], draw_version: int) -> None:
+        models = scene.models
+        scene_commands.set_recorded(models, visibility, draw_version)
+        commands = scene_commands.commands
+        commands.reset()
+        buffer = scene_commands.buffer
+        commands.bind_uniform_block(buffer, FRAME_BINDING, 0, FRAME_DATA_SIZE)
+        # the uniforms each program holds at this point of the list, and the model they came from last
+        program_uniforms: dict[moderngl.Program, dict[str, bytes]] = {}
+        program_users: dict[moderngl.Program, Any] = {}
+        patches = False
+        for i, model in enumerate(models):
+            if not visibility[i]:
+                continue
+            program = model.shader_program
+            if program not in program_uniforms:
+                program_uniforms[program] = {}
+                # wireframe and tessellation, the size changes with dynamic resolution
+                if program.get('viewport_size', None) is not None:
+                    commands.write_uniform(program, 'viewport_size', self._viewport_size)
+            uniforms = program_uniforms[program]
+            for name, data in model.get_packed_uniforms().items():
+                if uniforms.get(name) != data:
+                    commands.write_uniform(program, name, data)
+                    uniforms[name] = data
+            program_users[program] = model
+            if model.mode == moderngl.PATCHES and not patches:
+                commands.call(setattr, self._gl_context, 'patch_vertices', PATCH_VERTICES)
+                patches = True
+            if program.get('ModelData', None) is not None:
+                program['ModelData'].binding = MODEL_BINDING
+                if program.get('FrameData', None) is not None:
+                    program['FrameData'].binding = FRAME_BINDING
+                commands.bind_uniform_block(buffer, MODEL_BINDING, scene_commands.get_model_offset(i), MODEL_DATA_SIZE)
+            else:
+                commands.call(self.load_uniforms, program, model)
+            if model.texture:
+                commands.bind_texture(model.texture.texture)
+            commands.draw(model.vao, model.mode, instances = model.instance_count)
+        # the programs are left with the uniforms of the last model that drew with them
+        for program, model in program_users.items():
+            commands.call(self._engine.shaders.set_user, program, model)
+        self._recordings += 1
+
+    # for the programs without the uniform blocks
+    def load_uniforms(self, program: moderngl.Program, model) -> None:
+        camera = self._engine.camera
+        for name, data in (('projection_matrix', camera.projection_matrix), ('view_matrix', camera.view_matrix),
+                           ('model_matrix', model.model_matrix), ('camera_position', camera.position)):
+            if program.get(name, None) is not None:
+                program[name].write(data)
+
+    def render(self, scene) -> None:
+        scene_commands = self._scenes.get(scene)
+        if scene_commands is None:
+            scene_commands = self._scenes[scene] = SceneCommands(self._gl_context)
+        models = scene.models
+        visibility = list(map(VISIBLE, models))
+        version = 0
+        draw_version = 0
+        for model in models:
+            version += model.version
+            draw_version += model.draw_version
+        if scene_commands.is_outdated(models, visibility, draw_version):
+            with tracer.zone('record commands'):
+                self.record(scene, scene_commands, visibility, draw_version)
+        scene_commands.upload(self._engine.camera, scene, version)
+        self._viewport_size[:] = self._engine.render_size
+        with tracer.zone('execute commands', 'draw'):
+            scene_commands.commands.execute()
+
+    def destroy(self) -> None:
+        for scene_commands in self._scenes.values():
+            scene_commands.destroy()
+        self._scenes = {}
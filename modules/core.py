@@ -1,5 +1,4 @@
 import sys
-import dearpygui.dearpygui as dpg
 import pygame as pg
 import pygame.time as pgtime
 import pygame.event as pgevent
@@ -8,7 +7,28 @@ import moderngl
 from typing import Any
 from modules.camera import Camera
 from modules.scene import Scene
+from modules.deferred import DeferredRenderer
+from modules.clustered import ClusteredLighting
+from modules.shadows import ShadowMap
+from modules.gpu_driven import GPUDrivenRenderer
+from modules.occlusion import OcclusionCuller
+from modules.resolution import DynamicResolution
+from modules.streaming import StreamingRenderer
+from modules.commands import CommandRenderer
+from modules.capture import FrameCapture
+from modules.replay import InputFrame, InputRecorder, InputReplay
+from modules.input import InputHandler
+from modules.pipeline import FramePipeline
+from modules.simulation import FixedTimestep, SIMULATION_RATE
+from modules.debug import DebugUI, MOVE_CAMERA, RESET_CAMERA, TOGGLE_WIRE_MODE
+from modules.trace import tracer, TRACE_FRAMES
+from modules.allocations import AllocationTracker
+from modules.resources import ResourceTracker, TrackedContext
+from modules.shaders import ShaderLibrary
 
+IDLE_TIMEOUT = 250 # ms, longest wait for an event when nothing has to be redrawn
+# window events after which the frame has to be drawn again
+REDRAW_EVENTS = (pg.VIDEORESIZE, pg.VIDEOEXPOSE, pg.WINDOWEXPOSED, pg.WINDOWRESIZED, pg.WINDOWSIZECHANGED, pg.WINDOWRESTORED)
 
 
 class GLEngine:
@@ -17,12 +37,52 @@ class GLEngine:
                  debug: bool = False, 
                  mouse_controls: bool = False, 
                  cull_face: bool = True,
-                 wire_mode: bool = False) -> None:
+                 wire_mode: bool = False,
+                 deferred: bool = False,
+                 clustered: bool = False,
+                 shadows: str = None,
+                 shadow_cascades: int = 1,
+                 gpu_driven: bool = False,
+                 occlusion_culling: bool = False,
+                 dynamic_resolution: bool = False,
+                 target_frame_time: float = None,
+                 streaming: bool = False,
+                 command_lists: bool = False,
+                 capture: str = None,
+                 pipelined: bool = False,
+                 simulation_rate: float = SIMULATION_RATE,
+                 render_on_demand: bool = False,
+                 input_bindings: dict[int, str] = None,
+                 record_input: str = None,
+                 replay_input: str = None,
+                 track_allocations: bool = False,
+                 gpu_memory_budget: float = None) -> None:
         
         self._allow_debug_mode = debug
         self._allow_wire_mode = wire_mode
         self._allow_cull_face = cull_face
         self._allow_mouse_controls = mouse_controls
+        self._allow_deferred_shading = deferred
+        self._allow_clustered_shading = clustered
+        self._allow_gpu_driven_rendering = gpu_driven
+        self._allow_occlusion_culling = occlusion_culling
+        self._allow_dynamic_resolution = dynamic_resolution
+        self._allow_streaming = streaming
+        self._allow_command_lists = command_lists
+        self._allow_render_on_demand = render_on_demand
+        self._allow_pipelined_update = pipelined
+        # #defines added to every shader the models compile
+        self._shader_defines: dict[str, Any] = {}
+        if self._allow_clustered_shading:
+            self._shader_defines['CLUSTERED_LIGHTING'] = 1
+        # shadows of the main light : None, 'spot' or 'directional'
+        self._shadow_mode = shadows
+        self._shadow_cascades = shadow_cascades
+        if self._shadow_mode:
+            self._shader_defines['SHADOWS'] = 1
+        # the matrices go through uniform blocks
+        if self._allow_streaming or self._allow_command_lists:
+            self._shader_defines['STREAMING_UNIFORMS'] = 1
         self._fps = fps
         # init pygame window
         pg.init()
@@ -36,10 +96,16 @@ class GLEngine:
         self._clock = pgtime.Clock()
         self._time = 0
         self._delta_time = 0
-        # keyboard event handler
-        self._keys_state = {int : bool}
+        # held keys and mouse turned into a single camera move per frame
+        self._input = InputHandler(input_bindings)
+        # the live input of a frame, updated in place : the bound keys held, from the key events, and the keys pressed
+        self._held_keys: set[int] = set()
+        self._pressed_keys: list[int] = []
+        self._live_input = InputFrame(0, self._held_keys, (0, 0, 0, 0), self._pressed_keys)
+        # every buffer, texture, vertex array, program and framebuffer is recorded until it is released, budget in MB
+        self._resource_tracker = ResourceTracker(int(gpu_memory_budget * 2**20) if gpu_memory_budget else None)
         # detect and use existing OpenGL context
-        self._gl_context = moderngl.create_context()
+        self._gl_context = TrackedContext(moderngl.create_context(), self._resource_tracker)
         if self._allow_cull_face :
             self.gl_context.enable_only(moderngl.DEPTH_TEST | moderngl.CULL_FACE | moderngl.PROGRAM_POINT_SIZE)
         else : 
@@ -49,24 +115,75 @@ class GLEngine:
         pgevent.set_grab(self._allow_mouse_controls)
         # background color
         self._gl_context.clear(color=(0.9, 0.8, 0.01)) # "The fact that gold exists makes every other colours equally inferior."
+        # programs built from the shader sources, one per permutation of their feature flags
+        self._shader_library = ShaderLibrary(self._gl_context)
         # camera
         self._camera = Camera(self)
         # scene
         self._scenes: list[Scene] = []
+        # deferred shading pipeline, for scenes with many point lights
+        self._deferred_renderer = DeferredRenderer(self) if self._allow_deferred_shading else None
+        # clustered forward shading, for scenes with many point lights that can't go through the deferred pipeline
+        self._clustered_lighting = ClusteredLighting(self) if self._allow_clustered_shading else None
+        self._shadow_map = ShadowMap(self, self._shadow_mode, self._shadow_cascades) if self._shadow_mode else None
+        # GPU culling and indirect draws, needs OpenGL 4.3
+        self._gpu_driven_renderer = GPUDrivenRenderer(self) if self._allow_gpu_driven_rendering else None
+        # models hidden behind others are skipped, from the results of queries of previous frames
+        self._occlusion_culler = OcclusionCuller(self) if self._allow_occlusion_culling else None
+        # the scene is rendered at a lower resolution when the GPU can't hold the frame rate, in ms
+        self._target_frame_time = target_frame_time if target_frame_time else 1000 / self._fps
+        self._dynamic_resolution = DynamicResolution(self, self._target_frame_time) if self._allow_dynamic_resolution else None
+        # the per frame matrices go through a ring buffer, one upload per scene
+        self._streaming_renderer = StreamingRenderer(self) if self._allow_streaming else None
+        # the draws of a scene are recorded once and replayed, until its models change
+        self._command_renderer = CommandRenderer(self) if self._allow_command_lists else None
+        # frames recorded to an image sequence ('captures/frame_{:05d}.png') or a video file
+        self._frame_capture = FrameCapture(self, capture) if capture else None
+        # the input and delta time of every frame written to a file, or read back from one instead of the user and the clock
+        self._input_recorder = InputRecorder(record_input, self._input.keys) if record_input else None
+        self._input_replay = InputReplay(replay_input) if replay_input else None
+        self._replay_time = 0 # wall clock time of the replay, in ms
+        # the scenes are updated at a fixed rate and shown interpolated, None updates them once per frame
+        self._simulation = FixedTimestep(simulation_rate) if simulation_rate else None
+        # the scenes are updated a frame ahead on a worker thread, while this one renders
+        self._frame_pipeline = FramePipeline(self) if self._allow_pipelined_update else None
+        # render on demand : frames are only drawn when something changed since the last one
+        self._dirty = True
+        self._models_version = -1 # sum of the versions of the models at the last frame
+        # reports the Python allocations of the frames, a static scene should allocate close to nothing
+        self._allocation_tracker = AllocationTracker() if track_allocations else None
         
-        # debug window
-        self._debug_window = DebugWindow(self)
+        # debug window, in its own process
+        self._debug_ui = DebugUI(self)
         if self._allow_debug_mode:
-            self._debug_window.run()
+            self._debug_ui.start()
 
     @property
     def gl_context(self) -> moderngl.Context:
         return self._gl_context
 
+    @property
+    def resources(self) -> ResourceTracker:
+        return self._resource_tracker
+
     @property
     def win_size(self) -> tuple[int, int]:
         return self._WIN_SIZE
     
+    # size of the area the scene is rendered in, smaller than the window with dynamic resolution
+    @property
+    def render_size(self) -> tuple[int, int]:
+        if self._allow_dynamic_resolution:
+            return self._dynamic_resolution.render_size
+        return self._WIN_SIZE
+    
+    # where the scene is rendered, the passes that draw into an other framebuffer go back to this one
+    @property
+    def framebuffer(self) -> moderngl.Framebuffer:
+        if self._allow_dynamic_resolution:
+            return self._dynamic_resolution.framebuffer
+        return self._gl_context.screen
+    
     @property
     def camera(self) -> Camera:
         return self._camera
@@ -75,14 +192,34 @@ class GLEngine:
     def time(self) -> float:
         return self._time
     
+    # duration of the last frame, in ms
+    @property
+    def delta_time(self) -> float:
+        return self._delta_time
+    
+    @property
+    def simulation(self) -> FixedTimestep:
+        return self._simulation
+    
     @property
     def debug(self) -> bool:
         return self._allow_debug_mode
     
+    @property
+    def cull_face(self) -> bool:
+        return self._allow_cull_face
+    
+    @property
+    def shader_defines(self) -> dict[str, Any]:
+        return self._shader_defines
+    
+    @property
+    def shaders(self) -> ShaderLibrary:
+        return self._shader_library
+    
     @property 
     def scenes(self) -> list[Scene | Any]:
-        for scene in self._scenes:
-            yield scene
+        return self._scenes
     
     def set_camera(self, camera: Camera) -> None:
         self._camera = camera
@@ -90,37 +227,193 @@ class GLEngine:
     def set_default_camera(self) -> None:
         self._camera.set_default_camera()
 
+    # records the next frames as a Chrome trace (captures/trace_<date>.json by default)
+    def capture_trace(self, frames: int = TRACE_FRAMES, path: str = None) -> None:
+        tracer.start(frames, path, self._gl_context)
+        
     def set_scenes(self, scenes: list[Scene]) -> None:
         self._scenes = scenes
+        if self._command_renderer:
+            self._command_renderer.prune(scenes)
+        if self._gpu_driven_renderer:
+            self._gpu_driven_renderer.prune(scenes)
+        self._dirty = True
+        
+    # for the changes the engine can't see (uniforms, lights, materials), the next frame is drawn even when idle
+    def request_redraw(self) -> None:
+        self._dirty = True
+        
+    def is_dirty(self) -> bool:
+        if self._dirty or self._input_replay or (self._frame_capture and self._frame_capture.recording):
+            return True
+        for scene in self._scenes:
+            if scene.animated:
+                return True
+        return self.get_models_version() != self._models_version
+    
+    def get_models_version(self) -> int:
+        version = 0
+        for scene in self._scenes:
+            for model in scene.models:
+                version += model.version
+        return version
+    
+    # blocks until an event comes, or IDLE_TIMEOUT, the event is left in the queue for event_handler
+    def wait_for_events(self) -> None:
+        # the commands of the debug window are polled at the frame rate
+        event = pgevent.wait(int(1000 / self._fps) if self._debug_ui.running else IDLE_TIMEOUT)
+        if event.type != pg.NOEVENT:
+            pgevent.post(event)
         
     # main loop
     def run(self) -> None:
         while True:
-            self.event_handler()
-            self.render()
-            self._delta_time = self._clock.tick(self._fps)
+            if self._allocation_tracker:
+                self._allocation_tracker.begin_frame()
+            with tracer.zone('events'):
+                self.event_handler()
+            if self._allow_render_on_demand and not self.is_dirty():
+                # nothing changed, the last frame is still on screen
+                self.wait_for_events()
+                # the time spent waiting isn't a frame
+                self._clock.tick()
+                continue
+            with tracer.zone('render'):
+                self.render()
+            with tracer.zone('wait'):
+                if self._input_replay:
+                    # the recorded delta times drive the frames, rendered as fast as possible
+                    self._replay_time += self._clock.tick()
+                else:
+                    self._delta_time = self._clock.tick(self._fps)
             self.update_time()
+            tracer.end_frame()
+            if self._allocation_tracker:
+                self._allocation_tracker.end_frame()
 
     def render(self) -> None:
+        if self._allow_dynamic_resolution:
+            self._dynamic_resolution.begin()
+        if self._allow_streaming:
+            self._streaming_renderer.begin_frame()
+        if self._allow_occlusion_culling:
+            self._occlusion_culler.begin_frame()
+        if self._allow_pipelined_update:
+            self._frame_pipeline.begin_frame()
+        else:
+            with tracer.zone('update'):
+                self.update_scenes()
         # clear the framebuffer
         self._gl_context.clear(color=(0.9, 0.8, 0.01)) # 'The fact that gold exists makes every other colours equally inferior.' Big E.
         # render the scene
         for scene in self._scenes:
-            scene.render()
+            if scene.particle_systems:
+                with tracer.gpu_zone('particles update'):
+                    for particle_system in scene.particle_systems:
+                        particle_system.update(self._delta_time / 1000)
+            if self._allow_deferred_shading:
+                with tracer.gpu_zone('deferred shading'):
+                    self._deferred_renderer.render(scene)
+            elif self._allow_gpu_driven_rendering:
+                with tracer.gpu_zone('gpu driven rendering'):
+                    self._gpu_driven_renderer.render(scene)
+            else:
+                if self._shadow_map:
+                    with tracer.gpu_zone('shadows'):
+                        self._shadow_map.update(scene)
+                if self._allow_clustered_shading:
+                    with tracer.gpu_zone('clustered lighting'):
+                        self._clustered_lighting.update(scene)
+                if self._allow_occlusion_culling:
+                    with tracer.zone('occlusion culling'):
+                        self._occlusion_culler.update(scene)
+                with tracer.gpu_zone('scene'):
+                    if self._allow_streaming:
+                        self._streaming_renderer.render(scene)
+                    elif self._allow_command_lists:
+                        self._command_renderer.render(scene)
+                    else:
+                        scene.render()
+                if self._allow_occlusion_culling:
+                    with tracer.gpu_zone('occlusion queries'):
+                        self._occlusion_culler.issue_queries(scene)
+            # transparent, after the opaque models
+            if scene.particle_systems:
+                with tracer.gpu_zone('particles'):
+                    for particle_system in scene.particle_systems:
+                        particle_system.render()
+        if self._allow_occlusion_culling:
+            self._occlusion_culler.end_frame()
+        if self._allow_dynamic_resolution:
+            with tracer.gpu_zone('upscale'):
+                self._dynamic_resolution.end()
+        # the fence is a time query, OpenGL doesn't nest it in the frame timer of the dynamic resolution
+        if self._allow_streaming:
+            self._streaming_renderer.end_frame()
+        if self._frame_capture:
+            with tracer.gpu_zone('frame capture'):
+                self._frame_capture.capture()
+        self._dirty = False
+        self._models_version = self.get_models_version()
+        if tracer.recording:
+            tracer.add_counter('GPU memory (MB)', {category: size / 2**20 for category, (count, size) in self._resource_tracker.get_totals().items()})
         # swap buffers
-        pg.display.flip()
-        # dgp
-        if self._allow_debug_mode and dpg.is_dearpygui_running():
-            dpg.render_dearpygui_frame()
+        with tracer.zone('flip'):
+            pg.display.flip()
+        if self._debug_ui.running:
+            self._debug_ui.publish()
     
+    def update_scenes(self) -> None:
+        if not self._simulation:
+            for scene in self._scenes:
+                scene.update()
+            return
+        self._simulation.advance(self._scenes, self._delta_time)
+        for scene in self._scenes:
+            self._simulation.apply_frame_matrices(scene)
+            
     def event_handler(self) -> None:
-        self.on_key_hold()
-        self.on_mouse_motion()
+        pressed_keys = self._pressed_keys
+        pressed_keys.clear()
         for event in pgevent.get():
             if event.type == pg.QUIT:
                 self.on_close()
             elif event.type == pg.KEYDOWN:
-                self.on_key_press(event.key)
+                pressed_keys.append(event.key)
+                if event.key in self._input.bindings:
+                    self._held_keys.add(event.key)
+            elif event.type == pg.KEYUP:
+                self._held_keys.discard(event.key)
+            elif event.type == pg.WINDOWFOCUSLOST:
+                # the key ups go to the window that has the focus
+                self._held_keys.clear()
+            elif event.type in REDRAW_EVENTS:
+                self._dirty = True
+        if self._input_replay:
+            # esc still stops a replay, the other keys of the user are ignored
+            if pg.K_ESCAPE in pressed_keys:
+                self.on_close()
+            frame = self._input_replay.read_frame()
+            if frame is None:
+                self.on_replay_end()
+            self._delta_time = frame.delta_time
+        else:
+            frame = self._live_input
+            frame.set_state(self._delta_time, (*pgmouse.get_pos(), *pgmouse.get_rel()))
+        if self._input_recorder:
+            self._input_recorder.write_frame(frame)
+        if self._debug_ui.running:
+            self.on_debug_commands(self._debug_ui.poll())
+        self.on_input(frame)
+        for key in frame.pressed_keys:
+            self.on_key_press(key)
+            # the options change what is drawn
+            self._dirty = True
+
+    def on_replay_end(self) -> None:
+        frames = self._input_replay.frame
+        print(f'replayed {frames} frames in {self._replay_time / 1000:.2f} s, {self._replay_time / max(frames, 1):.2f} ms per frame')
+        self.on_close()
 
     def on_key_press(self, symbol: int) -> None:
         # options 
@@ -130,6 +423,10 @@ class GLEngine:
         # j : activate / deactivate debug mode
         if symbol == pg.K_j:
             self._allow_debug_mode = not self._allow_debug_mode
+            if self._allow_debug_mode:
+                self._debug_ui.start()
+            else:
+                self._debug_ui.stop()
             debug_state = 'activated' if self._allow_debug_mode else 'deactivated'
             print(f'debug mode {debug_state}')   
         if symbol == pg.K_k:
@@ -138,6 +435,15 @@ class GLEngine:
             if self._allow_debug_mode:
                 wire_mode_state = 'activated' if self._allow_wire_mode else 'deactivated'
                 print(f'wire mode {wire_mode_state}')
+        # t : record the next frames as a Chrome trace
+        if symbol == pg.K_t:
+            self.capture_trace()
+        # p : pause / resume the frame capture
+        if symbol == pg.K_p and self._frame_capture:
+            self._frame_capture.set_recording(not self._frame_capture.recording)
+            if self._allow_debug_mode:
+                capture_state = 'resumed' if self._frame_capture.recording else 'paused'
+                print(f'frame capture {capture_state}')
         # r : reset camera and models to default position
         if symbol == pg.K_r:
             self._camera.reset_camera()
@@ -146,6 +452,9 @@ class GLEngine:
         # l : look at the scene being rendered
         if symbol == pg.K_l:
             self._camera.look_at_scene()
+        # g : GPU memory in use
+        if symbol == pg.K_g:
+            self._resource_tracker.report()
         # m : allow / disable mouse camera controls
         if symbol == pg.K_m:
             self._allow_mouse_controls = not self._allow_mouse_controls
@@ -154,107 +463,63 @@ class GLEngine:
                 mouse_controls_state = 'activated' if self._allow_mouse_controls else 'deactivated'
                 print(f'camera controls with mouse {mouse_controls_state}')
         
-    def on_key_hold(self) -> None:
-        keys = pg.key.get_pressed()
-        # move controls
-        if keys[pg.K_z]:
-            self._camera.move('forward', self._delta_time)
-        if keys[pg.K_s]:
-            self._camera.move('backward', self._delta_time)
-        if keys[pg.K_q]:
-            self._camera.move('straf_left', self._delta_time)
-        if keys[pg.K_d]:
-            self._camera.move('straf_right', self._delta_time)
-        if keys[pg.K_a]:
-            self._camera.move('straf_up', self._delta_time)
-        if keys[pg.K_e]:
-            self._camera.move('straf_down', self._delta_time)
-        if keys[pg.K_RIGHT]:
-            self._camera.move('right', self._delta_time)
-            dpg.set_value("X camera value", self._camera._yaw)
-        if keys[pg.K_LEFT]:
-            self._camera.move('left', self._delta_time)
-            dpg.set_value("X camera value", self._camera._yaw)
-        if keys[pg.K_UP]:
-            self._camera.move('up', self._delta_time)
-            dpg.set_value("Y camera value", self._camera._pitch)
-        if keys[pg.K_DOWN]:
-            self._camera.move('down', self._delta_time)
-            dpg.set_value("Y camera value", self._camera._pitch)
+    def on_input(self, frame: InputFrame) -> None:
+        x, y, dx, dy = frame.mouse
+        if self._allow_mouse_controls and self._allow_debug_mode:
+            print(f'x = {x}, y = {y}, dx = {dx}, dy = {dy}')
+        if not self._allow_mouse_controls:
+            dx = dy = 0
+        self._input.update(frame.held_keys, dx, dy, self._delta_time)
+        if self._camera.apply_input(self._input.translation, self._input.yaw, self._input.pitch):
+            self._dirty = True
             
-    def on_mouse_motion(self) -> None:
-        x, y = pgmouse.get_pos()
-        dx, dy = pgmouse.get_rel()
-        if self._allow_mouse_controls == True :
-            self._camera.rotate(x, y, dx, dy)
+    # sent by the debug window, they go through the same paths as the keys
+    def on_debug_commands(self, commands: list[tuple[int, float, float, float]]) -> None:
+        for command, x, y, z in commands:
+            if command == MOVE_CAMERA:
+                self._camera.move_to_position((x, y, z))
+            elif command == RESET_CAMERA:
+                self.on_key_press(pg.K_r)
+            elif command == TOGGLE_WIRE_MODE:
+                self.on_key_press(pg.K_k)
+            self._dirty = True
             
     def update_time(self) -> None:
         self._time += self._delta_time
 
     def on_close(self) -> None:
+        # the worker may still be moving the models
+        if self._frame_pipeline:
+            self._frame_pipeline.destroy()
         for scene in self._scenes:
             scene.destroy()
+        if self._deferred_renderer:
+            self._deferred_renderer.destroy()
+        if self._clustered_lighting:
+            self._clustered_lighting.destroy()
+        if self._shadow_map:
+            self._shadow_map.destroy()
+        if self._gpu_driven_renderer:
+            self._gpu_driven_renderer.destroy()
+        if self._occlusion_culler:
+            self._occlusion_culler.destroy()
+        if self._dynamic_resolution:
+            self._dynamic_resolution.destroy()
+        if self._streaming_renderer:
+            self._streaming_renderer.destroy()
+        if self._command_renderer:
+            self._command_renderer.destroy()
+        if self._frame_capture:
+            self._frame_capture.destroy()
+        self._shader_library.destroy()
+        if self._input_recorder:
+            self._input_recorder.close()
+        self._debug_ui.destroy()
+        if self._allocation_tracker:
+            self._allocation_tracker.destroy()
+        # whatever was recorded of a capture still running
+        tracer.stop()
+        tracer.destroy()
+        self._resource_tracker.report_leaks()
         pg.quit()
-        self._debug_window.close()
         sys.exit()
-
-
-class DebugWindow:
-    def __init__(self, engine: GLEngine) -> None:
-        self._camera = engine.camera
-        
-        dpg.create_context()
-        dpg.create_viewport(title = 'Debug window', width = 500, height = 350)
-        dpg.setup_dearpygui()
-        
-        with dpg.value_registry():
-            dpg.add_float_value(tag = "X camera value")
-            dpg.add_float_value(tag = "Y camera value")
-            dpg.add_float_value(tag = "Z camera value")
-
-        with dpg.window(label = 'Camera', autosize = True, tag = 'Primary Window'):
-            dpg.add_input_float(label = 'X', 
-                               default_value = self._camera._yaw, 
-                               min_value = -5, 
-                               max_value = 5, 
-                               callback = self.set_camera_position,
-                               source = "X camera value")
-            dpg.add_input_float(label = 'Y', 
-                               default_value = self._camera._pitch, 
-                               min_value = -5, 
-                               max_value = 5, 
-                               callback = self.set_camera_position,
-                               source = "Y camera value")
-            dpg.add_input_float(label = 'Z', 
-                               default_value = self._camera.position.z, 
-                               min_value = -5, 
-                               max_value = 15, 
-                               callback = self.set_camera_position,
-                               source = "Z camera value")
-            
-        dpg.set_primary_window('Primary Window', True)
-        
-    def set_camera_position(self, sender, value) -> None:
-        axe = dpg.get_item_label(sender)
-        if axe == 'X':
-            self._camera.move_to_position((value,
-                                           self._camera.position.y, 
-                                           self._camera.position.z))
-        elif axe == 'Y':
-            self._camera.move_to_position((self._camera.position.x,
-                                           value, 
-                                           self._camera.position.z))
-        elif axe == 'Z':
-            self._camera.move_to_position((self._camera.position.x,
-                                           self._camera.position.y, 
-                                           value))
-            
-    def run(self) -> None:
-        dpg.show_viewport()
-            
-    def close(self) -> None:
-        dpg.destroy_context()
-        dpg.hi
-        # dpg.stop_dearpygui()
-        
-
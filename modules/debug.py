@@ -0,0 +1,204 @@
+import struct
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+
+# frame, time (ms), delta time (ms), camera position, yaw, pitch, render size, scenes, models, GPU memory (bytes)
+FRAME_STATS = struct.Struct('<Qdd3d2d2I2IQ')
+STATS_SLOTS = 8 # frames kept in the ring, the UI only reads the latest
+COMMAND = struct.Struct('<I4x3d') # command, 3 values
+COMMAND_SLOTS = 64
+COUNTER = struct.Struct('<Q')
+
+# commands sent by the debug UI
+MOVE_CAMERA = 1 # x, y, z
+RESET_CAMERA = 2
+TOGGLE_WIRE_MODE = 3
+
+
+
+class StatsRing:
+    """
+    Shared memory ring the engine publishes the stats of its frames into, read by the debug UI process.
+    Single writer : a slot is written before the counter that publishes it, the reader checks that the frame
+    of the slot it copied is still the one it asked for, in case the writer went around the ring meanwhile.
+    """
+    def __init__(self, name: str = None) -> None:
+        if name:
+            self._memory = SharedMemory(name = name)
+        else:
+            self._memory = SharedMemory(create = True, size = COUNTER.size + STATS_SLOTS * FRAME_STATS.size)
+            COUNTER.pack_into(self._memory.buf, 0, 0)
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    def get_slot_offset(self, frame: int) -> int:
+        return COUNTER.size + (frame % STATS_SLOTS) * FRAME_STATS.size
+
+    def write(self, frame: int, *stats) -> None:
+        FRAME_STATS.pack_into(self._memory.buf, self.get_slot_offset(frame), frame, *stats)
+        # frames published so far
+        COUNTER.pack_into(self._memory.buf, 0, frame + 1)
+
+    # stats of the latest frame, None before the first one
+    def read(self) -> tuple | None:
+        while True:
+            published = COUNTER.unpack_from(self._memory.buf, 0)[0]
+            if published == 0:
+                return None
+            stats = FRAME_STATS.unpack_from(self._memory.buf, self.get_slot_offset(published - 1))
+            if stats[0] == published - 1:
+                return stats
+
+    def close(self) -> None:
+        self._memory.close()
+
+    def destroy(self) -> None:
+        self._memory.close()
+        self._memory.unlink()
+
+
+class CommandQueue:
+    """
+    Single producer, single consumer queue in shared memory, the debug UI pushes and the engine pops.
+    Each side only writes its own counter, no lock is taken : the producer fills a slot then moves the head,
+    the consumer reads the slots up to the head then moves the tail. Commands pushed on a full queue are dropped.
+    """
+    def __init__(self, name: str = None) -> None:
+        if name:
+            self._memory = SharedMemory(name = name)
+        else:
+            self._memory = SharedMemory(create = True, size = 2 * COUNTER.size + COMMAND_SLOTS * COMMAND.size)
+            COUNTER.pack_into(self._memory.buf, 0, 0)
+            COUNTER.pack_into(self._memory.buf, COUNTER.size, 0)
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    def get_head(self) -> int:
+        return COUNTER.unpack_from(self._memory.buf, 0)[0]
+
+    def get_tail(self) -> int:
+        return COUNTER.unpack_from(self._memory.buf, COUNTER.size)[0]
+
+    def get_slot_offset(self, index: int) -> int:
+        return 2 * COUNTER.size + (index % COMMAND_SLOTS) * COMMAND.size
+
+    def push(self, command: int, x: float = 0.0, y: float = 0.0, z: float = 0.0) -> bool:
+        head = self.get_head()
+        if head - self.get_tail() >= COMMAND_SLOTS:
+            return False
+        COMMAND.pack_into(self._memory.buf, self.get_slot_offset(head), command, x, y, z)
+        COUNTER.pack_into(self._memory.buf, 0, head + 1)
+        return True
+
+    def pop_all(self) -> list[tuple[int, float, float, float]]:
+        head = self.get_head()
+        tail = self.get_tail()
+        commands = [COMMAND.unpack_from(self._memory.buf, self.get_slot_offset(index)) for index in range(tail, head)]
+        COUNTER.pack_into(self._memory.buf, COUNTER.size, head)
+        return commands
+
+    def close(self) -> None:
+        self._memory.close()
+
+    def destroy(self) -> None:
+        self._memory.close()
+        self._memory.unlink()
+
+
+# runs in the debug UI process
+def run_debug_ui(stats_name: str, commands_name: str) -> None:
+    import dearpygui.dearpygui as dpg
+    stats = StatsRing(stats_name)
+    commands = CommandQueue(commands_name)
+
+    def move_camera(sender, value) -> None:
+        commands.push(MOVE_CAMERA, *(dpg.get_value(axis) for axis in ('camera x', 'camera y', 'camera z')))
+
+    dpg.create_context()
+    dpg.create_viewport(title = 'Debug window', width = 500, height = 350)
+    dpg.setup_dearpygui()
+    with dpg.window(label = 'Debug', autosize = True, tag = 'Primary Window'):
+        dpg.add_text(tag = 'frame time')
+        dpg.add_text(tag = 'scene stats')
+        dpg.add_text(tag = 'gpu memory')
+        dpg.add_input_float(label = 'X', tag = 'camera x', min_value = -5, max_value = 5, on_enter = True, callback = move_camera)
+        dpg.add_input_float(label = 'Y', tag = 'camera y', min_value = -5, max_value = 5, on_enter = True, callback = move_camera)
+        dpg.add_input_float(label = 'Z', tag = 'camera z', min_value = -5, max_value = 15, on_enter = True, callback = move_camera)
+        dpg.add_text(tag = 'camera angles')
+        dpg.add_button(label = 'Reset camera', callback = lambda: commands.push(RESET_CAMERA))
+        dpg.add_button(label = 'Wire mode', callback = lambda: commands.push(TOGGLE_WIRE_MODE))
+    dpg.set_primary_window('Primary Window', True)
+    dpg.show_viewport()
+    while dpg.is_dearpygui_running():
+        frame_stats = stats.read()
+        if frame_stats:
+            frame, time, delta_time, x, y, z, yaw, pitch, width, height, scene_count, model_count, gpu_memory = frame_stats
+            dpg.set_value('frame time', f'frame {frame} : {delta_time:.2f} ms ({1000 / max(delta_time, 1e-3):.0f} fps), {width}x{height}')
+            dpg.set_value('scene stats', f'{scene_count} scenes, {model_count} models, {time / 1000:.1f} s')
+            dpg.set_value('gpu memory', f'GPU memory {gpu_memory / 2**20:.1f} MB')
+            dpg.set_value('camera angles', f'yaw {yaw:.1f}, pitch {pitch:.1f}')
+            # the field being edited keeps the value typed in
+            for tag, value in (('camera x', x), ('camera y', y), ('camera z', z)):
+                if not dpg.is_item_active(tag):
+                    dpg.set_value(tag, value)
+        dpg.render_dearpygui_frame()
+    dpg.destroy_context()
+    stats.close()
+    commands.close()
+
+
+class DebugUI:
+    """
+    The debug window, in its own process so that drawing it never adds to the frame time of the engine :
+    the engine publishes the stats of its frames into a StatsRing and executes the commands the UI pushed
+    into a CommandQueue, neither side ever waits for the other.
+    """
+    def __init__(self, engine) -> None:
+        self._engine = engine
+        self._stats = StatsRing()
+        self._commands = CommandQueue()
+        self._process: multiprocessing.Process = None
+        self._frame = 0
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        # a forked process would share the OpenGL and SDL state of the engine
+        context = multiprocessing.get_context('spawn')
+        self._process = context.Process(target = run_debug_ui, args = (self._stats.name, self._commands.name), daemon = True)
+        self._process.start()
+
+    def stop(self) -> None:
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process.join()
+        self._process = None
+
+    def publish(self) -> None:
+        engine = self._engine
+        camera = engine.camera
+        scenes = list(engine.scenes)
+        self._stats.write(self._frame, engine.time, engine.delta_time,
+                          *camera.position, camera.yaw, camera.pitch,
+                          *engine.render_size, len(scenes), sum(len(scene.models) for scene in scenes),
+                          engine.resources.get_memory())
+        self._frame += 1
+
+    # the commands the UI sent since the last call
+    def poll(self) -> list[tuple[int, float, float, float]]:
+        return self._commands.pop_all()
+
+    def destroy(self) -> None:
+        self.stop()
+        self._stats.destroy()
+        self._commands.destroy()
@@ -0,0 +1,211 @@
+import moderngl
+import numpy as np
+import modules.glmath as glmath
+from modules.light import Light
+from modules.mesh import SolidCubeMesh
+from modules.model import Material
+
+MATERIAL_TEXELS = 3 # ambient + brightness, diffuse, specular : one row of the materials texture per material
+LIGHT_INSTANCE_SIZE = 10 # position, radius, diffuse, specular
+
+
+
+class GBuffer:
+    def __init__(self, context: moderngl.Context, size: tuple[int, int]) -> None:
+        self._gl_context = context
+        self._size = size
+        self._albedo = context.texture(size, 4)
+        # 16-bit floats keep the normals precise and store the material id exactly (up to 2048)
+        self._normal_material = context.texture(size, 4, dtype = 'f2')
+        self._depth = context.depth_texture(size)
+        self._framebuffer = context.framebuffer(color_attachments = [self._albedo, self._normal_material],
+                                                depth_attachment = self._depth)
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self._size
+
+    @property
+    def framebuffer(self) -> moderngl.Framebuffer:
+        return self._framebuffer
+
+    # with dynamic resolution only part of the G-buffer is rendered
+    def use(self, render_size: tuple[int, int]) -> None:
+        self._framebuffer.viewport = (0, 0, *render_size)
+        self._framebuffer.use()
+        self._framebuffer.clear(0.0, 0.0, 0.0, 0.0, depth = 1.0)
+
+    # binds the attachments so that the lighting passes can read them
+    def bind_textures(self) -> None:
+        self._albedo.use(location = 0)
+        self._normal_material.use(location = 1)
+        self._depth.use(location = 2)
+
+    def destroy(self) -> None:
+        self._framebuffer.release()
+        self._albedo.release()
+        self._normal_material.release()
+        self._depth.release()
+
+
+class DeferredRenderer:
+    """
+    Geometry is drawn once into the G-buffer, then every light shades only the pixels covered by its volume,
+    so the lighting cost scales with the lit pixels instead of objects x lights.
+    """
+    def __init__(self, engine) -> None:
+        self._engine = engine
+        self._gl_context = engine.gl_context
+        self._gbuffer = GBuffer(self._gl_context, engine.win_size)
+        # programs
+        self._geometry_program = self.get_shader_program('shaders/gbuffer')
+        self._ambient_program = self.get_shader_program('shaders/deferred_ambient')
+        self._light_program = self.get_shader_program('shaders/deferred_light')
+        for program in (self._ambient_program, self._light_program):
+            program['galbedo'] = 0
+            program['gnormal_material'] = 1
+            program['gdepth'] = 2
+            program['materials'] = 3
+        self._geometry_program['utexture'] = 0
+        # full screen triangle
+        self._ambient_vao = self._gl_context.vertex_array(self._ambient_program, [])
+        # light volumes : one instanced unit cube per light
+        vertex_data, indices = SolidCubeMesh(engine).get_indexed_vertex_data(optimize = False)
+        self._volume_vbo = self._gl_context.buffer(np.ascontiguousarray(vertex_data[:, -3:]))
+        self._volume_ibo = self._gl_context.buffer(indices)
+        self._light_capacity = 64
+        self._light_buffer = self._gl_context.buffer(reserve = self._light_capacity * LIGHT_INSTANCE_SIZE * 4, dynamic = True)
+        self._light_vao = self._gl_context.vertex_array(self._light_program,
+                                                        [(self._volume_vbo, '3f', 'in_position'),
+                                                         (self._light_buffer, '3f 1f 3f 3f/i', 'in_light_position', 'in_light_radius',
+                                                                                                'in_light_diffuse', 'in_light_specular')],
+                                                        index_buffer = self._volume_ibo,
+                                                        index_element_size = 4)
+        # materials table : grows with the number of distinct materials of the scene
+        self._material_capacity = 32
+        self._materials = self.get_materials_texture(self._material_capacity)
+        self._model_material_ids: list[float] = []
+
+    @property
+    def gbuffer(self) -> GBuffer:
+        return self._gbuffer
+
+    def get_shader_program(self, shader_program_path: str) -> moderngl.Program:
+        with open(f'{shader_program_path}.vert') as file:
+            vertex_shader = file.read()
+        with open(f'{shader_program_path}.frag') as file:
+            fragment_shader = file.read()
+        program = self._gl_context.program(vertex_shader = vertex_shader, fragment_shader = fragment_shader)
+        return program
+
+    def get_materials_texture(self, capacity: int) -> moderngl.Texture:
+        texture = self._gl_context.texture((MATERIAL_TEXELS, capacity), 4, dtype = 'f4')
+        texture.filter = moderngl.NEAREST, moderngl.NEAREST
+        return texture
+
+    @staticmethod
+    def get_material_key(material: Material) -> tuple[float, ...]:
+        return (material.surface_brightness, *material.ambient_incidence,
+                *material.diffuse_incidence, *material.specular_incidence)
+
+    # gives every distinct material of the scene a row in the materials texture of the lighting shaders,
+    # materials are compared by value : the models of a preset share a row even though each one owns its Material
+    def load_materials(self, scene) -> None:
+        material_ids: dict[tuple[float, ...], int] = {}
+        self._model_material_ids = []
+        for model in scene.models:
+            key = self.get_material_key(model.material)
+            material_id = material_ids.setdefault(key, len(material_ids))
+            self._model_material_ids.append(float(material_id))
+        if len(material_ids) > self._material_capacity:
+            while len(material_ids) > self._material_capacity:
+                self._material_capacity *= 2
+            self._materials.release()
+            self._materials = self.get_materials_texture(self._material_capacity)
+        if not material_ids:
+            return
+        material_data = np.zeros((len(material_ids), MATERIAL_TEXELS, 4), dtype = 'f4')
+        for (surface_brightness, *incidences), material_id in material_ids.items():
+            material_data[material_id, :, :3] = np.reshape(incidences, (MATERIAL_TEXELS, 3))
+            material_data[material_id, 0, 3] = surface_brightness
+        self._materials.write(material_data, viewport = (0, 0, MATERIAL_TEXELS, len(material_ids)))
+
+    def load_lights(self, lights: list[Light]) -> None:
+        light_data = np.array([(*light.position, light.radius,
+                                *(light.diffuse_intensity * light.color),
+                                *(light.specular_intensity * light.color)) for light in lights], dtype = 'f4')
+        if len(lights) > self._light_capacity:
+            while len(lights) > self._light_capacity:
+                self._light_capacity *= 2
+            self._light_buffer.orphan(self._light_capacity * LIGHT_INSTANCE_SIZE * 4)
+        if len(lights):
+            self._light_buffer.write(light_data)
+        # ambient light doesn't depend on the position of the light, all of it is applied in a single pass
+        ambient_light = glmath.vec3f(0)
+        for light in lights:
+            ambient_light += light.ambient_intensity * light.color
+        self._ambient_program['ambient_light'].write(ambient_light)
+
+    def render_geometry(self, scene) -> None:
+        camera = self._engine.camera
+        self._geometry_program['projection_matrix'].write(camera.projection_matrix)
+        self._geometry_program['view_matrix'].write(camera.view_matrix)
+        for model, material_id in zip(scene.models, self._model_material_ids):
+            # the geometry program doesn't tessellate the patches
+            if model.mode == moderngl.PATCHES:
+                continue
+            self._geometry_program['model_matrix'].write(model.model_matrix)
+            self._geometry_program['material_id'] = material_id
+            self._geometry_program['textured'] = model.texture is not None
+            if model.texture is not None:
+                model.use_texture()
+            model.get_pass_vao(self._geometry_program).render(moderngl.TRIANGLES)
+
+    def render_lighting(self, scene) -> None:
+        camera = self._engine.camera
+        lights = scene.lights
+        self.load_lights(lights)
+        self._gbuffer.bind_textures()
+        self._materials.use(location = 3)
+        # ambient pass : overwrites the covered pixels, the background is discarded
+        self._gl_context.disable(moderngl.DEPTH_TEST | moderngl.CULL_FACE)
+        self._ambient_vao.render(moderngl.TRIANGLES, vertices = 3)
+        # light volumes : back faces only, so that the volume is still drawn when the camera is inside of it,
+        # the ones beyond the far plane are flattened onto it by the vertex shader
+        self._gl_context.enable(moderngl.BLEND | moderngl.CULL_FACE)
+        self._gl_context.blend_func = moderngl.ONE, moderngl.ONE
+        self._gl_context.cull_face = 'front'
+        self._light_program['projection_matrix'].write(camera.projection_matrix)
+        self._light_program['view_matrix'].write(camera.view_matrix)
+        self._light_program['inverse_view_projection'].write(glmath.inverse(camera.projection_matrix * camera.view_matrix))
+        self._light_program['camera_position'].write(camera.position)
+        self._light_program['render_size'] = self._engine.render_size
+        if len(lights):
+            self._light_vao.render(moderngl.TRIANGLES, instances = len(lights))
+        # back to the forward state
+        self._gl_context.cull_face = 'back'
+        self._gl_context.blend_func = moderngl.DEFAULT_BLENDING
+        self._gl_context.disable(moderngl.BLEND | moderngl.CULL_FACE)
+        self._gl_context.enable(moderngl.DEPTH_TEST)
+        if self._engine.cull_face:
+            self._gl_context.enable(moderngl.CULL_FACE)
+
+    def render(self, scene) -> None:
+        # the materials are reloaded every frame, they can be edited at any time
+        self.load_materials(scene)
+        self._gbuffer.use(self._engine.render_size)
+        self.render_geometry(scene)
+        self._engine.framebuffer.use()
+        self.render_lighting(scene)
+
+    def destroy(self) -> None:
+        self._gbuffer.destroy()
+        self._geometry_program.release()
+        self._ambient_program.release()
+        self._light_program.release()
+        self._ambient_vao.release()
+        self._light_vao.release()
+        self._volume_vbo.release()
+        self._volume_ibo.release()
+        self._light_buffer.release()
+        self._materials.release()
@@ -16,9 +16,9 @@ class HelloTriangle:
         self._vao.render()
 
     def destroy(self) -> None:
+        self._vao.release()
         self._vbo.release()
         self._shader_program.release()
-        self._vao.release()
 
     def get_vertex_data(self) -> np.ndarray:
         vertex_data = [(-0.6, -0.8, 0.0), (0.6, -0.8, 0.0), (0.0, 0.8, 0.0)] 
@@ -84,9 +84,9 @@ class TestCube:
         self._vao.render()
 
     def destroy(self) -> None:
+        self._vao.release()
         self._vbo.release()
         self._shader_program.release()
-        self._vao.release()
 
     def get_vertex_data(self) -> np.ndarray:
         vertex = [(-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1),
@@ -170,9 +170,9 @@ class SkeletonCube:
         self._vao.render(moderngl.LINE_STRIP)
 
     def destroy(self) -> None:
+        self._vao.release()
         self._vbo.release()
         self._shader_program.release()
-        self._vao.release()
 
     def get_vertex_data(self) -> np.ndarray:
         vertex = [(-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1),
@@ -271,9 +271,10 @@ class CompanionCube:
         self._vao.render()
 
     def destroy(self) -> None:
+        self._vao.release()
         self._vbo.release()
         self._shader_program.release()
-        self._vao.release()
+        self._texture.release()
 
     def get_vertex_data(self) -> np.ndarray:
         vertex = [(-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1),
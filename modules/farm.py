@@ -0,0 +1,172 @@
+import os
+import sys
+import multiprocessing
+import numpy as np
+import moderngl
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable
+from modules.camera import Camera
+from modules.model import DEFAULT_MATERIALS
+from modules.shaders import ShaderLibrary
+
+SHARDS_PER_WORKER = 4 # smaller shards keep every worker busy until the end of the job list
+
+
+
+class HeadlessEngine:
+    """
+    What the scenes need from GLEngine, over a standalone context rendering into an offscreen framebuffer.
+    """
+    def __init__(self, win_size: tuple[int, int], backend: str = None) -> None:
+        self._WIN_SIZE = win_size
+        if backend:
+            self._gl_context = moderngl.create_standalone_context(backend = backend)
+        else:
+            self._gl_context = moderngl.create_standalone_context()
+        self._gl_context.enable_only(moderngl.DEPTH_TEST | moderngl.CULL_FACE | moderngl.PROGRAM_POINT_SIZE)
+        self._framebuffer = self._gl_context.simple_framebuffer(win_size)
+        self._framebuffer.use()
+        self._shader_defines: dict[str, Any] = {}
+        self._shader_library = ShaderLibrary(self._gl_context)
+        self._time = 0
+        self._delta_time = 0
+        self._camera = Camera(self)
+        self._camera.set_default_camera()
+
+    @property
+    def gl_context(self) -> moderngl.Context:
+        return self._gl_context
+
+    @property
+    def win_size(self) -> tuple[int, int]:
+        return self._WIN_SIZE
+
+    @property
+    def render_size(self) -> tuple[int, int]:
+        return self._WIN_SIZE
+
+    @property
+    def framebuffer(self) -> moderngl.Framebuffer:
+        return self._framebuffer
+
+    @property
+    def camera(self) -> Camera:
+        return self._camera
+
+    @property
+    def time(self) -> float:
+        return self._time
+
+    @property
+    def delta_time(self) -> float:
+        return self._delta_time
+
+    @property
+    def debug(self) -> bool:
+        return False
+
+    @property
+    def cull_face(self) -> bool:
+        return True
+
+    @property
+    def shader_defines(self) -> dict[str, Any]:
+        return self._shader_defines
+
+    @property
+    def shaders(self) -> ShaderLibrary:
+        return self._shader_library
+
+    def destroy(self) -> None:
+        self._shader_library.destroy()
+        self._framebuffer.release()
+        self._gl_context.release()
+
+
+# state of a worker process, built once by init_worker
+_worker: dict[str, Any] = {}
+
+
+def init_worker(win_size: tuple[int, int], backend: str, shared_memory_name: str,
+                setup: Callable[[HeadlessEngine], Any], render: Callable[[HeadlessEngine, Any, Any], None]) -> None:
+    # the textures are loaded with pygame, converting them needs a display, even a dummy one
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    # SDL turns SIGTERM into a quit event, the pool couldn't terminate its workers anymore
+    os.environ['SDL_NO_SIGNAL_HANDLERS'] = '1'
+    import pygame.display as pgdisplay
+    pgdisplay.init()
+    pgdisplay.set_mode((1, 1))
+    engine = HeadlessEngine(win_size, backend)
+    _worker['engine'] = engine
+    _worker['memory'] = SharedMemory(name = shared_memory_name)
+    _worker['state'] = setup(engine)
+    _worker['render'] = render
+
+
+def render_shard(shard: list[tuple[int, Any]]) -> None:
+    engine = _worker['engine']
+    frame_size = engine.win_size[0] * engine.win_size[1] * 3
+    for index, job in shard:
+        engine.framebuffer.use()
+        engine.framebuffer.clear(0.9, 0.8, 0.01, depth = 1.0)
+        _worker['render'](engine, _worker['state'], job)
+        # straight into the slot of the job in the shared output
+        engine.framebuffer.read_into(_worker['memory'].buf, components = 3, alignment = 1, write_offset = index * frame_size)
+
+
+def render_farm(jobs: list[Any], setup: Callable[[HeadlessEngine], Any], render: Callable[[HeadlessEngine, Any, Any], None],
+                win_size: tuple[int, int] = (640, 360), workers: int = None, backend: str = None) -> np.ndarray:
+    """
+    Renders a list of jobs over a pool of processes, each with its own standalone context.
+    setup(engine) runs once per worker and returns its state (usually a scene),
+    render(engine, state, job) draws one job into engine.framebuffer.
+    Both must be module level functions, the workers are spawned and import them.
+    The frames are written by the workers into shared memory and returned as a (jobs, height, width, 3) array.
+    """
+    workers = workers or os.cpu_count()
+    width, height = win_size
+    frame_size = width * height * 3
+    memory = SharedMemory(create = True, size = max(1, len(jobs) * frame_size))
+    try:
+        shard_count = max(1, min(len(jobs), workers * SHARDS_PER_WORKER))
+        shards = [[(int(i), jobs[i]) for i in indices] for indices in np.array_split(np.arange(len(jobs)), shard_count)]
+        # forked workers would share the OpenGL state of the parent
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(workers, initializer = init_worker, initargs = (win_size, backend, memory.name, setup, render)) as pool:
+            pool.map(render_shard, shards, chunksize = 1)
+        # OpenGL rows go from the bottom to the top of the image
+        frames = np.ndarray((len(jobs), height, width, 3), dtype = 'u1', buffer = memory.buf)[:, ::-1].copy()
+    finally:
+        memory.close()
+        memory.unlink()
+    return frames
+
+
+#-------------- material turntables -----------------#
+
+def get_turntable_jobs(frames: int = 36, materials: tuple[str, ...] = DEFAULT_MATERIALS) -> list[tuple[str, float]]:
+    return [(material, 2 * np.pi * frame / frames) for material in materials for frame in range(frames)]
+
+
+def setup_turntable(engine: HeadlessEngine) -> Any:
+    from modules.scene import MaterialTurntable
+    return MaterialTurntable(engine)
+
+
+def render_turntable(engine: HeadlessEngine, scene, job: tuple[str, float]) -> None:
+    material, angle = job
+    scene.set_material(material)
+    scene.set_angle(angle)
+    scene.render()
+
+
+if __name__ == '__main__':
+    # python -m modules.farm [workers]
+    import pygame.image as pgimage
+    frame_count = 36
+    jobs = get_turntable_jobs(frame_count)
+    frames = render_farm(jobs, setup_turntable, render_turntable, workers = int(sys.argv[1]) if len(sys.argv) > 1 else None)
+    os.makedirs('captures/turntables', exist_ok = True)
+    for i, ((material, angle), frame) in enumerate(zip(jobs, frames)):
+        surface = pgimage.frombuffer(frame.tobytes(), (frame.shape[1], frame.shape[0]), 'RGB')
+        pgimage.save(surface, f'captures/turntables/{material}_{i % frame_count:03d}.png')
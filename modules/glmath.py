@@ -16,11 +16,44 @@ mat4x4f: TypeAlias = glm.f32mat4x4
 def radians(angle: float) -> float:
     return glm.radians(angle)
 
+def degrees(angle: float) -> float:
+    return glm.degrees(angle)
+
+def cos(angle: float) -> float:
+    return glm.cos(angle)
+
+def tan(angle: float) -> float:
+    return glm.tan(angle)
+
+def asin(x: float) -> float:
+    return glm.asin(x)
+
+def atan2(y: float, x: float) -> float:
+    return glm.atan(y, x)
+
+def floor(x: float) -> float:
+    return glm.floor(x)
+
+def ceil(x: float) -> float:
+    return glm.ceil(x)
+
+def sqrt(x: float) -> float:
+    return glm.sqrt(x)
+
+def clamp(x: float, min_value: float, max_value: float) -> float:
+    return glm.clamp(x, min_value, max_value)
+
 #----------- linear algebrae ------------#
 
 def cross(x: vec3f, y: vec3f) -> vec3f :
     return glm.cross(x, y)
 
+def dot(x: vec3f, y: vec3f) -> float :
+    return glm.dot(x, y)
+
+def length(vector: vec3f) -> float:
+    return glm.length(vector)
+
 @overload
 def normalize(vector: vec1f) -> vec1f:
     ...
@@ -75,15 +108,52 @@ def rotate(angle: float, axis: vec3f, *args, **kwargs):
         return glm.rotate(angle, axis)
     
 
+def inverse(mat: mat4x4f) -> mat4x4f:
+    return glm.inverse(mat)
+
+def scale(vec: vec3f) -> mat4x4f:
+    return glm.scale(vec)
+
 def translate(mat: mat4x4f, vec: vec3f) -> mat4x4f:
     return glm.translate(mat, vec)
 
+def ortho(left: float, right: float, bottom: float, top: float, near: float, far: float) -> mat4x4f:
+    return glm.ortho(left, right, bottom, top, near, far)
+
 def perspective(fovy: float, aspect: float, near: float, far: float) -> mat4x4f:
     return glm.perspective(fovy, aspect, near, far)
 
 def lookAt(eye: vec3f, center: vec3f, up: vec3f) -> mat4x4f:
     return glm.lookAt(eye, center, up)
 
+# between two affine transformations : translations and scales are blended linearly, rotations spherically
+def interpolate_transform(a: mat4x4f, b: mat4x4f, t: float) -> mat4x4f:
+    if a == b:
+        return mat4x4f(b)
+    scale_a = vec3f(glm.length(vec3f(a[0])), glm.length(vec3f(a[1])), glm.length(vec3f(a[2])))
+    scale_b = vec3f(glm.length(vec3f(b[0])), glm.length(vec3f(b[1])), glm.length(vec3f(b[2])))
+    rotation_a = glm.quat_cast(glm.mat3(vec3f(a[0]) / scale_a.x, vec3f(a[1]) / scale_a.y, vec3f(a[2]) / scale_a.z))
+    rotation_b = glm.quat_cast(glm.mat3(vec3f(b[0]) / scale_b.x, vec3f(b[1]) / scale_b.y, vec3f(b[2]) / scale_b.z))
+    matrix = glm.mat4_cast(glm.slerp(rotation_a, rotation_b, t))
+    matrix = glm.scale(matrix, glm.mix(scale_a, scale_b, t))
+    matrix[3] = glm.mix(a[3], b[3], t)
+    return mat4x4f(matrix)
+
+# the 6 planes (left, right, bottom, top, near, far) of the frustum of a view-projection matrix, normals pointing inwards
+# Gribb & Hartmann, "Fast Extraction of Viewing Frustum Planes from the World-View-Projection Matrix"
+def frustum_planes(mat: mat4x4f) -> list[vec4f]:
+    rows = [glm.row(mat, i) for i in range(4)]
+    planes = [rows[3] + rows[0], rows[3] - rows[0],
+              rows[3] + rows[1], rows[3] - rows[1],
+              rows[3] + rows[2], rows[3] - rows[2]]
+    return [vec4f(plane / glm.length(plane.xyz)) for plane in planes]
+
+def sphere_in_frustum(planes: list[vec4f], center: vec3f, radius: float) -> bool:
+    for plane in planes:
+        if glm.dot(plane.xyz, center) + plane.w < -radius:
+            return False
+    return True
+
 
 
 
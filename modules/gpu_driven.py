@@ -0,0 +1,185 @@
+import moderngl
+import numpy as np
+import modules.glmath as glmath
+from modules.model import Model
+from modules.shaders import TEXTURING, DIFFUSE, SPECULAR
+from modules.trace import tracer
+from typing import Any
+
+BATCH_FORMAT = ('2f 3f 1f 3f', ['in_texcoord', 'in_normal', 'in_hidden_edge', 'in_position'])
+WORK_GROUP_SIZE = 64 # must match cull.comp
+DRAW_COMMAND_SIZE = 20 # count, instance count, first index, base vertex, base instance
+
+
+
+class GPUDrivenBatch:
+    """
+    Every model of a batch lives in shared buffers : one vbo / ibo for all the meshes,
+    storage buffers for the transforms, bounds and materials.
+    A compute shader frustum-culls the models and writes one indirect draw command per model,
+    then a single render_indirect per texture draws whatever survived.
+    The Python side costs the same whatever the number of visible models.
+    """
+    def __init__(self, engine, models: list[Model]) -> None:
+        self._engine = engine
+        self._gl_context = engine.gl_context
+        if self._gl_context.version_code < 430:
+            raise RuntimeError('GPU-driven rendering needs compute shaders and storage buffers (OpenGL 4.3)')
+        # the models of the scene as they were when the batch was built
+        self._scene_models = list(models)
+        # models sharing a texture are drawn by the same indirect call, so they have to be contiguous
+        self._models = sorted(models, key = lambda model: id(model.texture))
+        self._object_count = len(self._models)
+        # programs
+        self._program = self.get_shader_program('shaders/indirect', 'shaders/texturedCube')
+        self._program['utexture'] = 0
+        self._cull_program = self.get_compute_shader('shaders/cull')
+        # shared geometry
+        vertex_data, indices, meshes = self.get_batch_data()
+        self._vbo = self._gl_context.buffer(vertex_data)
+        self._ibo = self._gl_context.buffer(indices)
+        # per instance object id : with a base instance of i, the first instance reads i
+        self._object_ids = self._gl_context.buffer(np.arange(self._object_count, dtype = 'u4'))
+        self._vao = self._gl_context.vertex_array(self._program,
+                                                  [(self._vbo, BATCH_FORMAT[0], *BATCH_FORMAT[1]),
+                                                   (self._object_ids, 'u/i', 'in_object_id')],
+                                                  index_buffer = self._ibo,
+                                                  index_element_size = 4,
+                                                  skip_errors = True) # in_hidden_edge is only read by the wireframe
+        # storage buffers
+        self._transforms = self._gl_context.buffer(reserve = self._object_count * 64, dynamic = True)
+        self._bounds = self._gl_context.buffer(np.array([(0, 0, 0, model.bounding_radius) for model in self._models], dtype = 'f4'))
+        self._meshes = self._gl_context.buffer(meshes)
+        self._materials = self._gl_context.buffer(reserve = self._object_count * 64, dynamic = True)
+        self._commands = self._gl_context.buffer(reserve = self._object_count * DRAW_COMMAND_SIZE)
+        # (texture, first command, command count) of each indirect call
+        self._groups = []
+        for i, model in enumerate(self._models):
+            if self._groups and self._groups[-1][0] is model.texture:
+                texture, first, count = self._groups[-1]
+                self._groups[-1] = (texture, first, count + 1)
+            else:
+                self._groups.append((model.texture, i, 1))
+        self.load_materials()
+
+    @property
+    def models(self) -> list[Model]:
+        return self._models
+
+    # the buffers are built for a fixed set of models, a new batch is needed when the models of the scene change
+    def is_outdated(self, models: list[Model]) -> bool:
+        return models != self._scene_models
+
+    # the program belongs to the shader library, the batches of every scene share it
+    def get_shader_program(self, vertex_shader_path: str, fragment_shader_path: str) -> moderngl.Program:
+        # the material of the fragment shader comes from the vertex shader instead of a uniform, it varies per object
+        # so every lighting term is kept
+        return self._engine.shaders.get_program(f'{vertex_shader_path}.vert', f'{fragment_shader_path}.frag',
+                                                features = (TEXTURING, DIFFUSE, SPECULAR), defines = {'GPU_DRIVEN': 1})
+
+    def get_compute_shader(self, shader_path: str) -> moderngl.ComputeShader:
+        with open(f'{shader_path}.comp') as file:
+            compute_shader = file.read()
+        return self._gl_context.compute_shader(compute_shader)
+
+    # concatenates the meshes of the models, reading them back once from their own buffers
+    def get_batch_data(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        vertex_data, indices, meshes = [], [], []
+        first_index, base_vertex = 0, 0
+        for model in self._models:
+            if model.vbo_format != BATCH_FORMAT:
+                raise ValueError(f'{type(model).__name__} can\'t be batched, only {BATCH_FORMAT[0]} textured models can')
+            vertices = np.frombuffer(model.vbo.read(), dtype = 'f4').reshape(-1, 9)
+            if model.ibo is not None:
+                model_indices = np.frombuffer(model.ibo.read(), dtype = 'u4')
+            else:
+                model_indices = np.arange(len(vertices), dtype = 'u4')
+            vertex_data.append(vertices)
+            indices.append(model_indices)
+            meshes.append((len(model_indices), first_index, base_vertex, 0))
+            first_index += len(model_indices)
+            base_vertex += len(vertices)
+        return np.concatenate(vertex_data), np.concatenate(indices), np.array(meshes, dtype = 'u4')
+
+    # to call again after editing the materials of the models
+    def load_materials(self) -> None:
+        materials = np.zeros((self._object_count, 4, 4), dtype = 'f4')
+        for i, model in enumerate(self._models):
+            material = model.material
+            materials[i, 0, 0] = material.surface_brightness
+            materials[i, 1, :3] = material.ambient_incidence
+            materials[i, 2, :3] = material.diffuse_incidence
+            materials[i, 3, :3] = material.specular_incidence
+        self._materials.write(materials)
+
+    def load_light(self, light) -> None:
+        self._program['light.position'].write(light.position)
+        self._program['light.color'].write(light.color)
+        self._program['light.ambient_intensity'].write(light.ambient_intensity)
+        self._program['light.diffuse_intensity'].write(light.diffuse_intensity)
+        self._program['light.specular_intensity'].write(light.specular_intensity)
+
+    def cull(self) -> None:
+        camera = self._engine.camera
+        planes = glmath.frustum_planes(camera.projection_matrix * camera.view_matrix)
+        self._cull_program['frustum_planes'].write(b''.join(plane.to_bytes() for plane in planes))
+        self._cull_program['object_count'] = self._object_count
+        self._transforms.bind_to_storage_buffer(0)
+        self._bounds.bind_to_storage_buffer(1)
+        self._meshes.bind_to_storage_buffer(2)
+        self._commands.bind_to_storage_buffer(3)
+        self._cull_program.run(group_x = (self._object_count + WORK_GROUP_SIZE - 1) // WORK_GROUP_SIZE)
+        # the draw commands written by the compute shader must be visible to the indirect draws
+        self._gl_context.memory_barrier(moderngl.COMMAND_BARRIER_BIT | moderngl.SHADER_STORAGE_BARRIER_BIT)
+
+    def render(self, scene) -> None:
+        camera = self._engine.camera
+        # one upload for all the transforms
+        with tracer.zone('transforms', 'upload'):
+            self._transforms.write(b''.join(model.model_matrix.to_bytes() for model in self._models))
+        self.cull()
+        self._program['projection_matrix'].write(camera.projection_matrix)
+        self._program['view_matrix'].write(camera.view_matrix)
+        self._program['camera_position'].write(camera.position)
+        if scene.light:
+            self.load_light(scene.light)
+        self._transforms.bind_to_storage_buffer(0)
+        self._materials.bind_to_storage_buffer(4)
+        for texture, first, count in self._groups:
+            if texture is not None:
+                texture.use()
+            self._vao.render_indirect(self._commands, moderngl.TRIANGLES, count = count, first = first)
+
+    def destroy(self) -> None:
+        self._vao.release()
+        self._cull_program.release()
+        for buffer in (self._vbo, self._ibo, self._object_ids, self._transforms, self._bounds,
+                       self._meshes, self._materials, self._commands):
+            buffer.release()
+
+
+class GPUDrivenRenderer:
+    # one batch per scene, built the first time the scene is rendered and again when its models change
+    def __init__(self, engine) -> None:
+        self._engine = engine
+        self._batches: dict[Any, GPUDrivenBatch] = {}
+
+    # releases the buffers of the scenes the engine doesn't render anymore
+    def prune(self, scenes: list) -> None:
+        for scene in list(self._batches):
+            if scene not in scenes:
+                self._batches.pop(scene).destroy()
+
+    def render(self, scene) -> None:
+        batch = self._batches.get(scene)
+        if batch is not None and batch.is_outdated(scene.models):
+            batch.destroy()
+            batch = None
+        if batch is None:
+            batch = self._batches[scene] = GPUDrivenBatch(self._engine, scene.models)
+        batch.render(scene)
+
+    def destroy(self) -> None:
+        for batch in self._batches.values():
+            batch.destroy()
+        self._batches = {}
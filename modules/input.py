@@ -0,0 +1,104 @@
+import pygame as pg
+import modules.glmath as glmath
+from modules.camera import SPEED, SENSITIVITY
+
+# axes of the camera delta
+RIGHT = 0
+UP = 1
+FORWARD = 2
+YAW = 3
+PITCH = 4
+
+# action : axis it moves the camera along, direction
+ACTIONS = {
+    'forward': (FORWARD, 1),
+    'backward': (FORWARD, -1),
+    'straf_left': (RIGHT, -1),
+    'straf_right': (RIGHT, 1),
+    'straf_up': (UP, 1),
+    'straf_down': (UP, -1),
+    'left': (YAW, -1),
+    'right': (YAW, 1),
+    'up': (PITCH, -1),
+    'down': (PITCH, 1),
+}
+
+DEFAULT_BINDINGS = {
+    pg.K_z: 'forward',
+    pg.K_s: 'backward',
+    pg.K_q: 'straf_left',
+    pg.K_d: 'straf_right',
+    pg.K_a: 'straf_up',
+    pg.K_e: 'straf_down',
+    pg.K_RIGHT: 'right',
+    pg.K_LEFT: 'left',
+    pg.K_UP: 'up',
+    pg.K_DOWN: 'down',
+}
+
+
+
+class InputHandler:
+    """
+    Maps the held keys to camera actions and sums up the keys and the mouse of a frame into a single camera delta :
+    a translation along the axes of the camera and a rotation, applied at once by Camera.apply_input.
+    """
+    def __init__(self, bindings: dict[int, str] = None) -> None:
+        self._bindings: dict[int, str] = {}
+        self._keys: list[int] = []
+        for key, action in (bindings if bindings else DEFAULT_BINDINGS).items():
+            self.bind(key, action)
+        self._axes = [0.0] * 5
+        self._translation = glmath.vec3f(0) # along right, up, forward
+        self._yaw = 0.0
+        self._pitch = 0.0
+
+    @property
+    def bindings(self) -> dict[int, str]:
+        return self._bindings
+
+    # the keys an input recording has to keep the state of
+    @property
+    def keys(self) -> list[int]:
+        return self._keys
+
+    @property
+    def translation(self) -> glmath.vec3f:
+        return self._translation
+
+    @property
+    def yaw(self) -> float:
+        return self._yaw
+
+    @property
+    def pitch(self) -> float:
+        return self._pitch
+
+    def bind(self, key: int, action: str) -> None:
+        if action not in ACTIONS:
+            raise ValueError(f'unknown action {action}, expected one of {list(ACTIONS)}')
+        self._bindings[key] = action
+        self._keys = list(self._bindings)
+
+    def unbind(self, key: int) -> None:
+        self._bindings.pop(key, None)
+        self._keys = list(self._bindings)
+
+    # dx, dy : mouse motion, 0 when the mouse doesn't control the camera, dt in ms
+    # called every frame, the translation is updated in place
+    def update(self, held_keys: set[int], dx: int, dy: int, dt: float) -> None:
+        axes = self._axes
+        for i in range(len(axes)):
+            axes[i] = 0.0
+        for key in held_keys:
+            action = self._bindings.get(key)
+            if action:
+                axis, direction = ACTIONS[action]
+                axes[axis] += direction
+        velocity = SPEED * dt
+        translation = self._translation
+        translation.x = axes[RIGHT] * velocity
+        translation.y = axes[UP] * velocity
+        translation.z = axes[FORWARD] * velocity
+        self._yaw = axes[YAW] * SENSITIVITY * 100 * velocity + dx * SENSITIVITY
+        self._pitch = axes[PITCH] * SENSITIVITY * 100 * velocity - dy * SENSITIVITY
@@ -1,13 +1,22 @@
 import modules.glmath as glmath
 
 class Light:
-    def __init__(self, position: tuple[float, float, float] = (3, 3, 3), color: tuple[float, float, float] = (1, 1, 1)) -> None:
+    def __init__(self, position: tuple[float, float, float] = (3, 3, 3), color: tuple[float, float, float] = (1, 1, 1), 
+                 radius: float = 100.0) -> None:
         self._position = glmath.vec3f(position)
         self._color = glmath.vec3f(color)
+        # where spot and directional shadows look, by default towards the origin of the scene
+        self._direction: glmath.vec3f = None
+        self._spot_angle = 90.0 # deg
+        # bumped on every change, so that the cached shadow maps know when to render again
+        self._version = 0
         # intensity of lightsources
         self._ambient_intensity: glmath.vec3f = 0.1 * self._color # ambiant
         self._diffuse_intensity: glmath.vec3f = 0.8 * self._color # diffuse
         self._specular_intensity: glmath.vec3f = 1.0 * self._color # specular
+        # distance after which the light has no effect, it bounds the light volume in deferred shading,
+        # the forward shaders don't attenuate the main light : the default keeps the fade far from the scene
+        self._radius = radius
         
     @property
     def color(self) -> glmath.vec3f:
@@ -17,6 +26,24 @@ class Light:
     def position(self) -> glmath.vec3f:
         return self._position
     
+    @property
+    def radius(self) -> float:
+        return self._radius
+    
+    @property
+    def direction(self) -> glmath.vec3f:
+        if self._direction is None:
+            return glmath.normalize(-self._position)
+        return self._direction
+    
+    @property
+    def spot_angle(self) -> float:
+        return self._spot_angle
+    
+    @property
+    def version(self) -> int:
+        return self._version
+    
     @property
     def ambient_intensity(self) -> glmath.vec3f:
         return self._ambient_intensity
@@ -31,5 +58,16 @@ class Light:
     
     def set_position(self, position: tuple[float, float, float]) -> None:
         self._position = glmath.vec3f(position)
+        self._version += 1
+        
+    def set_radius(self, radius: float) -> None:
+        self._radius = radius
+        self._version += 1
+        
+    def set_direction(self, direction: tuple[float, float, float]) -> None:
+        self._direction = glmath.normalize(glmath.vec3f(direction))
+        self._version += 1
         
-    
\ No newline at end of file
+    def set_spot_angle(self, angle: float) -> None:
+        self._spot_angle = angle
+        self._version += 1
@@ -1,20 +1,62 @@
 import numpy as np
+import modules.meshopt as meshopt
+from modules.teapot_data import vertex_teapot, patches
 
 
 
 class Mesh:
     def __init__(self, engine) -> None:
         self._engine = engine
+        self._optimization_stats: dict[str, float] = {}
+        
+    @property
+    def optimization_stats(self) -> dict[str, float]:
+        return self._optimization_stats
     
     def get_vertex_data(self) -> np.ndarray:
         ...
         
+    # bake time : welds the expanded triangle list into an indexed mesh, then reorders it for the GPU caches
+    # in_position must be the last attribute of the vertex format
+    def get_indexed_vertex_data(self, optimize: bool = True) -> tuple[np.ndarray, np.ndarray]:
+        vertices, indices = meshopt.weld_vertices(self.get_vertex_data())
+        if optimize:
+            vertices, indices, self._optimization_stats = meshopt.optimize_mesh(vertices, indices, vertices[:, -3:])
+            if self._engine.debug:
+                stats = self._optimization_stats
+                print(f'{type(self).__name__} : '
+                      f'ACMR {stats["acmr_before"]:.3f} -> {stats["acmr_after"]:.3f}, '
+                      f'ATVR {stats["atvr_before"]:.3f} -> {stats["atvr_after"]:.3f}')
+        return vertices, indices
+        
     @staticmethod
     def get_vertices_from_surface(vertices, surfaces) -> np.ndarray:
         data = [vertices[indice]
                 for triangle in surfaces 
                     for indice in triangle]
         return np.array(data, dtype='f4')
+    
+    # per corner of the triangles, 1 when the edge opposite of it is shared with a coplanar triangle
+    # (the diagonal of a quad) : the wireframe leaves those out and only draws the real edges of the mesh
+    @staticmethod
+    def get_hidden_edges(vertices, surfaces) -> np.ndarray:
+        positions = np.array(vertices, dtype='f4')
+        normals = {}
+        for t, (a, b, c) in enumerate(surfaces):
+            normal = np.cross(positions[b] - positions[a], positions[c] - positions[a])
+            normals[t] = normal / np.linalg.norm(normal)
+        edges: dict[tuple[int, int], list[int]] = {}
+        for t, triangle in enumerate(surfaces):
+            for i in range(3):
+                edge = tuple(sorted((triangle[(i + 1) % 3], triangle[(i + 2) % 3])))
+                edges.setdefault(edge, []).append(t)
+        data = []
+        for t, triangle in enumerate(surfaces):
+            for i in range(3):
+                edge = tuple(sorted((triangle[(i + 1) % 3], triangle[(i + 2) % 3])))
+                coplanar = [other for other in edges[edge] if other != t and np.dot(normals[t], normals[other]) > 0.999]
+                data.append((1.0 if coplanar else 0.0,))
+        return np.array(data, dtype='f4')
         
 
 class TexturedCubeMesh(Mesh):
@@ -34,6 +76,9 @@ class TexturedCubeMesh(Mesh):
         
         vertex_data = self.get_vertices_from_surface(vertex, surfaces) # 32-bit floating-point
         
+        hidden_edge_data = self.get_hidden_edges(vertex, surfaces)
+        vertex_data = np.hstack([hidden_edge_data, vertex_data])
+        
         tex_coord = ((0, 1), (1, 1), (1, 0), (0, 0))
         
         tex_coord_indices = [(0, 2, 3), (0, 1, 2), 
@@ -82,24 +127,20 @@ class SolidCubeMesh(Mesh):
         
         vertex_color_data = self.get_vertices_from_surface(vertex_color, surfaces) # 32-bit floating-point
         
-        vertex_data = np.hstack([vertex_color_data, vertex_data])
+        hidden_edge_data = self.get_hidden_edges(vertex, surfaces)
+        
+        vertex_data = np.hstack([vertex_color_data, hidden_edge_data, vertex_data])
         return vertex_data
-    
 
-class WireCubeMesh(Mesh):
+
+class TeapotMesh(Mesh):
     def __init__(self, engine) -> None:
         super().__init__(engine)
-        
-    def get_vertex_data(self) -> np.ndarray:
-        vertex = [(-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1),
-                  (-1, 1, -1), (-1, -1, -1), (1, -1, -1), (1, 1, -1)]
-
-        lines = [(0, 1), (1, 2), (2, 3), 
-                 (3, 0), (0, 5), (5, 4), 
-                 (4, 3), (3, 2), (2, 7), 
-                 (7, 4), (4, 5), (5, 6),
-                 (6, 1), (1, 6), (6, 7)]
-        
-        vertex_data = self.get_vertices_from_surface(vertex, lines) # 32-bit floating-point
-        return vertex_data
-
+    
+    # the Utah teapot as 32 bicubic Bezier patches of 16 control points,
+    # the 306 control points are stored once and the patches index them, z is up
+    def get_patch_data(self) -> tuple[np.ndarray, np.ndarray]:
+        control_points = np.array(vertex_teapot, dtype='f4')
+        # the indices of the data start at 1
+        indices = np.array(patches, dtype='u4').ravel() - 1
+        return control_points, indices
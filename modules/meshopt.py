@@ -0,0 +1,163 @@
+import numpy as np
+
+CACHE_SIZE = 16 # post-transform cache entries of a typical GPU
+
+
+
+#------------- measurements -------------#
+
+def get_cache_misses(indices: np.ndarray, cache_size: int = CACHE_SIZE) -> int:
+    # simulates a FIFO post-transform cache and counts the vertices that would have to be shaded again
+    cache = []
+    misses = 0
+    for index in indices.tolist():
+        if index not in cache:
+            misses += 1
+            cache.append(index)
+            if len(cache) > cache_size:
+                cache.pop(0)
+    return misses
+
+def get_acmr(indices: np.ndarray, cache_size: int = CACHE_SIZE) -> float:
+    # Average Cache Miss Ratio : transformed vertices per triangle (0.5 is ideal, 3.0 is the worst)
+    triangle_count = len(indices) // 3
+    if triangle_count == 0:
+        return 0.0
+    return get_cache_misses(indices, cache_size) / triangle_count
+
+def get_atvr(indices: np.ndarray, cache_size: int = CACHE_SIZE) -> float:
+    # Average Transformed Vertex Ratio : transformed vertices per unique vertex (1.0 is ideal)
+    vertex_count = len(np.unique(indices))
+    if vertex_count == 0:
+        return 0.0
+    return get_cache_misses(indices, cache_size) / vertex_count
+
+#--------------- welding ----------------#
+
+def weld_vertices(vertex_data: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # turns an expanded triangle list (one row per corner) into unique vertices and an index buffer
+    vertices, indices = np.unique(vertex_data, axis = 0, return_inverse = True)
+    return vertices.astype('f4'), indices.reshape(-1).astype('u4')
+
+#----------- triangle ordering ----------#
+
+def tipsify(indices: np.ndarray, vertex_count: int, cache_size: int = CACHE_SIZE) -> tuple[np.ndarray, list[int]]:
+    """
+    Reorders triangles for post-transform cache locality.
+    Tipsify, from "Fast Triangle Reordering for Vertex Locality and Reduced Overdraw", Sander, Nehab & Barczak, 2007.
+    Returns the reordered index buffer and the first triangle of every cluster (a cluster ends where the fan breaks),
+    which is what the overdraw pass sorts.
+    """
+    triangles = indices.reshape(-1, 3).tolist()
+    # vertex -> triangles adjacency
+    adjacency = [[] for _ in range(vertex_count)]
+    for t, triangle in enumerate(triangles):
+        for v in triangle:
+            adjacency[v].append(t)
+    live = [len(adjacent) for adjacent in adjacency] # triangles still to be emitted around each vertex
+    timestamps = [0] * vertex_count # when each vertex entered the cache
+    emitted = [False] * len(triangles)
+    dead_end: list[int] = []
+    output: list[int] = []
+    clusters: list[int] = []
+    time = cache_size + 1
+    cursor = 0
+    fanning_vertex = 0 if vertex_count else -1
+    hard_boundary = True
+
+    while fanning_vertex >= 0:
+        if hard_boundary:
+            clusters.append(len(output) // 3)
+        candidates = []
+        for t in adjacency[fanning_vertex]:
+            if emitted[t]:
+                continue
+            for v in triangles[t]:
+                output.append(v)
+                dead_end.append(v)
+                candidates.append(v)
+                live[v] -= 1
+                if time - timestamps[v] > cache_size:
+                    timestamps[v] = time
+                    time += 1
+            emitted[t] = True
+        # pick the candidate that will still be in the cache and has the fewest triangles left
+        fanning_vertex = -1
+        best_priority = -1
+        for v in candidates:
+            if live[v] <= 0:
+                continue
+            priority = 0
+            if time - timestamps[v] + 2 * live[v] <= cache_size:
+                priority = time - timestamps[v]
+            if priority > best_priority:
+                best_priority = priority
+                fanning_vertex = v
+        hard_boundary = False
+        if fanning_vertex >= 0:
+            continue
+        # otherwise go back through the recently used vertices
+        while dead_end:
+            v = dead_end.pop()
+            if live[v] > 0:
+                fanning_vertex = v
+                break
+        if fanning_vertex >= 0:
+            continue
+        # otherwise take the next vertex in input order
+        hard_boundary = True
+        while cursor < vertex_count:
+            if live[cursor] > 0:
+                fanning_vertex = cursor
+                break
+            cursor += 1
+
+    return np.array(output, dtype='u4'), clusters
+
+def optimize_overdraw(indices: np.ndarray, positions: np.ndarray, clusters: list[int]) -> np.ndarray:
+    # Sorts the clusters found by tipsify so that the ones facing away from the center of the mesh are drawn first :
+    # they are the most likely to occlude the others, so the depth test rejects more fragments.
+    # Triangles inside a cluster keep their order, so the cache locality is preserved.
+    triangles = indices.reshape(-1, 3)
+    if len(triangles) == 0:
+        return indices
+    corners = positions[triangles] # (T, 3 corners, 3)
+    mesh_centroid = corners.reshape(-1, 3).mean(axis = 0)
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]) # area weighted
+    bounds = list(clusters) + [len(triangles)]
+    keys = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        centroid = corners[start:end].reshape(-1, 3).mean(axis = 0)
+        normal = normals[start:end].sum(axis = 0)
+        length = np.linalg.norm(normal)
+        if length > 0:
+            normal = normal / length
+        keys.append(-float(np.dot(centroid - mesh_centroid, normal)))
+    order = sorted(range(len(keys)), key = lambda cluster: keys[cluster])
+    return np.concatenate([triangles[bounds[c]:bounds[c + 1]] for c in order]).reshape(-1).astype('u4')
+
+#----------- vertex ordering ------------#
+
+def optimize_vertex_fetch(vertices: np.ndarray, indices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # renumbers vertices in order of first use so that the vertex fetches walk linearly through the vbo
+    remap = np.full(len(vertices), -1, dtype = np.int64)
+    order = []
+    for index in indices.tolist():
+        if remap[index] < 0:
+            remap[index] = len(order)
+            order.append(index)
+    return vertices[order], remap[indices].astype('u4')
+
+#--------------- pipeline ---------------#
+
+def optimize_mesh(vertices: np.ndarray, indices: np.ndarray, positions: np.ndarray,
+                  cache_size: int = CACHE_SIZE) -> tuple[np.ndarray, np.ndarray, dict[str, float]]:
+    # cache order -> overdraw order -> fetch order, measuring the cache efficiency before and after
+    stats = {'acmr_before': get_acmr(indices, cache_size),
+             'atvr_before': get_atvr(indices, cache_size)}
+    indices, clusters = tipsify(indices, len(vertices), cache_size)
+    indices = optimize_overdraw(indices, positions, clusters)
+    vertices, indices = optimize_vertex_fetch(vertices, indices)
+    stats['acmr_after'] = get_acmr(indices, cache_size)
+    stats['atvr_after'] = get_atvr(indices, cache_size)
+    return vertices, indices, stats
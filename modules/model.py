@@ -1,8 +1,20 @@
-from modules.mesh import SolidCubeMesh, WireCubeMesh, TexturedCubeMesh
+from modules.mesh import SolidCubeMesh, TexturedCubeMesh, TeapotMesh
 import modules.glmath as glmath
 import pygame.image as pgimage
+from modules.trace import tracer
+from modules.shaders import TEXTURING, DIFFUSE, SPECULAR, INSTANCING, WIREFRAME, WIREFRAME_STAGE
+from typing import Any
 import numpy as np
 import moderngl
+import struct
+
+# presets of Material.set_default_material
+DEFAULT_MATERIALS = ('basic', 'brass', 'bronze', 'polished_bronze', 'chrome', 'copper', 'polished_copper',
+                     'gold', 'polished_gold', 'pewter', 'silver', 'polished_silver', 'emerald', 'jade',
+                     'obsidian', 'pearl', 'ruby', 'turquoise', 'black_plastic', 'cyan_plastic',
+                     'green_plastic', 'red_plastic', 'white_plastic', 'yellow_plastic', 'black_rubber',
+                     'cyan_rubber', 'green_rubber', 'red_rubber', 'white_rubber', 'yellow_rubber')
+PATCH_VERTICES = 16 # control points of a bicubic Bezier patch
 
 
 
@@ -11,13 +23,18 @@ class Texture:
         self._gl_context = context
         self._texture = self.get_texture(path)
         
+    @property
+    def texture(self) -> moderngl.Texture:
+        return self._texture
+        
     def get_texture(self, path: str) -> moderngl.Texture:
-        raw_pic = pgimage.load(path).convert()
-        size = raw_pic.get_size()
-        texture_data = pgimage.tostring(raw_pic, 'RGB')
-        texture = self._gl_context.texture(size = size, 
-                                           components = 3, 
-                                           data = texture_data)
+        with tracer.zone(path, 'asset'):
+            raw_pic = pgimage.load(path).convert()
+            size = raw_pic.get_size()
+            texture_data = pgimage.tostring(raw_pic, 'RGB')
+            texture = self._gl_context.texture(size = size, 
+                                               components = 3, 
+                                               data = texture_data)
         return texture
     
     def use(self) -> None:
@@ -64,6 +81,16 @@ class Material:
     def specular_incidence(self) -> glmath.vec3f:
         return self._specular_incidence
     
+    # the lighting terms the material reflects, the ones it doesn't are left out of its shaders
+    @property
+    def features(self) -> set[str]:
+        features = set()
+        if any(self._diffuse_incidence):
+            features.add(DIFFUSE)
+        if any(self._specular_incidence):
+            features.add(SPECULAR)
+        return features
+    
     @surface_brightness.setter
     def surface_brightness(self, brightness: float) -> None:
         self._surface_brightness = brightness
@@ -246,24 +273,78 @@ class Model:
         self._engine = engine
         self._position = glmath.vec3f(position)
         self._gl_context = engine.gl_context
-        self._shader_program = self.get_shader_program(shader_program_path)
         self._texture: Texture = None
         self._material = Material()
+        # feature flags asked for on top of the ones of the texture and the material (e.g. FOG)
+        self._features: set[str] = set()
+        # the program comes from the shader library and may be shared with other models,
+        # it gets the uniforms of this one written again when an other one used it last
+        # picked once the texture and the material are known, when the vao is built
+        self._shader_program_path = shader_program_path
+        self._shader_program: moderngl.Program = None
+        self._uniforms: dict[str, Any] = {}
+        # per instance matrices, -1 draws the model once
+        self._instance_buffer: moderngl.Buffer = None
+        self._instance_count = -1
         
         self._vbo: moderngl.Buffer = None
+        self._ibo: moderngl.Buffer = None
         self._vao: moderngl.VertexArray = None
+        self._vbo_format: str = None
+        self._vbo_attributes: list[str] = []
+        # the primitives the vao is drawn as by the renderers
+        self._mode = moderngl.TRIANGLES
+        # vertex arrays binding the same buffers to the programs of other render passes
+        self._pass_vaos: dict[moderngl.Program, moderngl.VertexArray] = {}
         self._model_matrix = self.get_model_matrix()
+        # with the pipelined update, the matrix of the frame being rendered while _model_matrix moves on to the next one
+        self._frame_matrix: glmath.mat4x4f = None
+        # bumped on every transformation, so that the caches built from the model know when to update
+        self._version = 0
+        # bumped when what a recorded draw points to or writes changes : the vao (and so the program), the texture, the uniforms
+        self._draw_version = 0
+        # static models never move, their shadows are cached
+        self._static = False
+        self._bounding_radius = 0.0
+        self._bounding_box = (glmath.vec3f(0), glmath.vec3f(0))
+        # occluded models are skipped until they are reported visible again
+        self._visible = True
         
     @property
-    def material(self) -> float:
-        return self._material
+    def version(self) -> int:
+        return self._version
+    
+    @property
+    def draw_version(self) -> int:
+        return self._draw_version
+    
+    @property
+    def static(self) -> bool:
+        return self._static
+    
+    @property
+    def visible(self) -> bool:
+        return self._visible
+    
+    @property
+    def bounding_radius(self) -> float:
+        return self._bounding_radius
+    
+    # model space (min, max) corners
+    @property
+    def bounding_box(self) -> tuple[glmath.vec3f, glmath.vec3f]:
+        return self._bounding_box
     
     @property
     def model_matrix(self) -> glmath.mat4x4f:
+        if self._frame_matrix is not None:
+            return self._frame_matrix
         return self._model_matrix
     
     @property
     def shader_program(self) -> moderngl.Program:
+        if self._shader_program is None:
+            self._shader_program = self.get_shader_program(self._shader_program_path)
         return self._shader_program
     
     @property
@@ -274,57 +355,219 @@ class Model:
     def texture(self) -> Texture:
         return self._texture
     
+    @property
+    def vbo(self) -> moderngl.Buffer:
+        return self._vbo
+    
+    @property
+    def ibo(self) -> moderngl.Buffer:
+        return self._ibo
+    
+    @property
+    def vao(self) -> moderngl.VertexArray:
+        return self._vao
+    
+    @property
+    def vbo_format(self) -> tuple[str, list[str]]:
+        return self._vbo_format, self._vbo_attributes
+    
+    @property
+    def mode(self) -> int:
+        return self._mode
+    
+    @property
+    def features(self) -> set[str]:
+        return self._features
+    
+    @property
+    def instance_count(self) -> int:
+        return self._instance_count
+    
     def use_texture(self) -> None:
-        self._texture.use()
+        if self._texture:
+            self._texture.use()
     
+    # call update_shader_program after editing the material in place
     def set_material(self, material: Material) -> None:
         self._material = material
+        self.update_shader_program()
         
     def set_texture(self, texture: Texture) -> None:
         self._texture = texture
+        self._draw_version += 1
+        self.update_shader_program()
+        
+    def set_feature(self, feature: str, enabled: bool = True) -> None:
+        if enabled:
+            self._features.add(feature)
+        else:
+            self._features.discard(feature)
+        self.update_shader_program()
+        
+    # solid and wireframe in a single pass : the edges of the triangles are drawn over the surface, width in pixels
+    def set_wireframe(self, enabled: bool = True, width: float = 1.0, color: tuple[float, float, float] = (0, 0, 0)) -> None:
+        self.set_uniform('wire_width', float(width))
+        self.set_uniform('wire_color', glmath.vec3f(color))
+        self.set_feature(WIREFRAME, enabled)
+        
+    # draws the model once per matrix, each relative to the model matrix, (N, 4, 4) laid out like glm, None draws it once
+    # the other passes (shadows, deferred, occlusion) and the bounds still see a single model
+    def set_instances(self, matrices: np.ndarray) -> None:
+        if self._instance_buffer:
+            self._instance_buffer.release()
+            self._instance_buffer = None
+        if matrices is None:
+            self._instance_count = -1
+            self._features.discard(INSTANCING)
+        else:
+            self._instance_buffer = self._gl_context.buffer(np.ascontiguousarray(matrices, dtype = 'f4'))
+            self._instance_count = len(matrices)
+            self._features.add(INSTANCING)
+        if self._shader_program is not None:
+            self._shader_program = self.get_shader_program(self._shader_program_path)
+            self.update_vao()
+            self.invalidate_uniforms()
+        
+    def set_visible(self, visible: bool) -> None:
+        self._visible = visible
+        
+    def set_frame_matrix(self, matrix: glmath.mat4x4f) -> None:
+        self._frame_matrix = matrix
+        
+    # the latest transformations, apart from the matrix being rendered
+    def get_matrix_copy(self) -> glmath.mat4x4f:
+        return glmath.mat4x4f(self._model_matrix)
+        
+    def set_static(self, static: bool) -> None:
+        self._static = static
+        self._version += 1
         
     def set_vbo(self, vertex_data: np.ndarray) -> None:
         self._vbo = self._gl_context.buffer(vertex_data)
+        # in_position is the last attribute, the bounding sphere is centered on the origin of the model
+        self._bounding_radius = float(np.linalg.norm(vertex_data[:, -3:], axis = 1).max())
+        self._bounding_box = (glmath.vec3f(vertex_data[:, -3:].min(axis = 0)), glmath.vec3f(vertex_data[:, -3:].max(axis = 0)))
+        
+    def set_ibo(self, indices: np.ndarray) -> None:
+        self._ibo = self._gl_context.buffer(indices.astype('u4'))
         
     def set_vao(self, format: str, attributes: list[str]) -> None:
-        self._vao = self._gl_context.vertex_array(self._shader_program, 
-                                                [(self._vbo, format, *attributes)])
-        
-    def get_shader_program(self, shader_program_path: str, vertex: bool = True, fragment: bool  = True, 
-                                 geometry: bool  = False, tess: bool  = False) -> moderngl.Program:
-        if vertex:
-            with open(f'{shader_program_path}.vert') as file:
-                vertex_shader = file.read()
-        else: 
-            vertex_shader = None
-            
-        if fragment:
-            with open(f'{shader_program_path}.frag') as file:
-                fragment_shader = file.read()
-        else:   
-            fragment_shader = None  
+        self._vbo_format = format
+        self._vbo_attributes = attributes
+        buffers = [(self._vbo, format, *attributes)]
+        if self._instance_buffer:
+            buffers.append((self._instance_buffer, '16f/i', 'in_instance_matrix'))
+        # the index buffer is optional, without it the vbo is drawn as an expanded triangle list
+        # the attributes a permutation doesn't use (in_texcoord without TEXTURING) are skipped
+        self._vao = self._gl_context.vertex_array(self.shader_program, 
+                                                buffers,
+                                                index_buffer = self._ibo,
+                                                index_element_size = 4,
+                                                skip_errors = True)
+        self._draw_version += 1
+        
+    # after a change of program or of buffers
+    def update_vao(self) -> None:
+        if self._vao:
+            self._vao.release()
+            self.set_vao(self._vbo_format, self._vbo_attributes)
+        
+    def get_pass_vao(self, program: moderngl.Program) -> moderngl.VertexArray:
+        # the attributes the program doesn't use are skipped, the ones it needs but the model lacks read as 0
+        if program not in self._pass_vaos:
+            self._pass_vaos[program] = self._gl_context.vertex_array(program, 
+                                                                     [(self._vbo, self._vbo_format, *self._vbo_attributes)],
+                                                                     index_buffer = self._ibo,
+                                                                     index_element_size = 4,
+                                                                     skip_errors = True)
+        return self._pass_vaos[program]
+        
+    # the permutation of the program for the texture, the material and the features of the model
+    def get_shader_program(self, shader_program_path: str) -> moderngl.Program:
+        features = self.get_features()
+        paths = (shader_program_path,)
+        # the wireframe comes from a geometry stage of its own, only in its permutation
+        if WIREFRAME in features:
+            paths += (WIREFRAME_STAGE.format(shader_program_path),)
+        return self._engine.shaders.get_program(*paths, features = features, defines = self._engine.shader_defines)
+    
+    def get_features(self) -> set[str]:
+        features = self._features | self._material.features
+        if self._texture:
+            features.add(TEXTURING)
+        return features
+    
+    # picks the program again, after a change of texture, material or features
+    def update_shader_program(self) -> None:
+        if self._shader_program is None:
+            return
+        program = self.get_shader_program(self._shader_program_path)
+        if program is not self._shader_program:
+            self._shader_program = program
+            self.update_vao()
+        # the material may have been edited in place
+        self._draw_version += 1
+        self.invalidate_uniforms()
+        
+    # kept by the model, written to the program when it draws with it
+    def set_uniform(self, name: str, data: Any) -> None:
+        self._uniforms[name] = data
+        self._draw_version += 1
+        if self._engine.shaders.get_user(self._shader_program) is self:
+            self.write_uniform(name, data)
             
-        if geometry:
-            with open(f'{shader_program_path}.geom') as file:
-                geometry_shader = file.read()
+    def write_uniform(self, name: str, data: Any) -> None:
+        # the uniforms a permutation doesn't use are optimized out
+        uniform = self._shader_program.get(name, None)
+        if uniform is None:
+            return
+        if type(data) == float or type(data) == int or type(data) == tuple:
+            uniform.value = data
         else:
-            geometry_shader = None
+            uniform.write(data)
             
-        if tess:
-            with open(f'{shader_program_path}.tesc') as file:
-                tessellation_control_shader = file.read()
-            with open(f'{shader_program_path}.tese') as file:
-                tessellation_evaluation_shader = file.read()
-        else:
-            tessellation_control_shader = None
-            tessellation_evaluation_shader = None  
+    # the uniforms kept by the model and its material
+    def get_uniforms(self) -> dict[str, Any]:
+        material = self._material
+        return {**self._uniforms,
+                'material.surface_brightness': material.surface_brightness,
+                'material.ambient_incidence': material.ambient_incidence,
+                'material.diffuse_incidence': material.diffuse_incidence,
+                'material.specular_incidence': material.specular_incidence}
+        
+    # get_uniforms as the bytes its program reads, for the command lists
+    def get_packed_uniforms(self) -> dict[str, bytes]:
+        packed_uniforms = {}
+        for name, data in self.get_uniforms().items():
+            uniform = self.shader_program.get(name, None)
+            if uniform is None:
+                continue
+            if type(data) == float or type(data) == int or type(data) == bool:
+                packed_uniforms[name] = struct.pack(uniform.fmt, data)
+            elif type(data) == tuple:
+                packed_uniforms[name] = struct.pack(uniform.fmt, *data)
+            else:
+                packed_uniforms[name] = bytes(data)
+        return packed_uniforms
             
-        program = self._gl_context.program(vertex_shader = vertex_shader, 
-                                           fragment_shader = fragment_shader,
-                                           geometry_shader = geometry_shader, 
-                                           tess_control_shader = tessellation_control_shader,
-                                           tess_evaluation_shader = tessellation_evaluation_shader)
-        return program
+    def load_uniforms(self) -> None:
+        for name, data in self.get_uniforms().items():
+            self.write_uniform(name, data)
+        # the scenes only send it once, a program picked after that wouldn't have it
+        self.write_uniform('projection_matrix', self._engine.camera.projection_matrix)
+        
+    # the uniforms are written again at the next draw
+    def invalidate_uniforms(self) -> None:
+        if self._engine.shaders.get_user(self._shader_program) is self:
+            self._engine.shaders.set_user(self._shader_program, None)
+        
+    # called before every draw, by the renderers too
+    def use_program(self) -> None:
+        if self._engine.shaders.set_user(self.shader_program, self):
+            self.load_uniforms()
+        # changes with dynamic resolution
+        if WIREFRAME in self._features:
+            self.write_uniform('viewport_size', self._engine.render_size)
     
     def get_model_matrix(self):
         model_matrix = glmath.identity_matrix()
@@ -333,147 +576,188 @@ class Model:
      
     def transform(self,  transformations: glmath.mat4x4f) -> glmath.mat4x4f:
         self._model_matrix *= transformations
+        self._version += 1
+        
+    # world space bounding sphere
+    def get_bounding_sphere(self) -> tuple[glmath.vec3f, float]:
+        model_matrix = self.model_matrix
+        center = glmath.vec3f(model_matrix[3])
+        scale = max(glmath.length(glmath.vec3f(model_matrix[i])) for i in range(3))
+        return center, self._bounding_radius * scale
     
-    def render(self, mode = moderngl.TRIANGLES) -> None:
-        self.use_texture()
-        self._vao.render(mode)
+    # drawn as its own primitives unless told otherwise
+    def render(self, mode: int = None) -> None:
+        if not self._visible:
+            return
+        with tracer.zone(type(self).__name__, 'draw'):
+            self.use_program()
+            self.write_uniform('model_matrix', self.model_matrix)
+            self.use_texture()
+            self._vao.render(self._mode if mode is None else mode, instances = self._instance_count)
         
     def destroy(self) -> None:
-        self._shader_program.release()
-        self._texture.destroy()
+        for vao in self._pass_vaos.values():
+            vao.release()
+        self._pass_vaos = {}
+        if self._vao:
+            self._vao.release()
+        if self._ibo:
+            self._ibo.release()
+        if self._vbo:
+            self._vbo.release()
+        if self._instance_buffer:
+            self._instance_buffer.release()
+        # the program belongs to the shader library
+        if self._texture:
+            self._texture.destroy()
         
          
 class CompanionCubeModel(Model):
-    def __init__(self, engine, shader_program_path: str = 'shaders/default', position: tuple[float, float, float] = (0, 0, 0)) -> None:
+    def __init__(self, engine, shader_program_path: str = 'shaders/texturedCube', position: tuple[float, float, float] = (0, 0, 0)) -> None:
         super().__init__(engine, shader_program_path, position)
-        # shader program
-        self._shader_program = self.get_shader_program('shaders/texturedCube')
         # cube mesh
         self._mesh = TexturedCubeMesh(self._engine)
-        # vbo
-        vertex_data = self._mesh.get_vertex_data()
+        # vbo / ibo
+        vertex_data, indices = self._mesh.get_indexed_vertex_data()
         self.set_vbo(vertex_data)
-        # vao
-        format = '2f 3f 3f'
-        attributes = ['in_texcoord', 'in_normal', 'in_position']
-        self.set_vao(format, attributes)
+        self.set_ibo(indices)
         # texture
         texture = Texture(context = self._gl_context, path = 'textures/companion_cube.png')
         self.set_texture(texture)
+        # vao
+        format = '2f 3f 1f 3f'
+        attributes = ['in_texcoord', 'in_normal', 'in_hidden_edge', 'in_position']
+        self.set_vao(format, attributes)
         
         
 class WoodenBoxModel(Model):
-    def __init__(self, engine, shader_program_path: str = 'shaders/default', position: tuple[float, float, float] = (0, 0, 0)) -> None:
+    def __init__(self, engine, shader_program_path: str = 'shaders/texturedCube', position: tuple[float, float, float] = (0, 0, 0)) -> None:
         super().__init__(engine, shader_program_path, position)
-        # shader program
-        self._shader_program = self.get_shader_program('shaders/texturedCube')
         # cube mesh
         self._mesh = TexturedCubeMesh(self._engine)
-        # vbo
-        vertex_data = self._mesh.get_vertex_data()
+        # vbo / ibo
+        vertex_data, indices = self._mesh.get_indexed_vertex_data()
         self.set_vbo(vertex_data)
-        # vao
-        format = '2f 3f 3f'
-        attributes = ['in_texcoord', 'in_normal', 'in_position']
-        self.set_vao(format, attributes)
+        self.set_ibo(indices)
         # texture
         texture = Texture(context = self._gl_context, path = 'textures/wooden_box.png')
         self.set_texture(texture)
+        # vao
+        format = '2f 3f 1f 3f'
+        attributes = ['in_texcoord', 'in_normal', 'in_hidden_edge', 'in_position']
+        self.set_vao(format, attributes)
         
 
 class MetalBoxModel(Model):
-    def __init__(self, engine, shader_program_path: str = 'shaders/default', position: tuple[float, float, float] = (0, 0, 0)) -> None:
+    def __init__(self, engine, shader_program_path: str = 'shaders/texturedCube', position: tuple[float, float, float] = (0, 0, 0)) -> None:
         super().__init__(engine, shader_program_path, position)
-        # shader program
-        self._shader_program = self.get_shader_program('shaders/texturedCube')
         # cube mesh
         self._mesh = TexturedCubeMesh(self._engine)
-        # vbo
-        vertex_data = self._mesh.get_vertex_data()
+        # vbo / ibo
+        vertex_data, indices = self._mesh.get_indexed_vertex_data()
         self.set_vbo(vertex_data)
-        # vao
-        format = '2f 3f 3f'
-        attributes = ['in_texcoord', 'in_normal', 'in_position']
-        self.set_vao(format, attributes)
+        self.set_ibo(indices)
         # texture
         texture = Texture(context = self._gl_context, path = 'textures/METAL_BOX.png')
         self.set_texture(texture)
+        # vao
+        format = '2f 3f 1f 3f'
+        attributes = ['in_texcoord', 'in_normal', 'in_hidden_edge', 'in_position']
+        self.set_vao(format, attributes)
         # material
-        self.material.set_default_material('chrome')
+        self.set_material(Material(name = 'chrome'))
         
         
 class GoldenBoxModel(Model):
-    def __init__(self, engine, shader_program_path: str = 'shaders/default', position: tuple[float, float, float] = (0, 0, 0)) -> None:
+    def __init__(self, engine, shader_program_path: str = 'shaders/texturedCube', position: tuple[float, float, float] = (0, 0, 0)) -> None:
         super().__init__(engine, shader_program_path, position)
-        # shader program
-        self._shader_program = self.get_shader_program('shaders/texturedCube')
         # cube mesh
         self._mesh = TexturedCubeMesh(self._engine)
-        # vbo
-        vertex_data = self._mesh.get_vertex_data()
+        # vbo / ibo
+        vertex_data, indices = self._mesh.get_indexed_vertex_data()
         self.set_vbo(vertex_data)
-        # vao
-        format = '2f 3f 3f'
-        attributes = ['in_texcoord', 'in_normal', 'in_position']
-        self.set_vao(format, attributes)
+        self.set_ibo(indices)
         # texture
         texture = Texture(context = self._gl_context, path = 'textures/golden_box.png')
         self.set_texture(texture)
+        # vao
+        format = '2f 3f 1f 3f'
+        attributes = ['in_texcoord', 'in_normal', 'in_hidden_edge', 'in_position']
+        self.set_vao(format, attributes)
         # material
-        self.material.set_default_material('polished_gold')
+        self.set_material(Material(name = 'polished_gold'))
         
         
 class TexturedCubeModel(Model):
-    def __init__(self, engine, shader_program_path: str = 'shaders/default', position: tuple[float, float, float] = (0, 0, 0)) -> None:
+    def __init__(self, engine, shader_program_path: str = 'shaders/texturedCube', position: tuple[float, float, float] = (0, 0, 0)) -> None:
         super().__init__(engine, shader_program_path, position)
-        # shader program
-        self._shader_program = self.get_shader_program('shaders/texturedCube')
         # cube mesh
         self._mesh = TexturedCubeMesh(self._engine)
-        # vbo
-        vertex_data = self._mesh.get_vertex_data()
+        # vbo / ibo
+        vertex_data, indices = self._mesh.get_indexed_vertex_data()
         self.set_vbo(vertex_data)
-        # vao
-        format = '2f 3f 3f'
-        attributes = ['in_texcoord', 'in_normal', 'in_position']
-        self.set_vao(format, attributes)
+        self.set_ibo(indices)
         # texture
         texture = Texture(context = self._gl_context, path = 'textures/test.png')
         self.set_texture(texture)
+        # vao
+        format = '2f 3f 1f 3f'
+        attributes = ['in_texcoord', 'in_normal', 'in_hidden_edge', 'in_position']
+        self.set_vao(format, attributes)
         
 
 class ColoredCubeModel(Model):
-    def __init__(self, engine, shader_program_path: str = 'shaders/default', position: tuple[float, float, float] = (0, 0, 0)) -> None:
+    def __init__(self, engine, shader_program_path: str = 'shaders/color_gradiant', position: tuple[float, float, float] = (0, 0, 0)) -> None:
         super().__init__(engine, shader_program_path, position)
-        # shader program
-        self._shader_program = self.get_shader_program('shaders/color_gradiant')
         # cube mesh
         self._mesh = SolidCubeMesh(self._engine)
-        # vbo
-        vertex_data = self._mesh.get_vertex_data()
+        # vbo / ibo
+        vertex_data, indices = self._mesh.get_indexed_vertex_data()
         self.set_vbo(vertex_data)
+        self.set_ibo(indices)
         # vao
-        format = '3f 3f'
-        attributes = ['in_color', 'in_position']
+        format = '3f 1f 3f'
+        attributes = ['in_color', 'in_hidden_edge', 'in_position']
         self.set_vao(format, attributes)
+
+
+class BezierPatchModel(Model):
+    """
+    A surface made of bicubic Bezier patches, tessellated on the GPU : the control points are uploaded once,
+    shared by the patches that index them, and drawn as PATCHES of 16 points through the .tesc/.tese stages
+    of its program. The tessellation levels are chosen per patch edge from its size on screen, so that the
+    triangles are about tessellation_pixels long whatever the distance ; the patches out of the view are culled.
+    The passes that don't tessellate (shadows, deferred) leave the patch models out, the occlusion culling tests
+    their bounds, which hold the surface since a patch lies inside of the hull of its control points.
+    """
+    def __init__(self, engine, shader_program_path: str = 'shaders/bezier', position: tuple[float, float, float] = (0, 0, 0)) -> None:
+        super().__init__(engine, shader_program_path, position)
+        self._mode = moderngl.PATCHES
+        self.set_tessellation()
         
+    # (N, 3) control points, 16 indices per patch, row by row
+    def set_patches(self, control_points: np.ndarray, indices: np.ndarray) -> None:
+        self.set_vbo(control_points)
+        self.set_ibo(indices)
+        self.set_vao('3f', ['in_position'])
         
-# must be rendered with LINE STRIP
-class WireCubeModel(Model):
-    def __init__(self, engine, shader_program_path: str = 'shaders/default', position: tuple[float, float, float] = (0, 0, 0)) -> None:
-        super().__init__(engine, shader_program_path, position)
-        # shader program
-        self._shader_program = self.get_shader_program('shaders/outline')
-        # cube mesh
-        self._mesh = WireCubeMesh(self._engine)
-        # vbo
-        vertex_data = self._mesh.get_vertex_data()
-        self.set_vbo(vertex_data)
-        # vao
-        format = '3f 3f'
-        attributes = ['in_color', 'in_position']
-        self.set_vao(format, attributes)
-         
+    # target length of the edges of the triangles, in pixels
+    def set_tessellation(self, pixels: float = 8.0) -> None:
+        self.set_uniform('tessellation_pixels', float(pixels))
         
+    def use_program(self) -> None:
+        super().use_program()
+        # the levels depend on the resolution, the size of the patches is a state of the context
+        self.write_uniform('viewport_size', self._engine.render_size)
+        self._gl_context.patch_vertices = PATCH_VERTICES
         
-        
\ No newline at end of file
+        
+class TeapotModel(BezierPatchModel):
+    def __init__(self, engine, shader_program_path: str = 'shaders/bezier', position: tuple[float, float, float] = (0, 0, 0)) -> None:
+        super().__init__(engine, shader_program_path, position)
+        # patches mesh
+        self._mesh = TeapotMesh(self._engine)
+        # vbo / ibo / vao
+        self.set_patches(*self._mesh.get_patch_data())
+        # the data is z up
+        self.transform(glmath.rotate(glmath.radians(-90), glmath.vec3f(1, 0, 0)))
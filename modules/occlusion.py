@@ -0,0 +1,100 @@
+import moderngl
+import numpy as np
+import modules.glmath as glmath
+from modules.camera import NEAR
+from modules.mesh import SolidCubeMesh
+
+QUERY_LATENCY = 2 # frames between issuing a query and reading its result
+
+
+
+class OcclusionCuller:
+    """
+    Hardware occlusion culling : after the scene is drawn, the bounding box of every model is rendered
+    against the depth buffer inside of a samples passed query.
+    The results are only read QUERY_LATENCY frames later, when the GPU is done with them, so the pipeline never stalls.
+    A model whose box had no visible sample is skipped until a later query reports it visible again.
+    """
+    def __init__(self, engine, latency: int = QUERY_LATENCY) -> None:
+        self._engine = engine
+        self._gl_context = engine.gl_context
+        self._latency = latency
+        self._program = self.get_shader_program('shaders/occlusion')
+        vertex_data, indices = SolidCubeMesh(engine).get_indexed_vertex_data(optimize = False)
+        self._box_vbo = self._gl_context.buffer(np.ascontiguousarray(vertex_data[:, -3:]))
+        self._box_ibo = self._gl_context.buffer(indices)
+        self._box_vao = self._gl_context.vertex_array(self._program, [(self._box_vbo, '3f', 'in_position')],
+                                                      index_buffer = self._box_ibo,
+                                                      index_element_size = 4)
+        # queries issued during each of the last frames, oldest first, and during the current one by every scene
+        self._pending_queries: list[list[tuple]] = []
+        self._frame_queries: list[tuple] = []
+        # queries whose result has been read, ready to be issued again
+        self._free_queries: list[moderngl.Query] = []
+
+    def get_shader_program(self, shader_program_path: str) -> moderngl.Program:
+        with open(f'{shader_program_path}.vert') as file:
+            vertex_shader = file.read()
+        with open(f'{shader_program_path}.frag') as file:
+            fragment_shader = file.read()
+        program = self._gl_context.program(vertex_shader = vertex_shader, fragment_shader = fragment_shader)
+        return program
+
+    def get_query(self) -> moderngl.Query:
+        if self._free_queries:
+            return self._free_queries.pop()
+        return self._gl_context.query(samples = True)
+
+    # applies the results of the queries issued QUERY_LATENCY frames ago
+    def begin_frame(self) -> None:
+        if len(self._pending_queries) >= self._latency:
+            for model, query in self._pending_queries.pop(0):
+                model.set_visible(query.samples > 0)
+                self._free_queries.append(query)
+
+    def end_frame(self) -> None:
+        self._pending_queries.append(self._frame_queries)
+        self._frame_queries = []
+
+    # called before the scene renders
+    def update(self, scene) -> None:
+        camera_position = self._engine.camera.position
+        for model in scene.models:
+            # the near plane clips the box when the camera is inside of it, the query would report nothing
+            # (the corners of the box are sqrt(3) radii away from its center)
+            center, radius = model.get_bounding_sphere()
+            if glmath.length(camera_position - center) < radius * 1.75 + NEAR:
+                model.set_visible(True)
+
+    # called after the scene renders, when the depth buffer holds the occluders
+    def issue_queries(self, scene) -> None:
+        camera = self._engine.camera
+        self._program['projection_matrix'].write(camera.projection_matrix)
+        self._program['view_matrix'].write(camera.view_matrix)
+        framebuffer = self._gl_context.fbo
+        color_mask, depth_mask = framebuffer.color_mask, framebuffer.depth_mask
+        framebuffer.color_mask = (False, False, False, False)
+        framebuffer.depth_mask = False
+        # the boxes must be tested from the inside too, and they pass where they touch the surface of their own model
+        self._gl_context.disable(moderngl.CULL_FACE)
+        self._gl_context.depth_func = '<='
+        for model in scene.models:
+            # the unit cube stretched over the bounding box of the model
+            box_min, box_max = model.bounding_box
+            box_matrix = glmath.translate(model.model_matrix, (box_min + box_max) / 2) * glmath.scale((box_max - box_min) / 2)
+            self._program['box_matrix'].write(box_matrix)
+            query = self.get_query()
+            with query:
+                self._box_vao.render(moderngl.TRIANGLES)
+            self._frame_queries.append((model, query))
+        framebuffer.color_mask = color_mask
+        framebuffer.depth_mask = depth_mask
+        self._gl_context.depth_func = '<'
+        if self._engine.cull_face:
+            self._gl_context.enable(moderngl.CULL_FACE)
+
+    def destroy(self) -> None:
+        self._box_vao.release()
+        self._box_vbo.release()
+        self._box_ibo.release()
+        self._program.release()
@@ -0,0 +1,226 @@
+import moderngl
+import numpy as np
+import modules.glmath as glmath
+
+PARTICLE_FORMAT = ('3f 1f 3f 1f', ['in_position', 'in_age', 'in_velocity', 'in_lifetime'])
+PARTICLE_SIZE = 32 # bytes
+DEFAULT_CAPACITY = 1_000_000
+
+
+
+class ParticleEmitter:
+    def __init__(self, position: tuple[float, float, float] = (0, 0, 0),
+                 direction: tuple[float, float, float] = (0, 1, 0),
+                 rate: float = 100_000.0) -> None:
+        self._position = glmath.vec3f(position)
+        self._direction = glmath.normalize(glmath.vec3f(direction))
+        self._rate = rate # particles per second
+        self._spread_angle = 20.0 # deg, half angle of the emission cone
+        self._speed = (6.0, 9.0) # min, max
+        self._lifetime = (2.0, 4.0) # min, max, in s
+        self._gravity = glmath.vec3f(0, -9.81, 0)
+        # the ground the particles bounce on
+        self._ground_height = -1.0
+        self._restitution = 0.4
+        self._friction = 0.8
+        # look
+        self._particle_size = 0.03
+        self._start_color = glmath.vec3f(1.0, 0.9, 0.5)
+        self._end_color = glmath.vec3f(0.9, 0.2, 0.05)
+
+    @property
+    def position(self) -> glmath.vec3f:
+        return self._position
+
+    @property
+    def direction(self) -> glmath.vec3f:
+        return self._direction
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @property
+    def spread_angle(self) -> float:
+        return self._spread_angle
+
+    @property
+    def speed(self) -> tuple[float, float]:
+        return self._speed
+
+    @property
+    def lifetime(self) -> tuple[float, float]:
+        return self._lifetime
+
+    @property
+    def gravity(self) -> glmath.vec3f:
+        return self._gravity
+
+    @property
+    def ground_height(self) -> float:
+        return self._ground_height
+
+    @property
+    def restitution(self) -> float:
+        return self._restitution
+
+    @property
+    def friction(self) -> float:
+        return self._friction
+
+    @property
+    def particle_size(self) -> float:
+        return self._particle_size
+
+    @property
+    def start_color(self) -> glmath.vec3f:
+        return self._start_color
+
+    @property
+    def end_color(self) -> glmath.vec3f:
+        return self._end_color
+
+    def set_position(self, position: tuple[float, float, float]) -> None:
+        self._position = glmath.vec3f(position)
+
+    def set_direction(self, direction: tuple[float, float, float]) -> None:
+        self._direction = glmath.normalize(glmath.vec3f(direction))
+
+    def set_rate(self, rate: float) -> None:
+        self._rate = rate
+
+    def set_spread_angle(self, angle: float) -> None:
+        self._spread_angle = angle
+
+    def set_speed(self, min_speed: float, max_speed: float) -> None:
+        self._speed = (min_speed, max_speed)
+
+    def set_lifetime(self, min_lifetime: float, max_lifetime: float) -> None:
+        self._lifetime = (min_lifetime, max_lifetime)
+
+    def set_gravity(self, gravity: tuple[float, float, float]) -> None:
+        self._gravity = glmath.vec3f(gravity)
+
+    def set_ground(self, height: float, restitution: float = 0.4, friction: float = 0.8) -> None:
+        self._ground_height = height
+        self._restitution = restitution
+        self._friction = friction
+
+    def set_particle_size(self, size: float) -> None:
+        self._particle_size = size
+
+    def set_colors(self, start_color: tuple[float, float, float], end_color: tuple[float, float, float]) -> None:
+        self._start_color = glmath.vec3f(start_color)
+        self._end_color = glmath.vec3f(end_color)
+
+
+class ParticleSystem:
+    """
+    Particles simulated and emitted on the GPU : every frame a transform feedback pass reads the particles from one buffer
+    and writes their new state into the other, then the buffers are swapped.
+    Dead particles are respawned by the same pass, in a window of indices that moves along the buffer at the emission rate,
+    so the particles never go through Python, only the parameters of the emitter do.
+    They are drawn as point sprites, after the opaque models.
+    """
+    def __init__(self, engine, emitter: ParticleEmitter = None, capacity: int = DEFAULT_CAPACITY) -> None:
+        self._engine = engine
+        self._gl_context = engine.gl_context
+        self._emitter = emitter if emitter else ParticleEmitter()
+        self._capacity = capacity
+        # programs
+        self._update_program = self.get_update_program('shaders/particle_update')
+        self._render_program = self.get_shader_program('shaders/particle')
+        # ping-pong buffers, every particle starts dead (age 0, lifetime 0)
+        self._buffers = [self._gl_context.buffer(np.zeros(capacity * PARTICLE_SIZE, dtype = 'u1')) for i in range(2)]
+        self._update_vaos = [self._gl_context.vertex_array(self._update_program, [(buffer, PARTICLE_FORMAT[0], *PARTICLE_FORMAT[1])]) for buffer in self._buffers]
+        self._render_vaos = [self._gl_context.vertex_array(self._render_program, [(buffer, '3f 1f 12x 1f', 'in_position', 'in_age', 'in_lifetime')])
+                             for buffer in self._buffers]
+        self._current = 0 # buffer holding the particles of this frame
+        self._frame = 0
+        self._emit_start = 0
+        self._emit_remainder = 0.0 # fraction of a particle left over from the last frames
+
+    @property
+    def emitter(self) -> ParticleEmitter:
+        return self._emitter
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def set_emitter(self, emitter: ParticleEmitter) -> None:
+        self._emitter = emitter
+
+    def get_update_program(self, shader_program_path: str) -> moderngl.Program:
+        with open(f'{shader_program_path}.vert') as file:
+            vertex_shader = file.read()
+        program = self._gl_context.program(vertex_shader = vertex_shader,
+                                           varyings = ['out_position', 'out_age', 'out_velocity', 'out_lifetime'])
+        return program
+
+    def get_shader_program(self, shader_program_path: str) -> moderngl.Program:
+        with open(f'{shader_program_path}.vert') as file:
+            vertex_shader = file.read()
+        with open(f'{shader_program_path}.frag') as file:
+            fragment_shader = file.read()
+        program = self._gl_context.program(vertex_shader = vertex_shader, fragment_shader = fragment_shader)
+        return program
+
+    def load_emitter(self) -> None:
+        emitter = self._emitter
+        program = self._update_program
+        program['emitter_position'].write(emitter.position)
+        program['emitter_direction'].write(emitter.direction)
+        program['emitter_spread'] = float(glmath.cos(glmath.radians(emitter.spread_angle)))
+        program['emitter_speed'] = emitter.speed
+        program['emitter_lifetime'] = emitter.lifetime
+        program['gravity'].write(emitter.gravity)
+        program['ground_height'] = emitter.ground_height
+        program['restitution'] = emitter.restitution
+        program['friction'] = emitter.friction
+
+    # delta_time in s
+    def update(self, delta_time: float) -> None:
+        # the particles to emit this frame, the fractions add up over the frames
+        emitted = self._emitter.rate * delta_time + self._emit_remainder
+        emit_count = min(int(emitted), self._capacity)
+        self._emit_remainder = emitted - int(emitted)
+        self.load_emitter()
+        program = self._update_program
+        program['delta_time'] = delta_time
+        program['frame'] = self._frame
+        program['capacity'] = self._capacity
+        program['emit_start'] = self._emit_start
+        program['emit_count'] = emit_count
+        self._update_vaos[self._current].transform(self._buffers[1 - self._current], moderngl.POINTS, vertices = self._capacity)
+        self._current = 1 - self._current
+        self._emit_start = (self._emit_start + emit_count) % self._capacity
+        self._frame += 1
+
+    def render(self) -> None:
+        camera = self._engine.camera
+        program = self._render_program
+        program['projection_matrix'].write(camera.projection_matrix)
+        program['view_matrix'].write(camera.view_matrix)
+        program['particle_size'] = self._emitter.particle_size
+        program['viewport_height'] = float(self._engine.render_size[1])
+        program['start_color'].write(self._emitter.start_color)
+        program['end_color'].write(self._emitter.end_color)
+        # additive sprites, tested against the depth of the models but not written in it
+        framebuffer = self._gl_context.fbo
+        depth_mask = framebuffer.depth_mask
+        framebuffer.depth_mask = False
+        self._gl_context.enable(moderngl.BLEND)
+        self._gl_context.blend_func = moderngl.SRC_ALPHA, moderngl.ONE
+        self._render_vaos[self._current].render(moderngl.POINTS, vertices = self._capacity)
+        self._gl_context.blend_func = moderngl.DEFAULT_BLENDING
+        self._gl_context.disable(moderngl.BLEND)
+        framebuffer.depth_mask = depth_mask
+
+    def destroy(self) -> None:
+        for vao in self._update_vaos + self._render_vaos:
+            vao.release()
+        for buffer in self._buffers:
+            buffer.release()
+        self._update_program.release()
+        self._render_program.release()
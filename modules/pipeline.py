@@ -0,0 +1,135 @@
+import queue
+import threading
+import numpy as np
+import modules.glmath as glmath
+import modules.batchmath as batchmath
+from modules.trace import tracer
+
+
+
+class FramePacket:
+    """
+    What the render thread needs from the update of a frame, copied out of the models so that it doesn't change
+    while the next frame is being updated : per scene, the model matrices as glm copies and as an (N, 4, 4) array.
+    """
+    def __init__(self, frame: int, scenes: list, matrices: list[list[glmath.mat4x4f]], matrix_arrays: list[np.ndarray]) -> None:
+        self._frame = frame
+        self._scenes = scenes
+        self._matrices = matrices
+        self._matrix_arrays = matrix_arrays
+
+    @property
+    def frame(self) -> int:
+        return self._frame
+
+    @property
+    def scenes(self) -> list:
+        return self._scenes
+
+    @property
+    def matrices(self) -> list[list[glmath.mat4x4f]]:
+        return self._matrices
+
+    @property
+    def matrix_arrays(self) -> list[np.ndarray]:
+        return self._matrix_arrays
+
+
+class FramePipeline:
+    """
+    Updates the scenes one frame ahead, on a worker thread, while the main thread submits the previous frame to OpenGL.
+    The worker runs Scene.update, through the fixed timestep of the engine if it has one, and packs the resulting
+    model matrices into a FramePacket, the main thread hands the packet of the frame it renders to the models
+    (Model.set_frame_matrix) and the scenes, then starts the next update.
+    Two packets are alive at a time, the one rendered and the one being built, the frames are shown one frame late.
+    The GL context never leaves the main thread, and the update must not touch it.
+    The Python side of the updates holds the GIL, the overlap comes from the driver and the numpy packing that release it.
+    """
+    def __init__(self, engine) -> None:
+        self._engine = engine
+        self._frame = 0
+        self._requests: queue.Queue = queue.Queue(maxsize = 1)
+        self._packets: queue.Queue = queue.Queue(maxsize = 1)
+        self._in_flight = False
+        self._packet: FramePacket = None # the frame being rendered
+        self._thread = threading.Thread(target = self.work, name = 'frame update', daemon = True)
+        self._thread.start()
+
+    @property
+    def packet(self) -> FramePacket:
+        return self._packet
+
+    # worker thread
+    def work(self) -> None:
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            frame, scenes, delta_time = request
+            try:
+                with tracer.zone('update'):
+                    packet = self.prepare(frame, scenes, delta_time)
+                self._packets.put(packet)
+            except Exception as error:
+                # raised again on the main thread
+                self._packets.put(error)
+
+    def prepare(self, frame: int, scenes: list, delta_time: float) -> FramePacket:
+        simulation = self._engine.simulation
+        if simulation:
+            simulation.advance(scenes, delta_time)
+        else:
+            for scene in scenes:
+                scene.update()
+        matrices = []
+        matrix_arrays = []
+        for scene in scenes:
+            if simulation:
+                scene_matrices = simulation.get_frame_matrices(scene)
+            else:
+                scene_matrices = [model.get_matrix_copy() for model in scene.models]
+            matrices.append(scene_matrices)
+            if scene_matrices:
+                matrix_arrays.append(batchmath.from_glm(scene_matrices))
+            else:
+                matrix_arrays.append(np.zeros((0, 4, 4), dtype = 'f4'))
+        return FramePacket(frame, scenes, matrices, matrix_arrays)
+
+    def request_update(self) -> None:
+        self._requests.put((self._frame, list(self._engine.scenes), self._engine.delta_time))
+        self._in_flight = True
+        self._frame += 1
+
+    def wait_packet(self) -> FramePacket:
+        packet = self._packets.get()
+        self._in_flight = False
+        if isinstance(packet, Exception):
+            raise packet
+        return packet
+
+    # called by the main thread before rendering : takes the packet of this frame and starts the update of the next one
+    def begin_frame(self) -> None:
+        if not self._in_flight:
+            self.request_update()
+        with tracer.zone('wait for update'):
+            packet = self.wait_packet()
+        for scene, scene_matrices, matrix_array in zip(packet.scenes, packet.matrices, packet.matrix_arrays):
+            # a scene whose models changed since the request is drawn from the models until the next packet
+            if len(scene_matrices) != len(scene.models):
+                scene.set_frame_matrices(None)
+                continue
+            for model, matrix in zip(scene.models, scene_matrices):
+                model.set_frame_matrix(matrix)
+            scene.set_frame_matrices(matrix_array)
+        self._packet = packet
+        # the models now render from the packet, the worker is free to move them
+        self.request_update()
+
+    def destroy(self) -> None:
+        if self._in_flight:
+            try:
+                self.wait_packet()
+            except Exception:
+                pass
+        self._requests.put(None)
+        self._thread.join()
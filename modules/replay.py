@@ -0,0 +1,105 @@
+import struct
+from typing import BinaryIO
+
+MAGIC = b'GLIR'
+VERSION = 1
+HEADER = struct.Struct('<4sHH') # magic, version, number of tracked keys
+FRAME = struct.Struct('<fHhhhhB') # delta time, held keys bitmask, mouse x, y, dx, dy, number of key presses
+KEY = struct.Struct('<I')
+
+
+
+class InputFrame:
+    """
+    Everything the engine reads from the user during a frame.
+    """
+    def __init__(self, delta_time: float, held_keys: set[int], mouse: tuple[int, int, int, int], pressed_keys: list[int]) -> None:
+        self._delta_time = delta_time # ms
+        self._held_keys = held_keys
+        self._mouse = mouse # x, y, dx, dy
+        self._pressed_keys = pressed_keys
+
+    @property
+    def delta_time(self) -> float:
+        return self._delta_time
+
+    @property
+    def held_keys(self) -> set[int]:
+        return self._held_keys
+
+    @property
+    def mouse(self) -> tuple[int, int, int, int]:
+        return self._mouse
+
+    @property
+    def pressed_keys(self) -> list[int]:
+        return self._pressed_keys
+
+    # the live input reuses a single frame, the held and pressed keys are updated in place by the engine
+    def set_state(self, delta_time: float, mouse: tuple[int, int, int, int]) -> None:
+        self._delta_time = delta_time
+        self._mouse = mouse
+
+
+class InputRecorder:
+    """
+    Writes the input of every frame to a compact binary file : a header listing the tracked keys,
+    then per frame the delta time, a bitmask of the tracked keys held, the mouse and the keys pressed.
+    """
+    def __init__(self, path: str, tracked_keys: list[int]) -> None:
+        self._tracked_keys = tracked_keys
+        self._file: BinaryIO = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, len(tracked_keys)))
+        for key in tracked_keys:
+            self._file.write(KEY.pack(key))
+
+    def write_frame(self, frame: InputFrame) -> None:
+        mask = 0
+        for i, key in enumerate(self._tracked_keys):
+            if key in frame.held_keys:
+                mask |= 1 << i
+        self._file.write(FRAME.pack(frame.delta_time, mask, *frame.mouse, len(frame.pressed_keys)))
+        for key in frame.pressed_keys:
+            self._file.write(KEY.pack(key))
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class InputReplay:
+    """
+    Reads back a file written by InputRecorder, one InputFrame per frame, until it runs out.
+    """
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as file:
+            self._data = file.read()
+        magic, version, key_count = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not an input recording (version {VERSION})')
+        self._offset = HEADER.size
+        self._tracked_keys = []
+        for i in range(key_count):
+            self._tracked_keys.append(KEY.unpack_from(self._data, self._offset)[0])
+            self._offset += KEY.size
+        self._frame = 0
+
+    @property
+    def frame(self) -> int:
+        return self._frame
+
+    @property
+    def finished(self) -> bool:
+        return self._offset >= len(self._data)
+
+    def read_frame(self) -> InputFrame:
+        if self.finished:
+            return None
+        delta_time, mask, x, y, dx, dy, press_count = FRAME.unpack_from(self._data, self._offset)
+        self._offset += FRAME.size
+        held_keys = {key for i, key in enumerate(self._tracked_keys) if mask & (1 << i)}
+        pressed_keys = []
+        for i in range(press_count):
+            pressed_keys.append(KEY.unpack_from(self._data, self._offset)[0])
+            self._offset += KEY.size
+        self._frame += 1
+        return InputFrame(delta_time, held_keys, (x, y, dx, dy), pressed_keys)
@@ -0,0 +1,128 @@
+import moderngl
+import modules.glmath as glmath
+from modules.trace import tracer
+
+QUERY_LATENCY = 2 # frames between issuing a timer query and reading its result
+MIN_SCALE = 0.5 # of the window size, along each axis
+HEADROOM = 0.9 # the scale grows back only while the frames take less than this part of the target
+SMOOTHING = 0.2 # weight of the last measure in the averaged GPU frame time
+MAX_STEP = 0.1 # largest change of the scale in a single frame
+SHARPNESS = 0.5 # strength of the sharpen filter at the minimum scale, none at full resolution
+
+
+
+class DynamicResolution:
+    """
+    The scene is rendered into an offscreen framebuffer, in a viewport that only covers part of it
+    when the GPU can't keep up with the target frame time, then upscaled to the window.
+    The GPU time of the scene is measured with timer queries read QUERY_LATENCY frames later, so the pipeline never stalls.
+    The number of pixels is proportional to the scale squared, so the scale follows the square root of the time ratio.
+    """
+    def __init__(self, engine, target_frame_time: float, min_scale: float = MIN_SCALE, latency: int = QUERY_LATENCY) -> None:
+        self._engine = engine
+        self._gl_context = engine.gl_context
+        self._target_frame_time = target_frame_time # ms
+        self._min_scale = min_scale
+        self._latency = latency
+        self._scale = 1.0
+        self._render_size = engine.win_size
+        self._gpu_frame_time = 0.0 # ms, averaged
+        # allocated once at the window size, only the viewport changes with the scale
+        self._color = self._gl_context.texture(engine.win_size, 4)
+        self._color.repeat_x = False
+        self._color.repeat_y = False
+        self._depth = self._gl_context.depth_renderbuffer(engine.win_size)
+        self._framebuffer = self._gl_context.framebuffer(color_attachments = [self._color], depth_attachment = self._depth)
+        # upscale pass
+        self._program = self.get_shader_program('shaders/upscale')
+        self._program['scene_texture'] = 0
+        self._vao = self._gl_context.vertex_array(self._program, [])
+        # timer queries of the last frames, oldest first
+        self._pending_queries: list[moderngl.Query] = []
+        self._free_queries: list[moderngl.Query] = []
+        self._query: moderngl.Query = None
+
+    @property
+    def scale(self) -> float:
+        return self._scale
+
+    @property
+    def render_size(self) -> tuple[int, int]:
+        return self._render_size
+
+    @property
+    def gpu_frame_time(self) -> float:
+        return self._gpu_frame_time
+
+    @property
+    def framebuffer(self) -> moderngl.Framebuffer:
+        return self._framebuffer
+
+    def set_target_frame_time(self, target_frame_time: float) -> None:
+        self._target_frame_time = target_frame_time
+
+    def get_shader_program(self, shader_program_path: str) -> moderngl.Program:
+        with open(f'{shader_program_path}.vert') as file:
+            vertex_shader = file.read()
+        with open(f'{shader_program_path}.frag') as file:
+            fragment_shader = file.read()
+        program = self._gl_context.program(vertex_shader = vertex_shader, fragment_shader = fragment_shader)
+        return program
+
+    def get_query(self) -> moderngl.Query:
+        if self._free_queries:
+            return self._free_queries.pop()
+        return self._gl_context.query(time = True)
+
+    # reads the timer queries old enough to be done and picks the scale of the next frame
+    def update_scale(self) -> None:
+        if len(self._pending_queries) <= self._latency:
+            return
+        query = self._pending_queries.pop(0)
+        frame_time = query.elapsed / 1e6
+        self._free_queries.append(query)
+        if self._gpu_frame_time == 0.0:
+            self._gpu_frame_time = frame_time
+        else:
+            self._gpu_frame_time += SMOOTHING * (frame_time - self._gpu_frame_time)
+        if self._gpu_frame_time <= 0.0:
+            return
+        # only react outside of [HEADROOM * target, target] so that the scale doesn't oscillate
+        if self._target_frame_time * HEADROOM <= self._gpu_frame_time <= self._target_frame_time:
+            return
+        ratio = self._target_frame_time * HEADROOM / self._gpu_frame_time
+        step = glmath.clamp(glmath.sqrt(ratio), 1 - MAX_STEP, 1 + MAX_STEP)
+        self._scale = glmath.clamp(self._scale * step, self._min_scale, 1.0)
+        width, height = self._engine.win_size
+        self._render_size = (max(1, round(width * self._scale)), max(1, round(height * self._scale)))
+
+    # before the scene renders : every pass that targets the screen goes to the offscreen framebuffer instead
+    def begin(self) -> None:
+        self.update_scale()
+        self._framebuffer.viewport = (0, 0, *self._render_size)
+        self._framebuffer.use()
+        self._query = self.get_query()
+        self._query.mglo.begin()
+        tracer.set_external_query(True)
+
+    # after the scene renders : stops the timer and upscales the result to the window
+    def end(self) -> None:
+        self._query.mglo.end()
+        tracer.set_external_query(False)
+        self._pending_queries.append(self._query)
+        self._query = None
+        self._gl_context.screen.use()
+        self._gl_context.disable(moderngl.DEPTH_TEST)
+        self._color.use(location = 0)
+        width, height = self._engine.win_size
+        self._program['render_scale'] = (self._render_size[0] / width, self._render_size[1] / height)
+        self._program['sharpness'] = SHARPNESS * (1 - self._scale) / (1 - self._min_scale) if self._min_scale < 1 else 0.0
+        self._vao.render(moderngl.TRIANGLES, vertices = 3)
+        self._gl_context.enable(moderngl.DEPTH_TEST)
+
+    def destroy(self) -> None:
+        self._vao.release()
+        self._program.release()
+        self._framebuffer.release()
+        self._color.release()
+        self._depth.release()
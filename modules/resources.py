@@ -0,0 +1,245 @@
+import sys
+import traceback
+import moderngl
+
+# categories of the GPU resources
+BUFFERS = 'buffers'
+TEXTURES = 'textures'
+RENDERBUFFERS = 'renderbuffers'
+VERTEX_ARRAYS = 'vertex arrays'
+PROGRAMS = 'programs'
+FRAMEBUFFERS = 'framebuffers'
+SAMPLERS = 'samplers'
+CATEGORIES = (BUFFERS, TEXTURES, RENDERBUFFERS, VERTEX_ARRAYS, PROGRAMS, FRAMEBUFFERS, SAMPLERS)
+STACK_DEPTH = 6 # frames of the creation stack kept per resource
+# bytes per component
+DTYPE_SIZES = {'f1': 1, 'u1': 1, 'i1': 1, 'nu1': 1, 'ni1': 1,
+               'f2': 2, 'u2': 2, 'i2': 2, 'nu2': 2, 'ni2': 2,
+               'f4': 4, 'u4': 4, 'i4': 4}
+
+
+
+# GPU memory of a resource, in bytes, without the mipmaps and the padding of the driver
+def get_resource_size(resource) -> int:
+    if isinstance(resource, moderngl.Buffer):
+        return resource.size
+    if isinstance(resource, (moderngl.Texture, moderngl.Renderbuffer)):
+        texel_size = resource.components * DTYPE_SIZES.get(resource.dtype, 4)
+        return resource.width * resource.height * texel_size * max(resource.samples, 1)
+    if isinstance(resource, moderngl.TextureArray):
+        return resource.width * resource.height * resource.layers * resource.components * DTYPE_SIZES.get(resource.dtype, 4)
+    if isinstance(resource, moderngl.Texture3D):
+        return resource.width * resource.height * resource.depth * resource.components * DTYPE_SIZES.get(resource.dtype, 4)
+    if isinstance(resource, moderngl.TextureCube):
+        return 6 * resource.size[0] * resource.size[1] * resource.components * DTYPE_SIZES.get(resource.dtype, 4)
+    return 0
+
+def is_released(resource) -> bool:
+    return isinstance(resource.mglo, moderngl.InvalidObject)
+
+def format_size(size: int) -> str:
+    if size >= 2**20:
+        return f'{size / 2**20:.1f} MB'
+    if size >= 2**10:
+        return f'{size / 2**10:.1f} KB'
+    return f'{size} B'
+
+
+class TrackedResource:
+    """
+    A GPU resource and where it comes from : the class of the object that created it and the creation stack.
+    """
+    __slots__ = ('_resource', '_category', '_owner', '_stack')
+
+    def __init__(self, resource, category: str, owner: str, stack: traceback.StackSummary) -> None:
+        self._resource = resource
+        self._category = category
+        self._owner = owner
+        self._stack = stack
+
+    @property
+    def resource(self):
+        return self._resource
+
+    @property
+    def category(self) -> str:
+        return self._category
+
+    @property
+    def owner(self) -> str:
+        return self._owner
+
+    @property
+    def stack(self) -> traceback.StackSummary:
+        return self._stack
+
+    @property
+    def size(self) -> int:
+        return get_resource_size(self._resource)
+
+    @property
+    def released(self) -> bool:
+        return is_released(self._resource)
+
+
+class ResourceTracker:
+    """
+    Keeps a record of every GPU resource created through a TrackedContext, until it is released :
+    its category, its size, the object that created it and the creation stack.
+    Gives the memory in use per category, warns when it goes over a budget, and lists at the end the resources
+    that were never released, with where they were created.
+    A resource counts as released once its release() was called, which moderngl marks by invalidating it.
+    The queries are not tracked, moderngl can't release them.
+    """
+    def __init__(self, budget: int = None) -> None:
+        self._budget = budget # bytes, None for no budget
+        self._over_budget = False
+        self._resources: list[TrackedResource] = []
+
+    @property
+    def budget(self) -> int:
+        return self._budget
+
+    def set_budget(self, budget: int) -> None:
+        self._budget = budget
+        self._over_budget = False
+
+    # depth : frames between the caller of the context and this method
+    def add(self, resource, category: str, depth: int = 1) -> None:
+        frame = sys._getframe(depth)
+        self._resources.append(TrackedResource(resource, category, self.get_owner(frame), traceback.extract_stack(frame, limit = STACK_DEPTH)))
+        if self._budget:
+            self.check_budget()
+
+    # the class of the first method up the stack, the function name otherwise
+    def get_owner(self, frame) -> str:
+        name = frame.f_code.co_name
+        while frame:
+            owner = frame.f_locals.get('self')
+            if owner is not None and not isinstance(owner, TrackedContext):
+                return type(owner).__name__
+            frame = frame.f_back
+        return name
+
+    # the resources not released yet
+    def get_live_resources(self) -> list[TrackedResource]:
+        self._resources = [resource for resource in self._resources if not resource.released]
+        return self._resources
+
+    # category : (count, bytes)
+    def get_totals(self) -> dict[str, tuple[int, int]]:
+        totals = {category: (0, 0) for category in CATEGORIES}
+        for resource in self.get_live_resources():
+            count, size = totals[resource.category]
+            totals[resource.category] = (count + 1, size + resource.size)
+        return totals
+
+    def get_memory(self) -> int:
+        return sum(resource.size for resource in self.get_live_resources())
+
+    def check_budget(self) -> None:
+        memory = self.get_memory()
+        if memory > self._budget and not self._over_budget:
+            print(f'GPU memory over budget : {format_size(memory)} used, {format_size(self._budget)} allowed')
+            self.report()
+        # warns again the next time the budget is exceeded
+        self._over_budget = memory > self._budget
+
+    def report(self) -> None:
+        totals = self.get_totals()
+        print(f'GPU memory : {format_size(sum(size for count, size in totals.values()))}')
+        for category, (count, size) in totals.items():
+            if count:
+                print(f'  {category:<14} {count:5d} {format_size(size):>10}')
+
+    # called once everything was destroyed, returns the number of leaks
+    def report_leaks(self) -> int:
+        leaks = self.get_live_resources()
+        if leaks:
+            print(f'{len(leaks)} GPU resources not released, {format_size(sum(leak.size for leak in leaks))} :')
+            for leak in leaks:
+                print(f'  {leak.category[:-1]} of {leak.owner}, {format_size(leak.size)}, created at :')
+                print(''.join('    ' + line for line in traceback.format_list(leak.stack)), end = '')
+        return len(leaks)
+
+
+class TrackedContext:
+    """
+    Wraps a moderngl context so that the resources created through it are recorded in a ResourceTracker.
+    Everything else goes to the context.
+    """
+    __slots__ = ('_context', '_tracker')
+
+    def __init__(self, context: moderngl.Context, tracker: ResourceTracker) -> None:
+        object.__setattr__(self, '_context', context)
+        object.__setattr__(self, '_tracker', tracker)
+
+    @property
+    def context(self) -> moderngl.Context:
+        return self._context
+
+    @property
+    def tracker(self) -> ResourceTracker:
+        return self._tracker
+
+    def __getattr__(self, name: str):
+        return getattr(self._context, name)
+
+    # the state of the context : wireframe, viewport, blend_func...
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._context, name, value)
+
+    def track(self, resource, category: str):
+        # the caller of the method of the context that created the resource
+        self._tracker.add(resource, category, depth = 3)
+        return resource
+
+    def buffer(self, *args, **kwargs) -> moderngl.Buffer:
+        return self.track(self._context.buffer(*args, **kwargs), BUFFERS)
+
+    def texture(self, *args, **kwargs) -> moderngl.Texture:
+        return self.track(self._context.texture(*args, **kwargs), TEXTURES)
+
+    def depth_texture(self, *args, **kwargs) -> moderngl.Texture:
+        return self.track(self._context.depth_texture(*args, **kwargs), TEXTURES)
+
+    def texture_array(self, *args, **kwargs) -> moderngl.TextureArray:
+        return self.track(self._context.texture_array(*args, **kwargs), TEXTURES)
+
+    def texture3d(self, *args, **kwargs) -> moderngl.Texture3D:
+        return self.track(self._context.texture3d(*args, **kwargs), TEXTURES)
+
+    def texture_cube(self, *args, **kwargs) -> moderngl.TextureCube:
+        return self.track(self._context.texture_cube(*args, **kwargs), TEXTURES)
+
+    def renderbuffer(self, *args, **kwargs) -> moderngl.Renderbuffer:
+        return self.track(self._context.renderbuffer(*args, **kwargs), RENDERBUFFERS)
+
+    def depth_renderbuffer(self, *args, **kwargs) -> moderngl.Renderbuffer:
+        return self.track(self._context.depth_renderbuffer(*args, **kwargs), RENDERBUFFERS)
+
+    def vertex_array(self, *args, **kwargs) -> moderngl.VertexArray:
+        return self.track(self._context.vertex_array(*args, **kwargs), VERTEX_ARRAYS)
+
+    def simple_vertex_array(self, *args, **kwargs) -> moderngl.VertexArray:
+        return self.track(self._context.simple_vertex_array(*args, **kwargs), VERTEX_ARRAYS)
+
+    def program(self, *args, **kwargs) -> moderngl.Program:
+        return self.track(self._context.program(*args, **kwargs), PROGRAMS)
+
+    def compute_shader(self, *args, **kwargs) -> moderngl.ComputeShader:
+        return self.track(self._context.compute_shader(*args, **kwargs), PROGRAMS)
+
+    def framebuffer(self, *args, **kwargs) -> moderngl.Framebuffer:
+        return self.track(self._context.framebuffer(*args, **kwargs), FRAMEBUFFERS)
+
+    # the renderbuffers are tracked on their own, releasing the framebuffer doesn't release them
+    def simple_framebuffer(self, size: tuple[int, int], components: int = 4, samples: int = 0, dtype: str = 'f1') -> moderngl.Framebuffer:
+        color = self._context.renderbuffer(size, components, samples = samples, dtype = dtype)
+        depth = self._context.depth_renderbuffer(size, samples = samples)
+        self.track(color, RENDERBUFFERS)
+        self.track(depth, RENDERBUFFERS)
+        return self.track(self._context.framebuffer(color, depth), FRAMEBUFFERS)
+
+    def sampler(self, *args, **kwargs) -> moderngl.Sampler:
+        return self.track(self._context.sampler(*args, **kwargs), SAMPLERS)
@@ -1,16 +1,19 @@
-import moderngl
+import numpy as np
 import modules.glmath as glmath
+import modules.batchmath as batchmath
 from typing import Any
 from modules.light import Light
+from modules.particles import ParticleSystem, ParticleEmitter
 from modules.model import (
     Model, 
+    Material,
     CompanionCubeModel,
     TexturedCubeModel,
     WoodenBoxModel, 
     MetalBoxModel,
     GoldenBoxModel,
-    ColoredCubeModel, 
-    WireCubeModel)
+    ColoredCubeModel,
+    TeapotModel)
 
 
 
@@ -20,79 +23,149 @@ class Scene:
         self._gl_context = engine.gl_context
         self._camera = engine.camera
         self._light: Light = None
+        self._point_lights: list[Light] = []
         self._models: list[Model] = []
+        # simulated and drawn by the engine after the models
+        self._particle_systems: list[ParticleSystem] = []
+        # animated scenes change every frame, the engine never leaves them idle
+        self._animated = False
+        # (N, 4, 4) model matrices of the frame, prepared by the pipelined update
+        self._frame_matrices: np.ndarray = None
         
     @property
     def models(self) -> list[Model]:
         return self._models
     
+    @property
+    def animated(self) -> bool:
+        return self._animated or len(self._particle_systems) > 0
+    
+    @property
+    def particle_systems(self) -> list[ParticleSystem]:
+        return self._particle_systems
+    
     @property
     def light(self) -> Light:
         return self._light
     
+    @property
+    def point_lights(self) -> list[Light]:
+        return self._point_lights
+    
+    # every light of the scene, the main light first
+    @property
+    def lights(self) -> list[Light]:
+        if self._light:
+            return [self._light] + self._point_lights
+        return self._point_lights
+    
     def set_default_light(self) -> Light:
         return Light()
     
+    def set_frame_matrices(self, matrices: np.ndarray) -> None:
+        self._frame_matrices = matrices
+        
+    # model matrices of every model, as an (N, 4, 4) array laid out like glm
+    def get_model_matrices(self) -> np.ndarray:
+        if self._frame_matrices is not None and len(self._frame_matrices) == len(self._models):
+            return self._frame_matrices
+        if not self._models:
+            return np.zeros((0, 4, 4), dtype = 'f4')
+        return batchmath.from_glm([model.model_matrix for model in self._models])
+        
+    def set_animated(self, animated: bool) -> None:
+        self._animated = animated
+        
     def set_models(self, models: list[Model]) -> None:
         self._models = models
         
     def add_model(self, model: Model, shader_name: str) -> None:
         self._models.append((model, shader_name))
         
+    # kept by the model, its program may be shared with other models
     def load_uniform(self, model_index: int, attribute: str, data: Any) -> None:
-        shader_program = self._models[model_index].shader_program
-        if type(data) == float or type(data) == int:
-            shader_program[attribute] = (data) 
-        else:   
-            shader_program[attribute].write(data)
+        self._models[model_index].set_uniform(attribute, data)
             
+    # the programs built with STREAMING_UNIFORMS read the matrices from the streaming buffer instead
     def load_projection_matrices(self) -> None:
         for model in self._models:
             shader_program = model.shader_program
+            if shader_program.get('projection_matrix', None) is None:
+                continue
             shader_program['projection_matrix'].write(self._camera.projection_matrix)
     
     def load_view_matrices(self) -> None:
         for model in self._models:
             shader_program = model.shader_program
+            if shader_program.get('view_matrix', None) is None:
+                continue
             shader_program['view_matrix'].write(self._camera.view_matrix)
             
+    # Model.render writes its own matrix again, a program shared by several models only keeps the last one
     def load_model_matrices(self) -> None:
         for model in self._models:
             shader_program = model.shader_program
+            if shader_program.get('model_matrix', None) is None:
+                continue
             shader_program['model_matrix'].write(model.model_matrix)
         
+    # frustum culling against the bounding spheres of the models
+    def get_visible_models(self, view_projection_matrix: glmath.mat4x4f, models: list[Model] = None) -> list[Model]:
+        planes = glmath.frustum_planes(view_projection_matrix)
+        visible_models = []
+        for model in (self._models if models is None else models):
+            center, radius = model.get_bounding_sphere()
+            if glmath.sphere_in_frustum(planes, center, radius):
+                visible_models.append(model)
+        return visible_models
+        
     def set_light(self, light: Light) -> None:
         self._light = light
+        
+    # additional point lights, only the deferred and clustered pipelines take them into account
+    def add_point_light(self, light: Light) -> None:
+        self._point_lights.append(light)
+        
+    def add_particle_system(self, particle_system: ParticleSystem) -> None:
+        self._particle_systems.append(particle_system)
+        
+    # animations, called at the simulation rate of the engine (once per frame without one)
+    def update(self) -> None:
+        ...
     
     def render(self) -> None:
+        self.load_view_matrices()
         for model in self._models:
-            self.load_model_matrices()
-            self.load_view_matrices()
-            model.render(mode = moderngl.TRIANGLES)
+            model.render()
             
     def destroy(self) -> None:
         for model in self._models:
-            model.destroy()          
+            model.destroy()
+        for particle_system in self._particle_systems:
+            particle_system.destroy()
 
         
 class TestCube(Scene):
     def __init__(self, engine) -> None:
         super().__init__(engine)
         # model
-        self._models = [ColoredCubeModel(engine), WireCubeModel(engine)]
+        self._models = [ColoredCubeModel(engine)]
+        # edges drawn with the surface, in the same pass
+        self._models[0].set_wireframe(width = 3.0)
+        self._animated = True
+        # the step of the animation, built once
+        self._rotation = glmath.rotate(0.02, glmath.vec3f(0, 1, 0))
         # send transformation matrices to the CPU
         self.load_model_matrices()
         self.load_view_matrices()
         self.load_projection_matrices()
             
+    def update(self) -> None:
+        self._models[0].transform(self._rotation)
+            
     def render(self) -> None:
-        rotation = glmath.rotate(0.02, glmath.vec3f(0, 1, 0))
-        self._models[0].transform(rotation)
-        self._models[1].transform(rotation)
-        self.load_model_matrices()
         self.load_view_matrices()
         self._models[0].render()
-        self._models[1].render(moderngl.LINE_STRIP)
             
 
 class CompanionCube(Scene):
@@ -100,6 +173,9 @@ class CompanionCube(Scene):
         super().__init__(engine)
         # model
         self._models = [CompanionCubeModel(engine)]
+        self._animated = True
+        # the step of the animation, built once
+        self._rotation = glmath.rotate(0.02, glmath.vec3f(0, 1, 0))
         # light
         self._light = self.set_default_light()
         self.load_uniform(0, 'light.position', self.light._position)
@@ -107,7 +183,6 @@ class CompanionCube(Scene):
         self.load_uniform(0, 'light.ambient_intensity', self.light._ambient_intensity)
         self.load_uniform(0, 'light.diffuse_intensity', self.light._diffuse_intensity)
         self.load_uniform(0, 'light.specular_intensity', self.light._specular_intensity)
-        self.load_uniform(0, 'surface_brightness', self._models[0].material)
         # texture
         self.load_uniform(0, 'utexture', 0)
         # send transformation matrices to the CPU
@@ -115,11 +190,12 @@ class CompanionCube(Scene):
         self.load_view_matrices()
         self.load_projection_matrices()
         
+    def update(self) -> None:
+        for model in self._models:
+            model.transform(self._rotation)
+        
     def render(self) -> None:
-        rotation = glmath.rotate(0.02, glmath.vec3f(0, 1, 0))
         for model in self._models:
-            model.transform(rotation)
-            self.load_model_matrices()
             self.load_view_matrices()
             self.load_uniform(0, 'camera_position', self._engine.camera.position)
             model.render()
@@ -135,14 +211,17 @@ class TestingField(Scene):
                         MetalBoxModel(engine, position = (-3.5, 3.5, 0)),
                         TexturedCubeModel(engine, position = (0, 3.5, 0)),
                         TexturedCubeModel(engine, position = (3.5, 3.5, 0))]
+        self._animated = True
+        # the step of the animation, built once
+        self._rotation = glmath.rotate(0.02, glmath.vec3f(0, 1, 0))
         # light
         self._light = self.set_default_light()
         self._light.set_position((-5, 3, 9))
         # camera
         self._engine.camera.set_position((0, 2, 9))
-        # textures
-        self._models[4].material.set_default_material('pearl')
-        self._models[5].material.set_default_material('yellow_plastic')
+        # materials, the models write their own uniforms
+        self._models[4].set_material(Material(name = 'pearl'))
+        self._models[5].set_material(Material(name = 'yellow_plastic'))
         # uniforms
         for i in range(0, len(self._models)):
             self.load_uniform(i, 'light.position', self.light._position)
@@ -150,27 +229,108 @@ class TestingField(Scene):
             self.load_uniform(i, 'light.ambient_intensity', self.light._ambient_intensity)
             self.load_uniform(i, 'light.diffuse_intensity', self.light._diffuse_intensity)
             self.load_uniform(i, 'light.specular_intensity', self.light._specular_intensity)
-            self.load_uniform(i, 'material.surface_brightness', self._models[i].material.surface_brightness)
-            self.load_uniform(i, 'material.ambient_incidence', self._models[i].material.ambient_incidence)
-            self.load_uniform(i, 'material.diffuse_incidence', self._models[i].material.diffuse_incidence)
-            self.load_uniform(i, 'material.specular_incidence', self._models[i].material.specular_incidence)
             self.load_uniform(i, 'utexture', 0)
         # send transformation matrices to the CPU
         self.load_model_matrices()
         self.load_view_matrices()
         self.load_projection_matrices()
         
+    def update(self) -> None:
+        for model in self._models:
+            model.transform(self._rotation)
+        
     def render(self) -> None:
-        rotation = glmath.rotate(0.02, glmath.vec3f(0, 1, 0))
-        self.load_model_matrices()
         self.load_view_matrices()
         for i in range(0, len(self._models)):
-            self._models[i].transform(rotation)
             self.load_uniform(i, 'camera_position', self._engine.camera.position)
             self._models[i].render()
-            
 
 
+class ParticleFountain(TestingField):
+    def __init__(self, engine) -> None:
+        super().__init__(engine)
+        # a million particles, bouncing on the bottom of the boxes
+        emitter = ParticleEmitter(position = (0, 1.2, 0), direction = (0, 1, 0))
+        emitter.set_ground(-1.0)
+        self.add_particle_system(ParticleSystem(engine, emitter))
 
+
+# teapots further and further away, their patches are tessellated less and less
+class Teapots(Scene):
+    def __init__(self, engine) -> None:
+        super().__init__(engine)
+        # model
+        self._models = [TeapotModel(engine, position = (-3.0 + 3.0 * i, 0, -6.0 * i)) for i in range(5)]
+        for model in self._models:
+            model.set_material(Material(name = 'polished_silver'))
+        self._animated = True
+        # the step of the animation, built once, around the z up axis of the teapot data
+        self._rotation = glmath.rotate(0.01, glmath.vec3f(0, 0, 1))
+        # light
+        self._light = self.set_default_light()
+        self._light.set_position((-5, 6, 6))
+        # camera
+        self._engine.camera.set_position((0, 2, 8))
+        # uniforms
+        for i in range(0, len(self._models)):
+            self.load_uniform(i, 'light.position', self.light._position)
+            self.load_uniform(i, 'light.color', self.light._color)
+            self.load_uniform(i, 'light.ambient_intensity', self.light._ambient_intensity)
+            self.load_uniform(i, 'light.diffuse_intensity', self.light._diffuse_intensity)
+            self.load_uniform(i, 'light.specular_intensity', self.light._specular_intensity)
+        # send transformation matrices to the CPU
+        self.load_model_matrices()
+        self.load_view_matrices()
+        self.load_projection_matrices()
         
-        
\ No newline at end of file
+    def update(self) -> None:
+        for model in self._models:
+            model.transform(self._rotation)
+        
+    def render(self) -> None:
+        self.load_view_matrices()
+        for i in range(0, len(self._models)):
+            self.load_uniform(i, 'camera_position', self._engine.camera.position)
+            self._models[i].render()
+
+
+# a single cube shown under every material preset, for offline renders
+class MaterialTurntable(Scene):
+    def __init__(self, engine) -> None:
+        super().__init__(engine)
+        # model
+        self._models = [TexturedCubeModel(engine)]
+        self._angle = 0.0
+        # light
+        self._light = self.set_default_light()
+        self._light.set_position((-3, 3, 5))
+        # camera
+        self._engine.camera.set_position((0, 1.5, 4.5))
+        self._engine.camera.look_at((0, 0, 0))
+        # uniforms
+        self.load_uniform(0, 'light.position', self.light._position)
+        self.load_uniform(0, 'light.color', self.light._color)
+        self.load_uniform(0, 'light.ambient_intensity', self.light._ambient_intensity)
+        self.load_uniform(0, 'light.diffuse_intensity', self.light._diffuse_intensity)
+        self.load_uniform(0, 'light.specular_intensity', self.light._specular_intensity)
+        self.load_uniform(0, 'utexture', 0)
+        self.set_material('basic')
+        # send transformation matrices to the CPU
+        self.load_model_matrices()
+        self.load_view_matrices()
+        self.load_projection_matrices()
+        
+    # the lighting terms of the preset pick the permutation of the program
+    def set_material(self, name: str) -> None:
+        self._models[0].material.set_default_material(name)
+        self._models[0].update_shader_program()
+        
+    # angle in rad, around the vertical axis
+    def set_angle(self, angle: float) -> None:
+        self._models[0].transform(glmath.rotate(angle - self._angle, glmath.vec3f(0, 1, 0)))
+        self._angle = angle
+        
+    def render(self) -> None:
+        self.load_view_matrices()
+        self.load_uniform(0, 'camera_position', self._engine.camera.position)
+        self._models[0].render()
@@ -0,0 +1,115 @@
+import os
+import re
+import moderngl
+from typing import Any
+from modules.trace import tracer
+
+# feature flags, turned into #defines
+TEXTURING = 'TEXTURING'
+DIFFUSE = 'DIFFUSE'
+SPECULAR = 'SPECULAR'
+INSTANCING = 'INSTANCING'
+FOG = 'FOG'
+SHADOWS = 'SHADOWS'
+WIREFRAME = 'WIREFRAME'
+# the geometry stage added by WIREFRAME to shader_program_path
+WIREFRAME_STAGE = '{}_wireframe.geom'
+# extension of each stage, a path given without one gets every stage that exists
+STAGES = {'.vert': 'vertex_shader', '.frag': 'fragment_shader', '.geom': 'geometry_shader',
+          '.tesc': 'tess_control_shader', '.tese': 'tess_evaluation_shader'}
+INCLUDE = re.compile(r'^[ \t]*#include[ \t]+"([^"]+)"[ \t]*$', re.MULTILINE)
+
+
+
+class ShaderLibrary:
+    """
+    Builds the programs from shader sources with #include "file" lines and #define feature flags,
+    and keeps them : every permutation (stages, features, defines) is compiled once, the first time it is asked for,
+    then shared by everyone asking for it.
+    The includes are resolved relative to the including file, each file is only included once per stage.
+    The programs belong to the library, they are released by destroy and not by whoever uses them.
+    """
+    def __init__(self, context: moderngl.Context) -> None:
+        self._gl_context = context
+        self._sources: dict[str, str] = {}
+        self._programs: dict[tuple, moderngl.Program] = {}
+        # the last user of each program, whose uniforms it holds
+        self._users: dict[moderngl.Program, Any] = {}
+
+    @property
+    def programs(self) -> list[moderngl.Program]:
+        return list(self._programs.values())
+
+    def get_source(self, path: str) -> str:
+        if path not in self._sources:
+            with open(path) as file:
+                self._sources[path] = file.read()
+        return self._sources[path]
+
+    def resolve_includes(self, path: str, included: set[str] = None) -> str:
+        included = set() if included is None else included
+        included.add(os.path.normpath(path))
+        directory = os.path.dirname(path)
+
+        def include(match: re.Match) -> str:
+            include_path = os.path.normpath(os.path.join(directory, match.group(1)))
+            if include_path in included:
+                return ''
+            return self.resolve_includes(include_path, included)
+
+        return INCLUDE.sub(include, self.get_source(path))
+
+    # the #defines go right after the #version line
+    @staticmethod
+    def add_defines(source: str, defines: dict[str, Any]) -> str:
+        if not defines:
+            return source
+        lines = ''.join(f'#define {name} {value}\n' for name, value in defines.items())
+        version_end = source.index('\n', source.index('#version')) + 1
+        return source[:version_end] + lines + source[version_end:]
+
+    # shader_program_path.vert, .frag... or the single stage of a path with its extension
+    def get_stage_paths(self, paths: tuple[str, ...]) -> dict[str, str]:
+        stage_paths = {}
+        for path in paths:
+            extension = os.path.splitext(path)[1]
+            if extension in STAGES:
+                stage_paths[STAGES[extension]] = path
+                continue
+            for extension, stage in STAGES.items():
+                if os.path.exists(path + extension):
+                    stage_paths[stage] = path + extension
+        return stage_paths
+
+    def get_program(self, *paths: str, features: set[str] = (), defines: dict[str, Any] = None,
+                    varyings: tuple[str, ...] = ()) -> moderngl.Program:
+        defines = dict(defines) if defines else {}
+        for feature in features:
+            defines[feature] = 1
+        key = (paths, tuple(sorted(defines.items())), tuple(varyings))
+        program = self._programs.get(key)
+        if program is None:
+            stage_paths = self.get_stage_paths(paths)
+            if not stage_paths:
+                raise FileNotFoundError(f'no shader stage found for {", ".join(paths)}')
+            with tracer.zone(' + '.join(paths), 'asset'):
+                sources = {stage: self.add_defines(self.resolve_includes(path), defines) for stage, path in stage_paths.items()}
+                program = self._gl_context.program(**sources, varyings = varyings)
+            self._programs[key] = program
+        return program
+
+    # True when the program was last used by someone else, the uniforms of user have to be written again
+    def set_user(self, program: moderngl.Program, user) -> bool:
+        if self._users.get(program) is user:
+            return False
+        self._users[program] = user
+        return True
+
+    def get_user(self, program: moderngl.Program):
+        return self._users.get(program)
+
+    def destroy(self) -> None:
+        for program in self._programs.values():
+            program.release()
+        self._programs = {}
+        self._users = {}
@@ -0,0 +1,195 @@
+import moderngl
+import modules.glmath as glmath
+from modules.camera import FOV, NEAR
+from modules.light import Light
+
+SHADOW_MAP_SIZE = 2048 # per cascade
+MAX_CASCADES = 4 # must match texturedCube.frag
+TEXTURE_UNIT = 7 # after the model textures (0) and the cluster textures (4 to 6)
+SHADOW_DISTANCE = 40.0 # the directional cascades cover the view from NEAR to there
+CASCADE_SPLIT_LAMBDA = 0.6 # blend between logarithmic (1.0) and uniform (0.0) cascade splits
+CASTER_MARGIN = 50.0 # how far behind a cascade the casters are still taken into account
+
+
+
+class ShadowMap:
+    """
+    Shadows of the main light of a scene, for a spot light (perspective) or a directional light (orthographic cascades).
+    The static casters are rendered into a cached map, only updated when the light or the static models change.
+    Every frame the cache is copied into the final map and the dynamic casters are drawn on top of it.
+    The cascades follow the camera, but snapped to their texel grid : the cache keeps the matrix each of its cascades
+    was rendered with, and only renders again the ones whose snapped matrix changed, at the resolution of the cascade.
+    """
+    def __init__(self, engine, mode: str = 'spot', cascades: int = 1, size: int = SHADOW_MAP_SIZE) -> None:
+        if mode not in ('spot', 'directional'):
+            raise ValueError(f'Unsupported shadow mode : {mode}')
+        if mode == 'spot':
+            cascades = 1
+        if not 1 <= cascades <= MAX_CASCADES:
+            raise ValueError(f'The number of cascades must be between 1 and {MAX_CASCADES}')
+        self._engine = engine
+        self._gl_context = engine.gl_context
+        self._mode = mode
+        self._cascade_count = cascades
+        self._size = size
+        atlas_size = (size * cascades, size)
+        # cached static casters, an atlas laid out like the final one, read texel by texel
+        self._static_depth = self._gl_context.depth_texture(atlas_size)
+        self._static_depth.compare_func = ''
+        self._static_framebuffer = self._gl_context.framebuffer(depth_attachment = self._static_depth)
+        # static + dynamic casters, sampled by the models with hardware depth comparison
+        self._depth = self._gl_context.depth_texture(atlas_size)
+        self._depth.compare_func = '<='
+        self._depth.repeat_x = False
+        self._depth.repeat_y = False
+        self._framebuffer = self._gl_context.framebuffer(depth_attachment = self._depth)
+        # programs
+        self._depth_program = self.get_shader_program('shaders/shadow')
+        self._copy_program = self.get_shader_program('shaders/shadow_copy')
+        self._copy_program['static_shadow_map'] = 0
+        self._copy_vao = self._gl_context.vertex_array(self._copy_program, [])
+        self._light_matrices: list[glmath.mat4x4f] = []
+        # the light matrix each cascade of the cache was rendered with, None when it has to be rendered again
+        self._static_matrices: list[glmath.mat4x4f] = [None] * cascades
+        self._cascade_splits = [0.0] * MAX_CASCADES
+        self._static_signature = None
+
+    @property
+    def light_matrices(self) -> list[glmath.mat4x4f]:
+        return self._light_matrices
+
+    def get_shader_program(self, shader_program_path: str) -> moderngl.Program:
+        with open(f'{shader_program_path}.vert') as file:
+            vertex_shader = file.read()
+        with open(f'{shader_program_path}.frag') as file:
+            fragment_shader = file.read()
+        program = self._gl_context.program(vertex_shader = vertex_shader, fragment_shader = fragment_shader)
+        return program
+
+    @staticmethod
+    def get_up_vector(direction: glmath.vec3f) -> glmath.vec3f:
+        # lookAt degenerates when the light looks straight up or down
+        if abs(direction.y) > 0.99:
+            return glmath.vec3f(0, 0, 1)
+        return glmath.vec3f(0, 1, 0)
+
+    def get_spot_matrix(self, light: Light) -> glmath.mat4x4f:
+        direction = light.direction
+        projection = glmath.perspective(glmath.radians(light.spot_angle), 1.0, NEAR, light.radius)
+        view = glmath.lookAt(light.position, light.position + direction, self.get_up_vector(direction))
+        return projection * view
+
+    def get_cascade_matrices(self, light: Light) -> list[glmath.mat4x4f]:
+        camera = self._engine.camera
+        direction = light.direction
+        up = self.get_up_vector(direction)
+        far = SHADOW_DISTANCE
+        # practical split scheme, Zhang et al., "Parallel-Split Shadow Maps"
+        splits = [NEAR]
+        for i in range(1, self._cascade_count + 1):
+            logarithmic = NEAR * (far / NEAR) ** (i / self._cascade_count)
+            uniform = NEAR + (far - NEAR) * i / self._cascade_count
+            splits.append(CASCADE_SPLIT_LAMBDA * logarithmic + (1 - CASCADE_SPLIT_LAMBDA) * uniform)
+        self._cascade_splits = splits[1:] + [far] * (MAX_CASCADES - self._cascade_count)
+        # rays from the camera through the corners of the screen
+        tan_y = glmath.tan(glmath.radians(FOV) / 2)
+        tan_x = tan_y * camera.aspect_ratio
+        inverse_view = glmath.inverse(camera.view_matrix)
+        corners = [glmath.vec3f(inverse_view * glmath.vec4f(x * tan_x, y * tan_y, -1, 0)) for x in (-1, 1) for y in (-1, 1)]
+        # the orientation of the light, to snap the cascades to its texels
+        light_rotation = glmath.lookAt(glmath.vec3f(0), direction, up)
+        inverse_light_rotation = glmath.inverse(light_rotation)
+        matrices = []
+        for near_depth, far_depth in zip(splits[:-1], splits[1:]):
+            points = [camera.position + corner * depth for corner in corners for depth in (near_depth, far_depth)]
+            center = sum(points, glmath.vec3f(0)) / len(points)
+            # the bounding sphere doesn't change size when the camera turns, so the shadows don't shimmer
+            radius = max(glmath.length(point - center) for point in points)
+            radius = glmath.ceil(radius * 16) / 16
+            texel = 2 * radius / self._size
+            light_space_center = glmath.vec3f(light_rotation * glmath.vec4f(center, 1))
+            # along the light too, so that the matrix stays the same until the cascade moves by a texel
+            light_space_center.x = glmath.floor(light_space_center.x / texel) * texel
+            light_space_center.y = glmath.floor(light_space_center.y / texel) * texel
+            light_space_center.z = glmath.floor(light_space_center.z / texel) * texel
+            center = glmath.vec3f(inverse_light_rotation * glmath.vec4f(light_space_center, 1))
+            eye = center - direction * (radius + CASTER_MARGIN)
+            projection = glmath.ortho(-radius, radius, -radius, radius, 0.0, 2 * radius + CASTER_MARGIN)
+            matrices.append(projection * glmath.lookAt(eye, center, up))
+        return matrices
+
+    # casters : the models to draw with each light matrix, side by side
+    def render_casters(self, light_matrices: list[glmath.mat4x4f], casters: list[list]) -> None:
+        for cascade, (light_matrix, models) in enumerate(zip(light_matrices, casters)):
+            self._gl_context.viewport = (cascade * self._size, 0, self._size, self._size)
+            self._depth_program['light_matrix'].write(light_matrix)
+            for model in models:
+                # the depth program doesn't tessellate the patches
+                if model.mode == moderngl.PATCHES:
+                    continue
+                self._depth_program['model_matrix'].write(model.model_matrix)
+                model.get_pass_vao(self._depth_program).render(moderngl.TRIANGLES)
+
+    def update(self, scene) -> None:
+        light = scene.light
+        if light is None:
+            return
+        if self._mode == 'spot':
+            self._light_matrices = [self.get_spot_matrix(light)]
+            self._cascade_splits = [light.radius] * MAX_CASCADES
+        else:
+            self._light_matrices = self.get_cascade_matrices(light)
+        # the scene's culling, from the point of view of the light
+        static_models = [model for model in scene.models if model.static]
+        dynamic_models = [model for model in scene.models if not model.static]
+        # every cascade of the cache is rendered again when the light or the static models change,
+        # otherwise only the ones that moved by a texel or more with the camera
+        signature = (id(light), light.version, tuple((id(model), model.version) for model in static_models))
+        if signature != self._static_signature:
+            self._static_matrices = [None] * self._cascade_count
+            self._static_signature = signature
+        outdated = [light_matrix != static_matrix for light_matrix, static_matrix in zip(self._light_matrices, self._static_matrices)]
+        self._gl_context.disable(moderngl.CULL_FACE)
+        if any(outdated):
+            self._static_framebuffer.use()
+            for cascade in range(self._cascade_count):
+                if outdated[cascade]:
+                    self._static_framebuffer.clear(depth = 1.0, viewport = (cascade * self._size, 0, self._size, self._size))
+            self.render_casters(self._light_matrices, [scene.get_visible_models(light_matrix, static_models) if outdated[cascade] else []
+                                                       for cascade, light_matrix in enumerate(self._light_matrices)])
+            self._static_matrices = list(self._light_matrices)
+        # static casters, then the dynamic ones on top
+        self._framebuffer.use()
+        self._gl_context.viewport = (0, 0, self._size * self._cascade_count, self._size)
+        self._static_depth.use(location = 0)
+        self._gl_context.depth_func = '1' # always pass, the copy writes every texel
+        self._copy_vao.render(moderngl.TRIANGLES, vertices = 3)
+        self._gl_context.depth_func = '<'
+        self.render_casters(self._light_matrices, [scene.get_visible_models(light_matrix, dynamic_models) for light_matrix in self._light_matrices])
+        # back to the screen
+        self._engine.framebuffer.use()
+        if self._engine.cull_face:
+            self._gl_context.enable(moderngl.CULL_FACE)
+        self.load_uniforms(scene)
+
+    def load_uniforms(self, scene) -> None:
+        self._depth.use(location = TEXTURE_UNIT)
+        light_matrices = self._light_matrices + [self._light_matrices[-1]] * (MAX_CASCADES - len(self._light_matrices))
+        for model in scene.models:
+            program = model.shader_program
+            # only the programs built with SHADOWS sample the shadow map
+            if program.get('shadow_map', None) is None:
+                continue
+            program['shadow_map'] = TEXTURE_UNIT
+            program['cascade_count'] = self._cascade_count
+            program['cascade_splits'] = tuple(self._cascade_splits[:MAX_CASCADES])
+            program['light_matrices'].write(b''.join(light_matrix.to_bytes() for light_matrix in light_matrices))
+
+    def destroy(self) -> None:
+        self._copy_vao.release()
+        self._copy_program.release()
+        self._depth_program.release()
+        self._static_framebuffer.release()
+        self._static_depth.release()
+        self._framebuffer.release()
+        self._depth.release()
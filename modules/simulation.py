@@ -0,0 +1,84 @@
+import weakref
+import modules.glmath as glmath
+
+SIMULATION_RATE = 60 # updates per second, the speed the animations of the scenes were written for
+MAX_STEPS = 5 # updates per frame at most, the time the simulation can't catch up with is dropped
+
+
+
+class FixedTimestep:
+    """
+    Runs the updates of the scenes at a fixed rate, whatever the frame rate : the duration of the frames adds up
+    in an accumulator, and Scene.update runs once per full step it holds, MAX_STEPS at most.
+    The frame shows the models between the last two steps, at the fraction of a step left in the accumulator,
+    so the motion stays smooth when the frame rate and the simulation rate differ.
+    """
+    def __init__(self, rate: float = SIMULATION_RATE, max_steps: int = MAX_STEPS) -> None:
+        self._step = 1000 / rate # ms
+        self._max_steps = max_steps
+        self._accumulator = 0.0
+        self._alpha = 1.0 # fraction of a step between the previous and the current state shown
+        self._steps = 0 # steps run since the start
+        # model : model matrix before the last step, and the version of the model it was copied at
+        # only the models that moved are copied again, the models of a static scene cost nothing per frame
+        self._previous_matrices: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._previous_versions: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    @property
+    def step(self) -> float:
+        return self._step
+
+    @property
+    def alpha(self) -> float:
+        return self._alpha
+
+    @property
+    def steps(self) -> int:
+        return self._steps
+
+    # delta_time in ms, returns the number of steps run
+    def advance(self, scenes: list, delta_time: float) -> int:
+        self._accumulator += delta_time
+        step_count = min(int(self._accumulator // self._step), self._max_steps)
+        for i in range(step_count):
+            if i == step_count - 1:
+                # the state the frame interpolates from
+                self.save_previous_matrices(scenes)
+            for scene in scenes:
+                scene.update()
+        self._accumulator -= step_count * self._step
+        if self._accumulator >= self._step:
+            # too far behind, slows the simulation down instead of spiraling
+            self._accumulator = self._accumulator % self._step
+        self._alpha = self._accumulator / self._step
+        self._steps += step_count
+        return step_count
+
+    def save_previous_matrices(self, scenes: list) -> None:
+        for scene in scenes:
+            for model in scene.models:
+                if self._previous_versions.get(model) != model.version:
+                    self._previous_matrices[model] = model.get_matrix_copy()
+                    self._previous_versions[model] = model.version
+
+    # whether the model moved during the last step
+    def is_moving(self, model) -> bool:
+        return model in self._previous_versions and self._previous_versions[model] != model.version
+
+    # the matrices of the models of a scene for the frame, between the last two steps
+    def get_frame_matrices(self, scene) -> list[glmath.mat4x4f]:
+        matrices = []
+        for model in scene.models:
+            if self.is_moving(model):
+                matrices.append(glmath.interpolate_transform(self._previous_matrices[model], model.get_matrix_copy(), self._alpha))
+            else:
+                matrices.append(model.get_matrix_copy())
+        return matrices
+
+    # sets the frame matrices of the models of a scene, the models that didn't move render from their own matrix
+    def apply_frame_matrices(self, scene) -> None:
+        for model in scene.models:
+            if self.is_moving(model):
+                model.set_frame_matrix(glmath.interpolate_transform(self._previous_matrices[model], model.get_matrix_copy(), self._alpha))
+            else:
+                model.set_frame_matrix(None)
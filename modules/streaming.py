@@ -0,0 +1,179 @@
+import moderngl
+import numpy as np
+from modules.trace import tracer
+
+FRAME_COUNT = 3 # partitions of the buffer, a frame only writes into its own
+PARTITION_SIZE = 1 << 20 # bytes per frame, grows when a frame needs more
+FRAME_DATA_SIZE = 144 # std140 FrameData : projection matrix, view matrix, camera position
+MODEL_DATA_SIZE = 64 # std140 ModelData : model matrix
+FRAME_BINDING = 0 # uniform block bindings, must match the STREAMING_UNIFORMS blocks of the shaders
+MODEL_BINDING = 1
+
+
+
+class StreamingBuffer:
+    """
+    Ring buffer for the data that changes every frame : a single buffer split into FRAME_COUNT partitions.
+    The data of a frame is sub-allocated in a CPU side copy of its partition and sent in bulk by flush,
+    instead of a small upload per uniform.
+    A partition is only written again once the GPU is done with the frame that used it.
+    moderngl has no fence sync, an empty timer query issued at the end of the frame stands in for it :
+    its result is only available once the GPU went past every command of the frame.
+    The offsets handed out are relative to the partition of the current frame, get_offset turns them into buffer offsets.
+    """
+    def __init__(self, context: moderngl.Context, partition_size: int = PARTITION_SIZE, frame_count: int = FRAME_COUNT) -> None:
+        self._gl_context = context
+        self._frame_count = frame_count
+        self._partition_size = partition_size
+        self._alignment = context.info['GL_UNIFORM_BUFFER_OFFSET_ALIGNMENT']
+        self._buffer = context.buffer(reserve = partition_size * frame_count, dynamic = True)
+        self._staging = np.zeros(partition_size, dtype = 'u1')
+        self._partition = 0
+        self._used = 0 # bytes allocated in the current partition
+        self._flushed = 0 # bytes of the current partition already sent
+        self._fences: list[moderngl.Query] = [None] * frame_count
+        self._free_fences: list[moderngl.Query] = []
+        self._uploads = 0 # buffer writes of the last frame
+
+    @property
+    def buffer(self) -> moderngl.Buffer:
+        return self._buffer
+
+    @property
+    def alignment(self) -> int:
+        return self._alignment
+
+    @property
+    def uploads(self) -> int:
+        return self._uploads
+
+    def get_offset(self, offset: int) -> int:
+        return self._partition * self._partition_size + offset
+
+    def begin_frame(self) -> None:
+        self._partition = (self._partition + 1) % self._frame_count
+        fence = self._fences[self._partition]
+        if fence is not None:
+            # waits for the GPU to be done with the frame that used the partition, FRAME_COUNT frames ago
+            fence.elapsed
+            self._free_fences.append(fence)
+            self._fences[self._partition] = None
+        self._used = 0
+        self._flushed = 0
+        self._uploads = 0
+
+    def end_frame(self) -> None:
+        self.flush()
+        fence = self._free_fences.pop() if self._free_fences else self._gl_context.query(time = True)
+        with fence:
+            pass
+        self._fences[self._partition] = fence
+
+    def grow(self, size: int) -> None:
+        while self._partition_size < size:
+            self._partition_size *= 2
+        staging = np.zeros(self._partition_size, dtype = 'u1')
+        staging[:self._used] = self._staging[:self._used]
+        self._staging = staging
+        # the storage still read by the frames in flight is left to the driver, the fences don't apply to the new one
+        self._buffer.orphan(self._partition_size * self._frame_count)
+        self._fences = [None] * self._frame_count
+        if self._flushed:
+            self._buffer.write(self._staging[:self._flushed], offset = self.get_offset(0))
+            self._uploads += 1
+
+    # returns the offset of size bytes in the current partition
+    def allocate(self, size: int, alignment: int = None) -> int:
+        alignment = alignment or self._alignment
+        offset = (self._used + alignment - 1) // alignment * alignment
+        if offset + size > self._partition_size:
+            self.grow(offset + size)
+        self._used = offset + size
+        return offset
+
+    def write(self, data: bytes | np.ndarray, alignment: int = None) -> int:
+        data = np.frombuffer(data, dtype = 'u1') if isinstance(data, bytes) else data.view('u1').reshape(-1)
+        offset = self.allocate(len(data), alignment)
+        self._staging[offset:offset + len(data)] = data
+        return offset
+
+    # sends everything allocated since the last flush in a single write
+    def flush(self) -> None:
+        if self._used == self._flushed:
+            return
+        with tracer.zone('streaming buffer', 'upload'):
+            self._buffer.write(self._staging[self._flushed:self._used], offset = self.get_offset(self._flushed))
+        self._flushed = self._used
+        self._uploads += 1
+
+    def bind_to_uniform_block(self, offset: int, size: int, binding: int) -> None:
+        self._buffer.bind_to_uniform_block(binding, offset = self.get_offset(offset), size = size)
+
+    def destroy(self) -> None:
+        self._buffer.release()
+
+
+class StreamingRenderer:
+    """
+    Renders the models of a scene with the camera and the model matrices taken from the streaming buffer :
+    they are packed in a single upload per scene, each draw only binds its range of the buffer.
+    The programs built with STREAMING_UNIFORMS read them from uniform blocks, the others still get them as uniforms.
+    """
+    def __init__(self, engine) -> None:
+        self._engine = engine
+        self._gl_context = engine.gl_context
+        self._buffer = StreamingBuffer(self._gl_context)
+        self._prepared_programs: dict[moderngl.Program, bool] = {}
+
+    @property
+    def buffer(self) -> StreamingBuffer:
+        return self._buffer
+
+    def begin_frame(self) -> None:
+        self._buffer.begin_frame()
+
+    def end_frame(self) -> None:
+        self._buffer.end_frame()
+
+    # True when the program reads the streamed blocks
+    def prepare_program(self, program: moderngl.Program) -> bool:
+        if program not in self._prepared_programs:
+            streamed = program.get('ModelData', None) is not None
+            if streamed:
+                program['ModelData'].binding = MODEL_BINDING
+                if program.get('FrameData', None) is not None:
+                    program['FrameData'].binding = FRAME_BINDING
+            self._prepared_programs[program] = streamed
+        return self._prepared_programs[program]
+
+    def render(self, scene) -> None:
+        camera = self._engine.camera
+        models = scene.models
+        # camera
+        frame_data = np.zeros(FRAME_DATA_SIZE // 4, dtype = 'f4')
+        frame_data[:16] = np.frombuffer(camera.projection_matrix.to_bytes(), dtype = 'f4')
+        frame_data[16:32] = np.frombuffer(camera.view_matrix.to_bytes(), dtype = 'f4')
+        frame_data[32:35] = camera.position
+        frame_offset = self._buffer.write(frame_data)
+        # model matrices, every one at the start of an aligned slot
+        stride = (MODEL_DATA_SIZE + self._buffer.alignment - 1) // self._buffer.alignment * self._buffer.alignment
+        model_data = np.zeros((len(models), stride // 4), dtype = 'f4')
+        if models:
+            model_data[:, :16] = scene.get_model_matrices().reshape(-1, 16)
+        models_offset = self._buffer.write(model_data)
+        self._buffer.flush()
+        self._buffer.bind_to_uniform_block(frame_offset, FRAME_DATA_SIZE, FRAME_BINDING)
+        for i, model in enumerate(models):
+            if not model.visible:
+                continue
+            program = model.shader_program
+            if self.prepare_program(program):
+                self._buffer.bind_to_uniform_block(models_offset + i * stride, MODEL_DATA_SIZE, MODEL_BINDING)
+            else:
+                program['projection_matrix'].write(camera.projection_matrix)
+                program['view_matrix'].write(camera.view_matrix)
+                program['model_matrix'].write(model.model_matrix)
+            model.render()
+
+    def destroy(self) -> None:
+        self._buffer.destroy()
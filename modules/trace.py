@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import threading
+import moderngl
+
+TRACE_FRAMES = 120 # frames recorded by a capture started with the hotkey
+CPU_PROCESS = 1 # trace process ids, the GPU gets its own track
+GPU_PROCESS = 2
+UNAVAILABLE_RESULT = 0xffffffff
+
+
+
+class Zone:
+    """
+    A traced span of CPU time, recorded when it exits. With a GL context, a timer query measures the GPU time
+    of the commands issued inside it, OpenGL only times one span at a time so the nested GPU zones are left untimed,
+    as are the ones inside of a time query of the engine (Tracer.set_external_query).
+    """
+    __slots__ = ('_tracer', '_name', '_category', '_start', '_query')
+
+    def __init__(self, tracer: 'Tracer', name: str, category: str, gpu: bool) -> None:
+        self._tracer = tracer
+        self._name = name
+        self._category = category
+        self._query: moderngl.Query = tracer.begin_gpu_query() if gpu else None
+        self._start = time.perf_counter_ns()
+
+    def __enter__(self) -> 'Zone':
+        return self
+
+    def __exit__(self, *exception) -> None:
+        end = time.perf_counter_ns()
+        if self._query:
+            self._tracer.end_gpu_query(self._query, self._name, self._category, self._start)
+        self._tracer.add_event(self._name, self._category, self._start, end)
+
+
+class NullZone:
+    __slots__ = ()
+
+    def __enter__(self) -> 'NullZone':
+        return self
+
+    def __exit__(self, *exception) -> None:
+        pass
+
+
+NULL_ZONE = NullZone()
+
+
+class Tracer:
+    """
+    Records begin / end events of the engine stages, draws, uploads and asset loads for a number of frames,
+    and writes them in the Chrome trace event format, to open in Perfetto (ui.perfetto.dev) or chrome://tracing.
+    Off a capture, zone() hands out the same empty context manager : the instrumentation stays in the code for good.
+    The events are kept as tuples and only turned into JSON once the capture is over.
+    The GPU times come from timer queries read at the end of the capture, moderngl has no timestamp queries :
+    a GPU span is placed on its own track, starting when its commands were issued on the CPU, or when the previous
+    one ended if the GPU was behind.
+    """
+    def __init__(self) -> None:
+        self._recording = False
+        self._frames_left = 0
+        self._frame = 0
+        self._path: str = None
+        self._gl_context: moderngl.Context = None
+        self._events: list[tuple[str, str, int, int, int]] = [] # name, category, start, end (ns), thread
+        self._gpu_events: list[tuple[str, str, int, moderngl.Query]] = [] # name, category, cpu start (ns), query
+        self._counters: list[tuple[str, int, dict[str, float]]] = [] # name, time (ns), values
+        self._free_queries: list[moderngl.Query] = []
+        self._gpu_query_active = False
+        # a time query of the engine itself is open (e.g. the frame timer of the dynamic resolution)
+        self._external_query_active = False
+        self._thread_names: dict[int, str] = {}
+
+    @property
+    def recording(self) -> bool:
+        return self._recording
+
+    # records the next frames into path, with GPU times when a GL context is given
+    def start(self, frames: int = TRACE_FRAMES, path: str = None, context: moderngl.Context = None) -> None:
+        if self._recording:
+            return
+        self._recording = True
+        self._frames_left = frames
+        self._frame = 0
+        self._path = path if path else time.strftime('captures/trace_%Y%m%d_%H%M%S.json')
+        self._gl_context = context
+        self._events = []
+        self._gpu_events = []
+        self._counters = []
+        self._thread_names = {}
+
+    def zone(self, name: str, category: str = 'engine') -> Zone | NullZone:
+        if not self._recording:
+            return NULL_ZONE
+        return Zone(self, name, category, False)
+
+    # a zone also timed on the GPU, for the stages that issue GL commands
+    def gpu_zone(self, name: str, category: str = 'engine') -> Zone | NullZone:
+        if not self._recording:
+            return NULL_ZONE
+        timed = self._gl_context is not None and not self._gpu_query_active and not self._external_query_active
+        return Zone(self, name, category, timed)
+
+    # OpenGL doesn't nest the time queries, the GPU zones are only traced on the CPU while an other one is open
+    def set_external_query(self, active: bool) -> None:
+        self._external_query_active = active
+
+    def add_event(self, name: str, category: str, start: int, end: int) -> None:
+        # a zone still open when the capture ended
+        if not self._recording:
+            return
+        thread = threading.get_ident()
+        if thread not in self._thread_names:
+            self._thread_names[thread] = threading.current_thread().name
+        self._events.append((name, category, start, end, thread))
+
+    # values plotted over the capture, e.g. the memory in use per category
+    def add_counter(self, name: str, values: dict[str, float]) -> None:
+        if not self._recording:
+            return
+        self._counters.append((name, time.perf_counter_ns(), values))
+
+    def begin_gpu_query(self) -> moderngl.Query:
+        query = self._free_queries.pop() if self._free_queries else self._gl_context.query(time = True)
+        query.mglo.begin()
+        self._gpu_query_active = True
+        return query
+
+    def end_gpu_query(self, query: moderngl.Query, name: str, category: str, start: int) -> None:
+        query.mglo.end()
+        self._gpu_query_active = False
+        if self._recording:
+            self._gpu_events.append((name, category, start, query))
+        else:
+            self._free_queries.append(query)
+
+    # called once the frame is presented, writes the capture after its last frame
+    def end_frame(self) -> None:
+        if not self._recording:
+            return
+        self._frame += 1
+        self._frames_left -= 1
+        if self._frames_left <= 0:
+            self.stop()
+
+    def stop(self) -> None:
+        if not self._recording:
+            return
+        self._recording = False
+        self.write(self._path)
+        print(f'trace of {self._frame} frames written to {self._path}')
+
+    def get_trace_events(self) -> list[dict]:
+        origin = min([event[2] for event in self._events] + [event[2] for event in self._gpu_events] + [counter[1] for counter in self._counters], default = 0)
+        thread_ids = {thread: i + 1 for i, thread in enumerate(self._thread_names)}
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': CPU_PROCESS, 'args': {'name': 'CPU'}},
+                  {'name': 'process_name', 'ph': 'M', 'pid': GPU_PROCESS, 'args': {'name': 'GPU'}},
+                  {'name': 'thread_name', 'ph': 'M', 'pid': GPU_PROCESS, 'tid': 0, 'args': {'name': 'GPU'}}]
+        for thread, name in self._thread_names.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': CPU_PROCESS, 'tid': thread_ids[thread], 'args': {'name': name}})
+        for name, category, start, end, thread in self._events:
+            events.append({'name': name, 'cat': category, 'ph': 'X', 'pid': CPU_PROCESS, 'tid': thread_ids[thread],
+                           'ts': (start - origin) / 1000, 'dur': (end - start) / 1000})
+        for name, timestamp, values in self._counters:
+            events.append({'name': name, 'ph': 'C', 'pid': CPU_PROCESS, 'ts': (timestamp - origin) / 1000, 'args': values})
+        gpu_end = 0
+        for name, category, start, query in self._gpu_events:
+            # blocks until the GPU is done with the span, the capture is over anyway
+            duration = query.elapsed
+            self._free_queries.append(query)
+            # some drivers report an unavailable result as all ones
+            if duration >= UNAVAILABLE_RESULT:
+                continue
+            gpu_start = max(start - origin, gpu_end)
+            gpu_end = gpu_start + duration
+            events.append({'name': name, 'cat': category, 'ph': 'X', 'pid': GPU_PROCESS, 'tid': 0,
+                           'ts': gpu_start / 1000, 'dur': duration / 1000})
+        return events
+
+    def write(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': self.get_trace_events(), 'displayTimeUnit': 'ms'}, file)
+        self._events = []
+        self._gpu_events = []
+        self._counters = []
+
+    # moderngl has no release for the queries, they go with the context
+    def destroy(self) -> None:
+        self._free_queries = []
+
+
+# shared by every module, the engine starts and ends the captures
+tracer = Tracer()
@@ -0,0 +1,38 @@
+//FRAGMENT SHADER
+#version 410 core
+
+in vec2 vtexcoord;
+in vec3 vnormal;
+in vec3 vfragment_position;
+
+#ifdef TEXTURING
+uniform sampler2D utexture;
+#endif
+
+#include "include/camera.glsl"
+#include "include/lighting.glsl"
+#include "include/fog.glsl"
+#include "include/wireframe.glsl"
+
+out vec4 fragColor;
+
+
+void
+main() {
+#ifdef TEXTURING
+    vec3 albedo = texture(utexture, vtexcoord).rgb;
+#else
+    vec3 albedo = vec3(1.0);
+#endif
+    vec3 color = getLight(albedo);
+#ifdef CLUSTERED_LIGHTING
+    color += getPointLights(albedo);
+#endif
+#ifdef FOG
+    color = applyFog(color, length(camera_position - vfragment_position));
+#endif
+#ifdef WIREFRAME
+    color = applyWireframe(color);
+#endif
+    fragColor = vec4(color, 1.0);
+}
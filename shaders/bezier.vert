@@ -0,0 +1,31 @@
+//VERTEX SHADER
+#version 410 core
+
+in vec3 in_position;
+
+#ifdef INSTANCING
+// per instance transform, relative to the model
+in mat4 in_instance_matrix;
+#endif
+
+#ifdef STREAMING_UNIFORMS
+// per model data, sub-allocated in the streaming buffer of the engine
+layout (std140) uniform ModelData {
+    mat4 model_matrix;
+};
+#else
+uniform mat4 model_matrix;
+#endif
+
+// the tessellation stages work on the control points in world space
+out vec3 vcontrol_point;
+
+
+void
+main() {
+    mat4 world_matrix = model_matrix;
+#ifdef INSTANCING
+    world_matrix = model_matrix * in_instance_matrix;
+#endif
+    vcontrol_point = vec3(world_matrix * vec4(in_position, 1.0));
+}
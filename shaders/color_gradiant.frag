@@ -3,9 +3,15 @@
 
 in vec4 vcolor;
 
+#include "include/wireframe.glsl"
+
 out vec4 fragColor;
 
 void
 main() {
+#ifdef WIREFRAME
+    fragColor = vec4(applyWireframe(vcolor.rgb), vcolor.a);
+#else
     fragColor = vcolor;
+#endif
 }
\ No newline at end of file
@@ -9,10 +9,20 @@ uniform mat4 projection_matrix;
 uniform mat4 view_matrix;
 uniform mat4 model_matrix;
 
+#ifdef WIREFRAME
+// the wireframe geometry shader sits in between, it passes it on to the fragment shader under its name
+#define vcolor wcolor
+// 1 when the edge opposite of the vertex is the diagonal of a quad, left out of the wireframe
+in float in_hidden_edge;
+out float whidden_edge;
+#endif
 out vec4 vcolor;
 
 void
 main() {
     vcolor = vec4(in_color, 1.0);
+#ifdef WIREFRAME
+    whidden_edge = in_hidden_edge;
+#endif
     gl_Position = projection_matrix * view_matrix * model_matrix * vec4(in_position, 1.0);
 }
\ No newline at end of file
@@ -0,0 +1,42 @@
+//FRAGMENT SHADER
+#version 410 core
+
+struct Material {
+    float surface_brightness;
+    vec3 ambient_incidence;
+    vec3 diffuse_incidence;
+    vec3 specular_incidence;
+};
+
+uniform sampler2D galbedo;
+uniform sampler2D gnormal_material;
+uniform sampler2D gdepth;
+// sum of the ambient contributions of every light : ambient light doesn't depend on the position of the light
+uniform vec3 ambient_light;
+// one row per material : (ambient, surface brightness), (diffuse, -), (specular, -)
+uniform sampler2D materials;
+
+out vec4 fragColor;
+
+
+Material
+getMaterial(float material_id) {
+    int row = int(material_id + 0.5);
+    vec4 ambient_brightness = texelFetch(materials, ivec2(0, row), 0);
+    return Material(ambient_brightness.w, ambient_brightness.rgb,
+                    texelFetch(materials, ivec2(1, row), 0).rgb,
+                    texelFetch(materials, ivec2(2, row), 0).rgb);
+}
+
+
+void
+main() {
+    ivec2 texel = ivec2(gl_FragCoord.xy);
+    // nothing was drawn there, keep the background
+    if (texelFetch(gdepth, texel, 0).r == 1.0) {
+        discard;
+    }
+    vec3 albedo = texelFetch(galbedo, texel, 0).rgb;
+    Material material = getMaterial(texelFetch(gnormal_material, texel, 0).w);
+    fragColor = vec4(albedo * ambient_light * material.ambient_incidence, 1.0);
+}
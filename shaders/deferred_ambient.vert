@@ -0,0 +1,9 @@
+//VERTEX SHADER
+#version 410 core
+
+// full screen triangle, no vertex buffer needed
+void
+main() {
+    vec2 position = vec2((gl_VertexID << 1) & 2, gl_VertexID & 2);
+    gl_Position = vec4(position * 2.0 - 1.0, 0.0, 1.0);
+}
@@ -0,0 +1,72 @@
+//FRAGMENT SHADER
+#version 410 core
+
+struct Material {
+    float surface_brightness;
+    vec3 ambient_incidence;
+    vec3 diffuse_incidence;
+    vec3 specular_incidence;
+};
+
+flat in vec3 vlight_position;
+flat in float vlight_radius;
+flat in vec3 vlight_diffuse;
+flat in vec3 vlight_specular;
+
+uniform sampler2D galbedo;
+uniform sampler2D gnormal_material;
+uniform sampler2D gdepth;
+uniform mat4 inverse_view_projection;
+uniform vec3 camera_position;
+uniform vec2 render_size;
+// one row per material : (ambient, surface brightness), (diffuse, -), (specular, -)
+uniform sampler2D materials;
+
+out vec4 fragColor;
+
+
+Material
+getMaterial(float material_id) {
+    int row = int(material_id + 0.5);
+    vec4 ambient_brightness = texelFetch(materials, ivec2(0, row), 0);
+    return Material(ambient_brightness.w, ambient_brightness.rgb,
+                    texelFetch(materials, ivec2(1, row), 0).rgb,
+                    texelFetch(materials, ivec2(2, row), 0).rgb);
+}
+
+
+void
+main() {
+    ivec2 texel = ivec2(gl_FragCoord.xy);
+    float depth = texelFetch(gdepth, texel, 0).r;
+    if (depth == 1.0) {
+        discard;
+    }
+    // back from the depth buffer to world space
+    vec2 uv = gl_FragCoord.xy / render_size;
+    vec4 world_position = inverse_view_projection * vec4(vec3(uv, depth) * 2.0 - 1.0, 1.0);
+    vec3 fragment_position = world_position.xyz / world_position.w;
+
+    vec3 to_light = vlight_position - fragment_position;
+    float distance = length(to_light);
+    // the volume is a cube around the light sphere, its corners are out of reach
+    if (distance > vlight_radius) {
+        discard;
+    }
+    vec4 normal_material = texelFetch(gnormal_material, texel, 0);
+    vec3 normal = normalize(normal_material.xyz);
+    Material material = getMaterial(normal_material.w);
+
+    // same diffuse and specular terms as texturedCube.frag
+    vec3 light_direction = to_light / distance;
+    float diffusion = max(0.0, dot(light_direction, normal));
+    vec3 view_direction = normalize(camera_position - fragment_position);
+    vec3 reflection_direction = reflect(-light_direction, normal);
+    float specular = pow(max(dot(view_direction, reflection_direction), 0), material.surface_brightness);
+    // smooth window so that the light fades out to exactly 0 at its radius
+    float attenuation = pow(clamp(1.0 - pow(distance / vlight_radius, 4.0), 0.0, 1.0), 2.0);
+
+    vec3 albedo = texelFetch(galbedo, texel, 0).rgb;
+    vec3 light = diffusion * vlight_diffuse * material.diffuse_incidence + specular * vlight_specular * material.specular_incidence;
+    fragColor = vec4(albedo * attenuation * light, 1.0);
+}
@@ -0,0 +1,32 @@
+//VERTEX SHADER
+#version 410 core
+
+// unit cube, scaled to the radius of the light it bounds
+in vec3 in_position;
+// per instance
+in vec3 in_light_position;
+in float in_light_radius;
+in vec3 in_light_diffuse;
+in vec3 in_light_specular;
+
+uniform mat4 projection_matrix;
+uniform mat4 view_matrix;
+
+flat out vec3 vlight_position;
+flat out float vlight_radius;
+flat out vec3 vlight_diffuse;
+flat out vec3 vlight_specular;
+
+
+void
+main() {
+    vlight_position = in_light_position;
+    vlight_radius = in_light_radius;
+    vlight_diffuse = in_light_diffuse;
+    vlight_specular = in_light_specular;
+    gl_Position = projection_matrix * view_matrix * vec4(in_light_position + in_position * in_light_radius, 1.0);
+    // The back faces beyond the far plane would be clipped and the light lost, they are moved onto it instead :
+    // x, y and w are left alone, so the volume covers the same pixels (the depth test is off in the lighting passes).
+    // The points behind the camera have z < w already and are still clipped by the near plane.
+    gl_Position.z = min(gl_Position.z, gl_Position.w);
+}
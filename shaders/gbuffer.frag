@@ -0,0 +1,20 @@
+//FRAGMENT SHADER
+#version 410 core
+
+in vec2 vtexcoord;
+in vec3 vnormal;
+
+uniform sampler2D utexture;
+uniform bool textured;
+uniform float material_id;
+
+// G-buffer : the depth is written to the depth attachment, the material id is packed next to the normal
+layout (location = 0) out vec4 albedo;
+layout (location = 1) out vec4 normal_material;
+
+
+void
+main() {
+    albedo = textured ? vec4(texture(utexture, vtexcoord).rgb, 1.0) : vec4(1.0);
+    normal_material = vec4(normalize(vnormal), material_id);
+}
@@ -0,0 +1,22 @@
+//VERTEX SHADER
+#version 410 core
+
+in vec2 in_texcoord;
+in vec3 in_normal;
+in vec3 in_position;
+
+uniform mat4 projection_matrix;
+uniform mat4 view_matrix;
+uniform mat4 model_matrix;
+
+out vec2 vtexcoord;
+out vec3 vnormal;
+
+
+void
+main() {
+    vtexcoord = in_texcoord;
+    // world space normal, see texturedCube.vert for the normal matrix
+    vnormal = mat3(transpose(inverse(model_matrix))) * normalize(in_normal);
+    gl_Position = projection_matrix * view_matrix * model_matrix * vec4(in_position, 1.0);
+}
@@ -0,0 +1,13 @@
+// camera of the frame, shared by the stages
+#ifdef STREAMING_UNIFORMS
+// per frame data, sub-allocated in the streaming buffer of the engine
+layout (std140) uniform FrameData {
+    mat4 projection_matrix;
+    mat4 view_matrix;
+    vec3 camera_position;
+};
+#else
+uniform mat4 projection_matrix;
+uniform mat4 view_matrix;
+uniform vec3 camera_position;
+#endif
@@ -0,0 +1,32 @@
+// Distance in pixels from each vertex of the triangle to its opposite edge, the geometry shaders of the WIREFRAME
+// permutations give it to the fragments, interpolated without perspective it is their distance to every edge.
+// Triangles crossing the near plane get wrong distances, their wires may disappear close to the camera.
+// On the silhouettes only the inner half of the wire is drawn, the other half is out of the triangle.
+uniform vec2 viewport_size;
+
+vec2
+toViewport(vec4 position) {
+    return position.xy / position.w * 0.5 * viewport_size;
+}
+
+vec3
+getEdgeHeights() {
+    vec2 p0 = toViewport(gl_in[0].gl_Position);
+    vec2 p1 = toViewport(gl_in[1].gl_Position);
+    vec2 p2 = toViewport(gl_in[2].gl_Position);
+    vec2 e0 = p2 - p1;
+    vec2 e1 = p2 - p0;
+    vec2 e2 = p1 - p0;
+    // twice the area of the triangle, over the length of an edge, is the height of the opposite vertex
+    float area = abs(e1.x * e2.y - e1.y * e2.x);
+    return vec3(area / length(e0), area / length(e1), area / length(e2));
+}
+
+// what vertex i of the triangle passes on to the fragments, hidden[i] is 1 when the edge opposite of vertex i
+// isn't a real edge of the mesh (the diagonal of a quad) : the same distance out of reach at the three vertices
+vec3
+getEdgeDistance(int i, vec3 heights, vec3 hidden) {
+    vec3 distance = vec3(0.0);
+    distance[i] = heights[i];
+    return mix(distance, vec3(1e4), hidden);
+}
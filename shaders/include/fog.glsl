@@ -0,0 +1,11 @@
+#ifdef FOG
+uniform vec3 fog_color;
+uniform float fog_density;
+
+// exponential squared fog, thickening with the distance to the camera
+vec3
+applyFog(vec3 color, float distance) {
+    float visibility = exp(-pow(fog_density * distance, 2.0));
+    return mix(fog_color, color, clamp(visibility, 0.0, 1.0));
+}
+#endif
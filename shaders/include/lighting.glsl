@@ -0,0 +1,182 @@
+// Phong lighting of the main light, its shadows and the clustered point lights.
+// Reads vnormal and vfragment_position, in world space, and the camera (camera.glsl).
+// A material only pays for the terms it has : DIFFUSE and SPECULAR are defined by the models whose material reflects them.
+
+struct Light {
+    vec3 position;
+    vec3 color;
+    vec3 ambient_intensity;
+    vec3 diffuse_intensity;
+    vec3 specular_intensity;
+};
+
+struct Material {
+    float surface_brightness;
+    vec3 ambient_incidence;
+    vec3 diffuse_incidence;
+    vec3 specular_incidence;
+};
+
+uniform Light light;
+#ifdef GPU_DRIVEN
+// GPU-driven batches draw many objects at once, their materials come from a storage buffer through the vertex shader
+flat in Material vmaterial;
+#define material vmaterial
+#else
+uniform Material material;
+#endif
+
+#ifdef SHADOWS
+#define MAX_CASCADES 4
+// The shadow map of the main light is an atlas of cascades side by side (a single one for spot lights).
+uniform sampler2DShadow shadow_map;
+uniform mat4 light_matrices[MAX_CASCADES];
+uniform vec4 cascade_splits; // view depth where each cascade ends
+uniform int cascade_count;
+#endif
+
+#ifdef CLUSTERED_LIGHTING
+// Clustered forward shading : the view frustum is split into a grid of clusters,
+// every cluster lists the point lights that reach it, so a fragment only loops over those.
+uniform usampler2D cluster_grid; // (offset, count) in the light index list, x = tile, y = depth slice
+uniform usampler2D cluster_light_indices; // rows of 4096 indices
+uniform sampler2D cluster_lights; // one row per light : (position, radius), (diffuse, 0), (specular, 0)
+uniform ivec3 cluster_dimensions;
+uniform vec2 screen_size;
+uniform float cluster_near;
+uniform float cluster_far;
+uniform vec3 point_ambient_light; // ambient light doesn't depend on the position of the light
+#endif
+
+
+#ifdef SHADOWS
+// 1.0 when the fragment is fully lit by the main light, 0.0 when it is in its shadow
+float
+getShadow(vec3 normal, vec3 light_direction) {
+    float view_depth = -(view_matrix * vec4(vfragment_position, 1.0)).z;
+    int cascade = 0;
+    for (int i = 0; i < cascade_count - 1; ++i) {
+        if (view_depth > cascade_splits[i]) {
+            cascade = i + 1;
+        }
+    }
+    vec4 light_space_position = light_matrices[cascade] * vec4(vfragment_position, 1.0);
+    vec3 position = light_space_position.xyz / light_space_position.w * 0.5 + 0.5;
+    // out of the shadow map means out of the light's reach
+    if (any(lessThan(position, vec3(0.0))) || any(greaterThan(position, vec3(1.0)))) {
+        return 1.0;
+    }
+    // the slope scaled bias avoids shadow acne on the surfaces facing away from the light
+    position.z -= max(0.002 * (1.0 - dot(normal, light_direction)), 0.0005);
+    // 3x3 percentage closer filtering, each tap is already a bilinear comparison
+    vec2 texel_size = 1.0 / vec2(textureSize(shadow_map, 0));
+    float visibility = 0.0;
+    for (int x = -1; x <= 1; ++x) {
+        for (int y = -1; y <= 1; ++y) {
+            vec2 offset = vec2(x, y) * texel_size;
+            // the cascades are laid side by side, stay inside of the tile of this cascade
+            float u = clamp(position.x + offset.x * float(cascade_count), 0.0, 1.0);
+            vec2 uv = vec2((float(cascade) + u) / float(cascade_count), position.y + offset.y);
+            visibility += texture(shadow_map, vec3(uv, position.z));
+        }
+    }
+    return visibility / 9.0;
+}
+#endif
+
+// We could do these operations in the fragment shader but for optimisation purpose it is cleverer to do it in the fragment shader.
+// There is a lot more fragments than vertices.
+vec3
+getLight(vec3 color) {
+    vec3 normal = normalize(vnormal);
+
+    /* ambient light */
+    vec3 ambient_light = light.ambient_intensity * light.color * material.ambient_incidence;
+
+    // The light's direction vector is the difference vector between the light's position vector and the fragment's position vector.
+    // We only care about the direction of the light, not its magnitude ;
+    // So all the calculations are done with unit vectors since it simplifies most calculations (like the dot product).
+    vec3 light_direction = normalize(light.position - vfragment_position);
+    vec3 direct_light = vec3(0.0);
+
+#ifdef DIFFUSE
+    /* diffuse light */
+    // Next we need to calculate the diffuse impact of the light on the current fragment.
+    // We do that by taking the dot product between the normal and light's direction vectors.
+    // The resulting value is then multiplied with the light's color to get the diffuse component,
+    // resulting in a darker diffuse component the greater the angle between both vectors:
+    // If the angle between both vectors is greater than 90 degrees then the result of the dot product will actually become negative,
+    // so we max the diffusion to 0 to make sure the diffuse component (and thus the colors) never become negative.
+    float diffusion= max(0.0, dot(light_direction, normal));
+    direct_light += diffusion * light.diffuse_intensity * light.color * material.diffuse_incidence;
+#endif
+
+#ifdef SPECULAR
+    /* specular light */
+    // Specular lighting is based on the reflective properties of surfaces.
+    // We calculate a reflection vector by reflecting the light direction around the normal vector.
+    // Then we calculate the angular distance between this reflection vector and the view direction,
+    // the closer the angle between them, the greater the impact of the specular light.
+    // We do the lighting calculations in view space so that the viewer's position is always at (0,0,0).
+    // First we calculate the the view direction vector.
+    vec3 view_direction = normalize(camera_position - vfragment_position);
+    // Then the corresponding reflect vector along the normal axis.
+    // The reflect function expects the first vector to point from the light source towards the fragment's position,
+    // so it's the oposite of the light's direction
+    vec3 reflection_direction = reflect(-light_direction, normal);
+    // Then what's left to do is to actually calculate the specular component.
+    // We first calculate the dot product between the view direction and the reflect direction (and make sure it's not negative).
+    // Then raise it to the power of the britghness of the surface material.
+    // The higher the shininess value of an object, the more it properly reflects the light instead of scattering it all around and thus the smaller the highlight becomes.
+    float specular = pow(max(dot(view_direction, reflection_direction), 0), material.surface_brightness);
+    direct_light += specular * light.specular_intensity * light.color * material.specular_incidence;
+#endif
+
+    float shadow = 1.0;
+#ifdef SHADOWS
+    shadow = getShadow(normal, light_direction);
+#endif
+
+    return color * (ambient_light + shadow * direct_light);
+}
+
+#ifdef CLUSTERED_LIGHTING
+vec3
+getPointLights(vec3 color) {
+    // find the cluster of the fragment, the depth slices are exponential like the depth precision
+    float view_depth = -(view_matrix * vec4(vfragment_position, 1.0)).z;
+    ivec2 tile = ivec2(gl_FragCoord.xy / screen_size * vec2(cluster_dimensions.xy));
+    tile = clamp(tile, ivec2(0), cluster_dimensions.xy - 1);
+    int slice = int(log(view_depth / cluster_near) / log(cluster_far / cluster_near) * float(cluster_dimensions.z));
+    slice = clamp(slice, 0, cluster_dimensions.z - 1);
+    uvec2 cluster = texelFetch(cluster_grid, ivec2(tile.y * cluster_dimensions.x + tile.x, slice), 0).xy;
+
+    vec3 normal = normalize(vnormal);
+    vec3 view_direction = normalize(camera_position - vfragment_position);
+    vec3 light = point_ambient_light * material.ambient_incidence;
+    for (uint i = cluster.x; i < cluster.x + cluster.y; ++i) {
+        int light_index = int(texelFetch(cluster_light_indices, ivec2(i % 4096u, i / 4096u), 0).r);
+        vec4 position_radius = texelFetch(cluster_lights, ivec2(0, light_index), 0);
+        vec3 to_light = position_radius.xyz - vfragment_position;
+        float distance = length(to_light);
+        if (distance > position_radius.w) {
+            continue;
+        }
+        // same terms as getLight, faded out to 0 at the radius of the light
+        vec3 light_direction = to_light / distance;
+        float attenuation = pow(clamp(1.0 - pow(distance / position_radius.w, 4.0), 0.0, 1.0), 2.0);
+        vec3 point_light = vec3(0.0);
+#ifdef DIFFUSE
+        float diffusion = max(0.0, dot(light_direction, normal));
+        point_light += diffusion * texelFetch(cluster_lights, ivec2(1, light_index), 0).rgb * material.diffuse_incidence;
+#endif
+#ifdef SPECULAR
+        vec3 reflection_direction = reflect(-light_direction, normal);
+        float specular = pow(max(dot(view_direction, reflection_direction), 0), material.surface_brightness);
+        point_light += specular * texelFetch(cluster_lights, ivec2(2, light_index), 0).rgb * material.specular_incidence;
+#endif
+        light += attenuation * point_light;
+    }
+    return color * light;
+}
+#endif
@@ -0,0 +1,15 @@
+#ifdef WIREFRAME
+// Solid and wireframe in a single pass : the geometry shader gives every fragment its distance to the three edges
+// of its triangle, in pixels, the ones closer than half the width of the wire get its color.
+noperspective in vec3 vedge_distance;
+uniform vec3 wire_color;
+uniform float wire_width; // pixels
+
+vec3
+applyWireframe(vec3 color) {
+    float distance = min(min(vedge_distance.x, vedge_distance.y), vedge_distance.z);
+    // antialiased over a pixel
+    float wire = 1.0 - smoothstep(wire_width * 0.5 - 0.5, wire_width * 0.5 + 0.5, distance);
+    return mix(color, wire_color, wire);
+}
+#endif
@@ -0,0 +1,47 @@
+//VERTEX SHADER
+#version 430 core
+
+struct Material {
+    float surface_brightness;
+    vec3 ambient_incidence;
+    vec3 diffuse_incidence;
+    vec3 specular_incidence;
+};
+
+in vec2 in_texcoord;
+in vec3 in_normal;
+in vec3 in_position;
+// per instance : the base instance of each indirect command is the index of the object
+in uint in_object_id;
+
+layout (std430, binding = 0) readonly buffer Transforms {
+    mat4 transforms[];
+};
+
+// surface_brightness, ambient, diffuse and specular incidences of each object
+layout (std430, binding = 4) readonly buffer Materials {
+    vec4 materials[];
+};
+
+uniform mat4 projection_matrix;
+uniform mat4 view_matrix;
+
+out vec2 vtexcoord;
+out vec3 vnormal;
+out vec3 vfragment_position;
+flat out Material vmaterial;
+
+
+void
+main() {
+    mat4 model_matrix = transforms[in_object_id];
+    vtexcoord = in_texcoord;
+    // see texturedCube.vert
+    vfragment_position = vec3(model_matrix * vec4(in_position, 1.0));
+    vnormal = mat3(transpose(inverse(model_matrix))) * normalize(in_normal);
+    vmaterial.surface_brightness = materials[in_object_id * 4].x;
+    vmaterial.ambient_incidence = materials[in_object_id * 4 + 1].xyz;
+    vmaterial.diffuse_incidence = materials[in_object_id * 4 + 2].xyz;
+    vmaterial.specular_incidence = materials[in_object_id * 4 + 3].xyz;
+    gl_Position = projection_matrix * view_matrix * vec4(vfragment_position, 1.0);
+}
@@ -0,0 +1,9 @@
+//FRAGMENT SHADER
+#version 410 core
+
+// only the samples passing the depth test matter, color and depth writes are masked
+
+
+void
+main() {
+}
@@ -0,0 +1,15 @@
+//VERTEX SHADER
+#version 410 core
+
+// unit cube, stretched over the bounding box of the tested model (box_matrix)
+in vec3 in_position;
+
+uniform mat4 projection_matrix;
+uniform mat4 view_matrix;
+uniform mat4 box_matrix;
+
+
+void
+main() {
+    gl_Position = projection_matrix * view_matrix * box_matrix * vec4(in_position, 1.0);
+}
@@ -0,0 +1,22 @@
+//FRAGMENT SHADER
+#version 410 core
+
+in float vlife;
+
+uniform vec3 start_color;
+uniform vec3 end_color;
+
+out vec4 fragColor;
+
+
+void
+main() {
+    // round soft sprite fading out with the age of the particle
+    vec2 point = gl_PointCoord * 2.0 - 1.0;
+    float distance = dot(point, point);
+    if (distance > 1.0) {
+        discard;
+    }
+    float alpha = (1.0 - distance) * (1.0 - vlife);
+    fragColor = vec4(mix(start_color, end_color, vlife), alpha);
+}
@@ -0,0 +1,29 @@
+//VERTEX SHADER
+#version 410 core
+
+in vec3 in_position;
+in float in_age;
+in float in_lifetime;
+
+uniform mat4 projection_matrix;
+uniform mat4 view_matrix;
+uniform float particle_size; // world space diameter
+uniform float viewport_height;
+
+out float vlife;
+
+
+void
+main() {
+    // dead particles are moved out of the clip volume
+    if (in_age >= in_lifetime) {
+        gl_Position = vec4(2.0, 2.0, 2.0, 1.0);
+        gl_PointSize = 1.0;
+        vlife = 1.0;
+        return;
+    }
+    gl_Position = projection_matrix * view_matrix * vec4(in_position, 1.0);
+    // perspective size of the sprite, in pixels
+    gl_PointSize = max(1.0, particle_size * projection_matrix[1][1] * 0.5 * viewport_height / gl_Position.w);
+    vlife = in_age / in_lifetime;
+}
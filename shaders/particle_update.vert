@@ -0,0 +1,84 @@
+//VERTEX SHADER
+#version 410 core
+
+// One particle per vertex, the new state is captured by transform feedback into the other buffer.
+in vec3 in_position;
+in float in_age;
+in vec3 in_velocity;
+in float in_lifetime;
+
+uniform float delta_time; // s
+uniform uint frame;
+uniform int capacity;
+// dead particles whose index is in [emit_start, emit_start + emit_count) modulo capacity are respawned this frame
+uniform int emit_start;
+uniform int emit_count;
+uniform vec3 emitter_position;
+uniform vec3 emitter_direction;
+uniform float emitter_spread; // cosine of the half angle of the emission cone
+uniform vec2 emitter_speed; // min, max
+uniform vec2 emitter_lifetime; // min, max, in s
+uniform vec3 gravity;
+uniform float ground_height;
+uniform float restitution; // part of the vertical speed kept by a bounce
+uniform float friction; // part of the horizontal speed kept by a bounce
+
+out vec3 out_position;
+out float out_age;
+out vec3 out_velocity;
+out float out_lifetime;
+
+
+// PCG hash, Jarzynski and Olano, "Hash Functions for GPU Rendering"
+uint
+hash(uint x) {
+    uint state = x * 747796405u + 2891336453u;
+    uint word = ((state >> ((state >> 28u) + 4u)) ^ state) * 277803737u;
+    return (word >> 22u) ^ word;
+}
+
+float
+random(inout uint seed) {
+    seed = hash(seed);
+    return float(seed) / 4294967295.0;
+}
+
+void
+main() {
+    vec3 position = in_position;
+    float age = in_age;
+    vec3 velocity = in_velocity;
+    float lifetime = in_lifetime;
+    if (age >= lifetime) {
+        int slot = (gl_VertexID - emit_start + capacity) % capacity;
+        if (slot < emit_count) {
+            uint seed = hash(uint(gl_VertexID) ^ hash(frame));
+            // uniform direction in the emission cone
+            float z = mix(emitter_spread, 1.0, random(seed));
+            float phi = 6.28318530718 * random(seed);
+            float r = sqrt(max(0.0, 1.0 - z * z));
+            vec3 w = normalize(emitter_direction);
+            vec3 u = normalize(cross(abs(w.y) < 0.99 ? vec3(0.0, 1.0, 0.0) : vec3(1.0, 0.0, 0.0), w));
+            vec3 v = cross(w, u);
+            velocity = (r * cos(phi) * u + r * sin(phi) * v + z * w) * mix(emitter_speed.x, emitter_speed.y, random(seed));
+            position = emitter_position;
+            age = 0.0;
+            lifetime = mix(emitter_lifetime.x, emitter_lifetime.y, random(seed));
+        }
+    }
+    else {
+        velocity += gravity * delta_time;
+        position += velocity * delta_time;
+        age += delta_time;
+        // bounce on the ground
+        if (position.y < ground_height && velocity.y < 0.0) {
+            position.y = ground_height;
+            velocity.y = -velocity.y * restitution;
+            velocity.xz *= friction;
+        }
+    }
+    out_position = position;
+    out_age = age;
+    out_velocity = velocity;
+    out_lifetime = lifetime;
+}
@@ -0,0 +1,9 @@
+//FRAGMENT SHADER
+#version 410 core
+
+// depth only : the rasterizer writes the depth, there is no color attachment
+
+
+void
+main() {
+}
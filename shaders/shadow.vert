@@ -0,0 +1,13 @@
+//VERTEX SHADER
+#version 410 core
+
+in vec3 in_position;
+
+uniform mat4 light_matrix; // projection * view of the light
+uniform mat4 model_matrix;
+
+
+void
+main() {
+    gl_Position = light_matrix * model_matrix * vec4(in_position, 1.0);
+}
@@ -0,0 +1,11 @@
+//FRAGMENT SHADER
+#version 410 core
+
+// copies the cached static shadow map into the depth buffer the dynamic casters are drawn on, texel by texel
+uniform sampler2D static_shadow_map;
+
+
+void
+main() {
+    gl_FragDepth = texelFetch(static_shadow_map, ivec2(gl_FragCoord.xy), 0).r;
+}
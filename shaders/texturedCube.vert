@@ -5,10 +5,30 @@ in vec2 in_texcoord;
 in vec3 in_normal;
 in vec3 in_position;
 
-uniform mat4 projection_matrix;
-uniform mat4 view_matrix;
+#ifdef INSTANCING
+// per instance transform, relative to the model
+in mat4 in_instance_matrix;
+#endif
+
+#include "include/camera.glsl"
+#ifdef STREAMING_UNIFORMS
+// per model data, sub-allocated in the streaming buffer of the engine
+layout (std140) uniform ModelData {
+    mat4 model_matrix;
+};
+#else
 uniform mat4 model_matrix;
+#endif
 
+#ifdef WIREFRAME
+// the wireframe geometry shader sits in between, it passes them on to the fragment shader under their names
+#define vtexcoord wtexcoord
+#define vnormal wnormal
+#define vfragment_position wfragment_position
+// 1 when the edge opposite of the vertex is the diagonal of a quad, left out of the wireframe
+in float in_hidden_edge;
+out float whidden_edge;
+#endif
 out vec2 vtexcoord;
 out vec3 vnormal;
 out vec3 vfragment_position;
@@ -16,10 +36,17 @@ out vec3 vfragment_position;
 
 void
 main() {
+    mat4 world_matrix = model_matrix;
+#ifdef INSTANCING
+    world_matrix = model_matrix * in_instance_matrix;
+#endif
     vtexcoord = in_texcoord;
+#ifdef WIREFRAME
+    whidden_edge = in_hidden_edge;
+#endif
     // We're going to do all the lighting calculations in world space so we want a vertex position that is in world space.
     // We can accomplish this by multiplying the vertex position attribute with the model matrix to transform it to world space coordinates. 
-    vfragment_position = vec3(model_matrix * vec4(in_position, 1.0));
+    vfragment_position = vec3(world_matrix * vec4(in_position, 1.0));
     // Calculations in the fragment shader are all done in world space so we should transform the normal vectors to world space.
     // But mormal vectors are only direction vectors and do not represent a specific position in space.
     // And normal vectors also do not have a homogeneous coordinate (the w component of a vertex position). 
@@ -30,7 +57,7 @@ main() {
     // To solve that problem we use a "normal matrix", i.e "the transpose of the inverse of the upper-left 3x3 part of the model matrix".
     // (note that a uniform scale only changes the normal's magnitude, not its direction, which is easily fixed by normalizing it).
     // (if you want to understand the linear algebra behind what is called a "normal matrix", read that : http://www.lighthouse3d.com/tutorials/glsl-12-tutorial/the-normal-matrix/)
-    vnormal = mat3(transpose(inverse(model_matrix))) * normalize(in_normal);
+    vnormal = mat3(transpose(inverse(world_matrix))) * normalize(in_normal);
 
-    gl_Position = projection_matrix * view_matrix * model_matrix * vec4(in_position, 1.0);
+    gl_Position = projection_matrix * view_matrix * world_matrix * vec4(in_position, 1.0);
 }
\ No newline at end of file
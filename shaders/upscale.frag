@@ -0,0 +1,28 @@
+//FRAGMENT SHADER
+#version 410 core
+
+in vec2 vuv;
+
+uniform sampler2D scene_texture;
+uniform vec2 render_scale; // part of the texture covered by the scene
+uniform float sharpness;
+
+out vec4 fragColor;
+
+
+void
+main() {
+    vec2 texel_size = 1.0 / vec2(textureSize(scene_texture, 0));
+    // the bilinear filter must not reach the texels outside of the rendered area
+    vec2 uv = clamp(vuv * render_scale, 0.5 * texel_size, render_scale - 0.5 * texel_size);
+    vec3 color = texture(scene_texture, uv).rgb;
+    // unsharp mask over the neighbouring texels, brings back some of the detail lost by the upscale
+    if (sharpness > 0.0) {
+        vec3 neighbours = texture(scene_texture, uv + vec2(texel_size.x, 0.0)).rgb
+                        + texture(scene_texture, uv - vec2(texel_size.x, 0.0)).rgb
+                        + texture(scene_texture, uv + vec2(0.0, texel_size.y)).rgb
+                        + texture(scene_texture, uv - vec2(0.0, texel_size.y)).rgb;
+        color = clamp(color + sharpness * (color - 0.25 * neighbours), 0.0, 1.0);
+    }
+    fragColor = vec4(color, 1.0);
+}
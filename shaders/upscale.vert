@@ -0,0 +1,12 @@
+//VERTEX SHADER
+#version 410 core
+
+out vec2 vuv;
+
+// full screen triangle, no vertex buffer needed
+void
+main() {
+    vec2 position = vec2((gl_VertexID << 1) & 2, gl_VertexID & 2);
+    vuv = position;
+    gl_Position = vec4(position * 2.0 - 1.0, 0.0, 1.0);
+}